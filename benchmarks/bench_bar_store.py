@@ -0,0 +1,70 @@
+"""
+BarStore vs re-reading Parquet for months of synthetic 1m bars.
+
+Builds the store by appending one trading day at a time (as the dashboard
+would), then times opening the full history, a one-day window view and a
+pandas read. Correctness is covered by tests/test_bar_store.py.
+
+    python -m benchmarks.bench_bar_store --days 120
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from utils.bar_store import BarStore
+from benchmarks.fakes import synthetic_ohlcv
+
+
+def timed(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=int, default=120)
+    args = parser.parse_args()
+
+    # 390 one-minute bars per regular US session
+    sessions = pd.bdate_range('2024-01-02', periods=args.days)
+    frames = []
+    for i, day in enumerate(sessions):
+        frame = synthetic_ohlcv(rows=390, start=day + pd.Timedelta(hours=9, minutes=30),
+                                freq='1min', seed=i)
+        frames.append(frame)
+    full = pd.concat(frames)
+
+    root = tempfile.mkdtemp(prefix='bars-')
+    store = BarStore(root)
+    started = time.perf_counter()
+    for frame in frames:
+        store.append('SYN', '1m', frame)
+    append_time = time.perf_counter() - started
+    day = sessions[len(sessions) // 2]
+
+    parquet_path = os.path.join(root, 'full.parquet')
+    full.to_parquet(parquet_path)
+
+    print(f"{len(full):,} bars over {args.days} sessions, "
+          f"{os.path.getsize(os.path.join(root, 'SYN__1m.bars')) / 1e6:.1f} MB on disk")
+    print(f"append (per day)     : {append_time / len(frames) * 1e3:.2f} ms")
+    t, _ = timed(lambda: store.view('SYN', '1m'))
+    print(f"open full (view)     : {t * 1e3:.3f} ms")
+    t, _ = timed(lambda: store.view('SYN', '1m', day, day + pd.Timedelta(days=1))['Close'].mean())
+    print(f"one-day window mean  : {t * 1e3:.3f} ms")
+    t, _ = timed(lambda: store.read('SYN', '1m'))
+    print(f"read -> DataFrame    : {t * 1e3:.2f} ms")
+    t, _ = timed(lambda: pd.read_parquet(parquet_path))
+    print(f"parquet -> DataFrame : {t * 1e3:.2f} ms")
+    store.clear()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Per-frame calculate_technical_indicators loop vs calculate_batch_indicators.
+
+Checks numerical parity against the per-frame function before timing.
+
+    python -m benchmarks.bench_batch_indicators --symbols 500 --rows 1250
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.metrics_calculator import MetricsCalculator
+from benchmarks.fakes import synthetic_ohlcv
+
+
+def synthetic_close_matrix(symbols, rows, ragged=True):
+    """Aligned close matrix; with ragged=True some symbols list late or have gaps"""
+    frames = {}
+    for i in range(symbols):
+        close = synthetic_ohlcv(rows=rows, seed=i)['Close']
+        if ragged and i % 7 == 1:
+            close.iloc[:rows // 5] = np.nan
+        if ragged and i % 11 == 2:
+            close.iloc[rows // 2:rows // 2 + 3] = np.nan
+        frames[f"SYM{i}"] = close
+    return pd.DataFrame(frames)
+
+
+def check_parity(close, batch, rtol=1e-9, atol=1e-9):
+    """Compare each symbol against the per-frame function run on its own rows"""
+    worst = 0.0
+    for symbol in close.columns:
+        listed = close.index >= close[symbol].first_valid_index()
+        frame = close.loc[listed, [symbol]].rename(columns={symbol: 'Close'})
+        expected = MetricsCalculator.calculate_technical_indicators(frame)
+        for indicator in MetricsCalculator.INDICATORS:
+            if batch.loc[~listed, (indicator, symbol)].notna().any():
+                raise AssertionError(f"Values before listing for {symbol} {indicator}")
+            a = expected[indicator].to_numpy()
+            b = batch.loc[listed, (indicator, symbol)].to_numpy()
+            if not np.array_equal(np.isnan(a), np.isnan(b)):
+                raise AssertionError(f"NaN layout differs for {symbol} {indicator}")
+            mask = ~np.isnan(a)
+            np.testing.assert_allclose(b[mask], a[mask], rtol=rtol, atol=atol,
+                                       err_msg=f"{symbol} {indicator}")
+            if mask.any():
+                worst = max(worst, float(np.max(np.abs(b[mask] - a[mask]))))
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--rows', type=int, default=1250)
+    args = parser.parse_args()
+
+    close = synthetic_close_matrix(args.symbols, args.rows)
+    batch = MetricsCalculator.calculate_batch_indicators(close)
+    worst = check_parity(close, batch)
+    print(f"parity ok (max abs diff {worst:.2e})")
+
+    start = time.perf_counter()
+    for symbol in close.columns:
+        MetricsCalculator.calculate_technical_indicators(close[[symbol]].rename(columns={symbol: 'Close'}))
+    loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    MetricsCalculator.calculate_batch_indicators(close)
+    vectorized = time.perf_counter() - start
+
+    print(f"symbols={args.symbols} rows={args.rows}")
+    print(f"per-frame loop : {loop:.3f}s")
+    print(f"batch          : {vectorized:.3f}s ({loop / vectorized:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Figure build time and serialized JSON size with and without downsampling.
+
+    python -m benchmarks.bench_chart_downsampling --rows 50000 --symbols 5
+"""
+import argparse
+import time
+
+from utils.chart_builder import ChartBuilder
+from benchmarks.fakes import synthetic_ohlcv
+
+
+def measure(build):
+    start = time.perf_counter()
+    fig = build()
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    payload = fig.to_json()
+    serialized = time.perf_counter() - start
+    return built, serialized, len(payload)
+
+
+def report(label, full, reduced):
+    print(label)
+    for name, (built, serialized, size) in (('full', full), ('downsampled', reduced)):
+        print(f"  {name:<12} build {built * 1000:8.1f}ms  to_json {serialized * 1000:8.1f}ms  "
+              f"{size / 1e6:7.2f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=50000, help='bars per symbol (e.g. ~4 months of 1m bars)')
+    parser.add_argument('--symbols', type=int, default=5)
+    parser.add_argument('--max-points', type=int, default=ChartBuilder.DEFAULT_MAX_POINTS)
+    args = parser.parse_args()
+
+    frames = {f"SYM{i}": synthetic_ohlcv(rows=args.rows, freq='min', seed=i) for i in range(args.symbols)}
+    first = next(iter(frames.values()))
+
+    report(f"create_price_chart ({args.rows} rows)",
+           measure(lambda: ChartBuilder.create_price_chart(first.copy(), max_points=None)),
+           measure(lambda: ChartBuilder.create_price_chart(first.copy(), max_points=args.max_points)))
+    report(f"create_comparison_chart ({args.symbols} x {args.rows} rows)",
+           measure(lambda: ChartBuilder.create_comparison_chart(frames, max_points=None)),
+           measure(lambda: ChartBuilder.create_comparison_chart(frames, max_points=args.max_points)))
+
+
+if __name__ == '__main__':
+    main()
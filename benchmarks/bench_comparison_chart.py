@@ -0,0 +1,46 @@
+"""
+Python-side build time and payload size of create_comparison_chart, default vs fast path.
+
+    python -m benchmarks.bench_comparison_chart --symbols 25 --rows 1250
+"""
+import argparse
+import time
+
+from utils.chart_builder import ChartBuilder
+from benchmarks.fakes import synthetic_ohlcv
+
+
+def measure(build, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fig = build()
+    built = (time.perf_counter() - start) / repeat
+    start = time.perf_counter()
+    payload = fig.to_json()
+    serialized = time.perf_counter() - start
+    return built, serialized, len(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=25)
+    parser.add_argument('--rows', type=int, default=1250)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    frames = {}
+    for i in range(args.symbols):
+        # Mix exchanges so the fast path has to align differing timezones
+        tz = 'Asia/Kolkata' if i % 2 else 'America/New_York'
+        frames[f"SYM{i}"] = synthetic_ohlcv(rows=args.rows, tz=tz, seed=i)
+
+    print(f"symbols={args.symbols} rows={args.rows}")
+    for label, fast in (('default', False), ('fast', True)):
+        built, serialized, size = measure(
+            lambda: ChartBuilder.create_comparison_chart(frames, fast=fast), args.repeat)
+        print(f"  {label:<8} build {built * 1000:8.1f}ms  to_json {serialized * 1000:8.1f}ms  "
+              f"{size / 1e6:6.2f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Serial loop vs StockDataFetcher.fetch_many against a latency-injecting replay provider.
+
+Each phase starts cold: a fresh provider, history cache and symbol resolver
+in a scratch directory (the real .cache is never touched), so neither phase
+inherits symbol resolutions from the other. Both orders are run and
+reported.
+
+    python -m benchmarks.bench_fetch_many --symbols 20 --latency 0.2
+"""
+import argparse
+import time
+
+from utils.data_fetcher import StockDataFetcher
+from benchmarks.fakes import ReplayProvider, replay_backend
+
+
+def serial_loop(symbols, args):
+    for symbol in symbols:
+        StockDataFetcher.get_historical_data(symbol, period='5y')
+    return len(symbols), 0
+
+
+def concurrent(symbols, args):
+    data, errors = StockDataFetcher.fetch_many(symbols, period='5y', max_workers=args.workers)
+    return len(data), len(errors)
+
+
+PHASES = {'serial loop': serial_loop, 'fetch_many': concurrent}
+
+
+def timed(reset, phase, symbols, args):
+    """Run one phase from a cold backend; returns (seconds, ok, failed, provider calls)"""
+    provider = reset(ReplayProvider(latency=args.latency))
+    start = time.perf_counter()
+    ok, failed = PHASES[phase](symbols, args)
+    return time.perf_counter() - start, ok, failed, sum(provider.calls.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.2, help='seconds per replayed network call')
+    parser.add_argument('--workers', type=int, default=None,
+                        help="thread cap (default: one per symbol up to the governor's in-flight limit)")
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    print(f"symbols={args.symbols} latency={args.latency}s workers={args.workers or 'auto'}")
+    with replay_backend() as reset:
+        for order in (['serial loop', 'fetch_many'], ['fetch_many', 'serial loop']):
+            print(f"order: {' then '.join(order)}")
+            results = {phase: timed(reset, phase, symbols, args) for phase in order}
+            for phase in order:
+                seconds, ok, failed, calls = results[phase]
+                print(f"  {phase:12s}: {seconds:.3f}s ({ok} ok, {failed} failed, {calls} provider calls)")
+            print(f"  speedup     : {results['serial loop'][0] / results['fetch_many'][0]:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
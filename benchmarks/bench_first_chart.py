@@ -0,0 +1,56 @@
+"""
+Time to first chart: fetch-everything-then-draw vs drawing as histories stream in.
+
+The old page waited for fetch_panel (the slowest symbol) before building
+the comparison chart; the price view now draws from iter_many's first
+result. Replay latency is jittered so symbols finish at different times.
+Each phase starts from a cold backend in a scratch directory.
+
+    python -m benchmarks.bench_first_chart --symbols 10 --latency 0.3 --jitter 0.8
+"""
+import argparse
+import time
+
+from utils.chart_builder import ChartBuilder
+from utils.data_fetcher import StockDataFetcher
+from utils.price_panel import PricePanel
+from benchmarks.fakes import ReplayProvider, replay_backend
+
+
+def run(symbols, args, reset):
+    reset(ReplayProvider(latency=args.latency, jitter=args.jitter, seed=1))
+    started = time.perf_counter()
+    panel, _ = StockDataFetcher.fetch_panel(symbols, period='1y')
+    ChartBuilder.create_comparison_chart(panel, fast=len(symbols) >= 10)
+    eager = time.perf_counter() - started
+
+    reset(ReplayProvider(latency=args.latency, jitter=args.jitter, seed=1))
+    started = time.perf_counter()
+    histories = {}
+    first = None
+    for symbol, history, error in StockDataFetcher.iter_many(symbols, period='1y'):
+        if error is None:
+            histories[symbol] = history
+        if first is None and histories:
+            ChartBuilder.create_comparison_chart(PricePanel.from_frames(histories), fast=len(symbols) >= 10)
+            first = time.perf_counter() - started
+    complete = time.perf_counter() - started
+
+    print(f"symbols={args.symbols} latency={args.latency}s jitter={args.jitter:.0%}")
+    print(f"fetch all, then draw : first chart {eager:.3f}s")
+    print(f"progressive          : first chart {first:.3f}s ({eager / first:.1f}x sooner), all symbols {complete:.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.3, help='mean seconds per replayed network call')
+    parser.add_argument('--jitter', type=float, default=0.8, help='latency spread as a fraction of --latency')
+    args = parser.parse_args()
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    with replay_backend() as reset:
+        run(symbols, args, reset)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Request governor under injected upstream faults, with and without it.
+
+Two scenarios against a fault-injecting replay provider:
+
+* throttling: a share of calls fail with HTTP 429. Without the governor
+  those symbols error out; with it they are retried with backoff.
+* outage: every call hangs for --timeout seconds and fails. The cache was
+  warmed earlier but its tail is due for a refresh. Without the governor
+  every symbol pays the full timeout and errors; with it the breaker opens
+  after a few failures, the rest fail fast and cached bars are served.
+
+    python -m benchmarks.bench_governor --symbols 20 --throttle-rate 0.3
+"""
+import argparse
+import time
+
+from utils.data_fetcher import StockDataFetcher
+from utils.instrumentation import Instrumentation
+from utils.providers import FaultInjectingProvider, ReplayProvider
+from utils.request_governor import RequestGovernor
+from benchmarks.fakes import replay_backend
+
+
+def run(symbols, provider, governor, cache):
+    StockDataFetcher.provider = provider
+    StockDataFetcher.governor = governor
+    StockDataFetcher.history_cache = cache
+    record, token = Instrumentation.start_run('bench')
+    started = time.perf_counter()
+    data, errors = StockDataFetcher.fetch_many(symbols, period='1y', timeout=60)
+    elapsed = time.perf_counter() - started
+    Instrumentation.finish_run(record, token)
+    return elapsed, len(data), len(errors), record.counters
+
+
+def report(label, result):
+    elapsed, ok, failed, counters = result
+    print(f"  {label:18s} {elapsed:7.2f}s  ok {ok:3d}  failed {failed:3d}  "
+          f"upstream calls {counters.get('provider.history', 0):3d}  retries {counters.get('governor.retry', 0):3d}  "
+          f"rejected {counters.get('governor.rejected', 0):3d}  stale {counters.get('history_cache.stale', 0):3d}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--throttle-rate', type=float, default=0.3)
+    parser.add_argument('--timeout', type=float, default=0.5, help='seconds a call hangs during the outage')
+    parser.add_argument('--latency', type=float, default=0.02)
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+
+    def governor():
+        return RequestGovernor(max_retries=4, base_delay=0.05, max_delay=0.5, reset_timeout=30, seed=0)
+
+    with replay_backend() as reset:
+        print(f"throttling ({args.throttle_rate:.0%} of calls get 429):")
+        for label, gov in (('no governor', None), ('governor', governor())):
+            provider = FaultInjectingProvider(ReplayProvider(latency=args.latency), throttle_rate=args.throttle_rate,
+                                              seed=1)
+            reset(provider)
+            report(label, run(symbols, provider, gov, StockDataFetcher.history_cache))
+
+        print(f"outage (every call hangs {args.timeout}s, cache warmed but due for refresh):")
+        for label, gov in (('no governor', None), ('governor', governor())):
+            reset()
+            # ttl=0: every lookup wants a fresh tail from upstream
+            cache = StockDataFetcher.history_cache
+            cache.ttl = 0
+            run(symbols, ReplayProvider(), None, cache)
+            provider = FaultInjectingProvider(ReplayProvider(), timeout_rate=1.0, timeout=args.timeout)
+            report(label, run(symbols, provider, gov, cache))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Import-time budget for the dashboard and CLI entry points.
+
+Each target is imported in a fresh interpreter (--runs times, best time
+kept) and checked against a time budget and a list of modules it must not
+pull in (e.g. yfinance before the first network call). One extra run under
+`python -X importtime` lists the slowest modules by self time.
+
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --scale 2 --top 15
+
+Exits non-zero when a target is over budget or imports a forbidden module.
+Budgets are for a typical laptop; --scale multiplies them for slower hosts.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name: (import statement, budget in ms, modules that must not be imported)
+TARGETS = {
+    # What main.py imports before the first paint; the data layer loads afterwards
+    'dashboard shell': ('import streamlit; import utils.instrumentation', 900,
+                        ['pandas', 'numpy', 'yfinance', 'utils.data_fetcher']),
+    'data layer': ('import utils.data_fetcher', 900, ['yfinance', 'streamlit']),
+    'batch cli': ('import utils.cli', 900, ['yfinance', 'streamlit', 'plotly']),
+    'charts': ('import utils.chart_builder', 1000, ['yfinance']),
+}
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - started
+print(json.dumps({{'ms': elapsed * 1000, 'modules': [m for m in {forbidden!r} if m in sys.modules]}}))
+"""
+
+
+def measure(statement, forbidden):
+    result = subprocess.run([sys.executable, '-c', PROBE.format(statement=statement, forbidden=forbidden)],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(statement, top):
+    """(self ms, cumulative ms, module) for the slowest modules under -X importtime"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((int(own) / 1000, int(cumulative) / 1000, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--targets', nargs='+', choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiply every budget by this factor')
+    parser.add_argument('--top', type=int, default=8, help='Slowest modules to list per target')
+    args = parser.parse_args()
+
+    failures = []
+    for name in args.targets:
+        statement, budget, forbidden = TARGETS[name]
+        budget *= args.scale
+        runs = [measure(statement, forbidden) for _ in range(args.runs)]
+        best = min(run['ms'] for run in runs)
+        leaked = sorted(set(module for run in runs for module in run['modules']))
+        status = 'ok' if best <= budget and not leaked else 'FAIL'
+        print(f"{name:16s} {best:8.1f} ms  (budget {budget:.0f} ms)  {status}")
+        for own, cumulative, module in slowest_imports(statement, args.top):
+            print(f"    {own:7.1f} ms self {cumulative:8.1f} ms cumulative  {module}")
+        if best > budget:
+            failures.append(f"{name}: {best:.0f} ms > {budget:.0f} ms budget")
+        if leaked:
+            failures.append(f"{name}: imports {', '.join(leaked)}")
+
+    if failures:
+        print(f"{len(failures)} import budget failure(s):")
+        for message in failures:
+            print(f"  {message}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
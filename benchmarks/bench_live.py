@@ -0,0 +1,110 @@
+"""
+Live watchlist against a replay feed: per-tick latency and chart update cost.
+
+A LiveReplayProvider releases --rate bars per second per symbol (with
+--latency seconds of simulated round trip per request) while a
+LiveWatchlist polls it every --poll seconds for --duration seconds. A
+consumer loop reads the updates each poll and extends the live chart in
+place, and for comparison rebuilds what the snapshot dashboard drew
+(create_comparison_chart over the held frames, create_price_chart per
+symbol). Reports requests per tick, tick duration, bar latency (release
+to arrival) and chart update times, and checks no bar was missed.
+
+    python -m benchmarks.bench_live --symbols 20 --rate 2 --poll 1 --duration 10
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from utils.bar_store import BarStore
+from utils.chart_builder import ChartBuilder
+from utils.data_fetcher import StockDataFetcher
+from utils.live_watchlist import LiveWatchlist
+from utils.providers import LiveReplayProvider
+from benchmarks.fakes import replay_backend
+
+
+def percentiles(values):
+    if not values:
+        return "n/a"
+    p50, p95 = np.percentile(values, [50, 95])
+    return f"p50 {p50 * 1e3:7.1f} ms  p95 {p95 * 1e3:7.1f} ms  max {max(values) * 1e3:7.1f} ms"
+
+
+def run(symbols, provider, args):
+    # Generate the synthetic histories up front so the first tick measures polling, not setup
+    for symbol in symbols:
+        provider._full_history(symbol, args.interval)
+    provider.started = provider.clock()
+
+    watchlist = LiveWatchlist(symbols, interval=args.interval, poll_seconds=args.poll)
+    figure = ChartBuilder.create_live_chart(symbols)
+    cursors, bases = {}, {}
+    incremental, rebuild_comparison, rebuild_price = [], [], []
+
+    watchlist.start()
+    deadline = time.monotonic() + args.duration
+    while time.monotonic() < deadline:
+        time.sleep(args.poll)
+        started = time.perf_counter()
+        updates, cursors = watchlist.updates_since(cursors)
+        ChartBuilder.append_live_bars(figure, updates, bases)
+        figure.to_plotly_json()
+        incremental.append(time.perf_counter() - started)
+
+        frames = {symbol: df.copy() for symbol, df in watchlist.frames.items()}
+        if frames:
+            started = time.perf_counter()
+            ChartBuilder.create_comparison_chart(frames).to_plotly_json()
+            rebuild_comparison.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            for df in frames.values():
+                ChartBuilder.create_price_chart(df).to_plotly_json()
+            rebuild_price.append(time.perf_counter() - started)
+    watchlist.stop()
+    stats = watchlist.stats()
+
+    # Every bar released before the last poll must be held, with no gaps
+    missing = 0
+    for symbol in symbols:
+        held = watchlist.frames[symbol]
+        full = provider._full_history(symbol, args.interval)
+        expected = full[(full.index >= held.index[0]) & (full.index <= held.index[-1])]
+        missing += len(expected.index.difference(held.index))
+    assert missing == 0, f"{missing} released bars missing from the watchlist"
+
+    ticks = list(watchlist.ticks)
+    print(f"{len(symbols)} symbols, {args.rate:g} bars/s each, poll every {args.poll:g}s for {args.duration:g}s")
+    print(f"  polls {stats['ticks']}, requests {provider.calls['history_many']} batched + "
+          f"{provider.calls['history']} single, errors {stats['errors']}")
+    print(f"  bars received {stats['new_bars']} (no gaps)")
+    print(f"  tick duration          {percentiles([tick['duration_s'] for tick in ticks[1:]])}")
+    print(f"  bar latency            {percentiles([tick['bar_latency_s'] for tick in ticks if tick.get('bar_latency_s') is not None])}")
+    print(f"  chart: append in place {percentiles(incremental)}")
+    print(f"  chart: rebuild compare {percentiles(rebuild_comparison)}")
+    print(f"  chart: rebuild price   {percentiles(rebuild_price)}  ({len(symbols)} figures)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--rate', type=float, default=2.0, help="bars released per second per symbol")
+    parser.add_argument('--poll', type=float, default=1.0, help="seconds between polls")
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--latency', type=float, default=0.05, help="simulated seconds per request")
+    parser.add_argument('--interval', default='1m')
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    provider = LiveReplayProvider(bars_per_second=args.rate, latency=args.latency)
+    with replay_backend(provider):
+        # Bars and saved indicator states go to the backend's scratch directory
+        scratch = os.path.dirname(StockDataFetcher.history_cache.root)
+        StockDataFetcher.bar_store = BarStore(root=os.path.join(scratch, 'bars'))
+        run(symbols, provider, args)
+
+
+if __name__ == '__main__':
+    main()
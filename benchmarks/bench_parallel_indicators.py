@@ -0,0 +1,60 @@
+"""
+Scaling of ParallelIndicatorEngine from 1 to N worker processes.
+
+Each worker count gets a warmed-up pool; results are checked against the
+single-process calculate_batch_indicators before timing.
+
+    python -m benchmarks.bench_parallel_indicators --symbols 4000 --rows 2000
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from utils.metrics_calculator import MetricsCalculator
+from utils.parallel_indicators import ParallelIndicatorEngine
+from benchmarks.bench_batch_indicators import synthetic_close_matrix
+
+
+def best_of(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=4000)
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    close = synthetic_close_matrix(args.symbols, args.rows)
+    print(f"symbols={args.symbols} rows={args.rows} cpus={os.cpu_count()} "
+          f"input={close.to_numpy().nbytes / 1e6:.0f} MB")
+
+    expected = MetricsCalculator.calculate_batch_indicators(close)
+    baseline = best_of(lambda: MetricsCalculator.calculate_batch_indicators(close), args.repeat)
+    print(f"  1 core (no pool) : {baseline:.3f}s")
+
+    counts = sorted({args.max_workers} | {2 ** i for i in range(1, 8) if 2 ** i < args.max_workers})
+    for workers in counts:
+        if workers < 2:
+            continue
+        with ParallelIndicatorEngine(workers=workers) as engine:
+            engine.warm_up()
+            result = engine.compute(close)
+            np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-9, atol=1e-9)
+            elapsed = best_of(lambda: engine.compute(close), args.repeat)
+        speedup = baseline / elapsed
+        print(f"{workers:3d} workers        : {elapsed:.3f}s ({speedup:.2f}x, "
+              f"{speedup / workers:.0%} efficiency, {args.symbols / elapsed:,.0f} symbols/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""
+Interval switching: a fresh download per interval vs deriving from cached finer bars.
+
+Fetches --days of 5m bars once, then walks the dashboard's interval list
+(15m, 30m, 1h, 1d) with derivation on and off against a replay provider
+with --latency seconds per call; 1d is never derived (intraday bars are
+unadjusted), so it downloads in both walks. Derived bars are checked
+against a plain pandas resample of the same data first. Each walk starts
+from empty caches in a scratch directory, with intraday bars in a bar
+store as in the app.
+
+    python -m benchmarks.bench_resampler --latency 0.3
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from utils.bar_store import BarStore
+from utils.data_fetcher import StockDataFetcher
+from utils.instrumentation import Instrumentation
+from utils.providers import ReplayProvider
+from utils.resampler import Resampler
+from benchmarks.fakes import replay_backend
+
+INTERVALS = ['15m', '30m', '1h', '1d']
+
+
+def check_parity(symbol, provider):
+    fine = provider.history(symbol, period='max', interval='5m')
+    exchange = Resampler.exchange_for(symbol)
+    tz, session_open, _ = Resampler.SESSIONS[exchange]
+    for interval in ['15m', '1h']:
+        rule = f"{Resampler.INTERVAL_MINUTES[interval]}min"
+        expected = fine.resample(rule, offset=session_open, origin='start_day').agg(Resampler.AGGREGATIONS)
+        expected = expected[expected['Close'].notna()]
+        pd.testing.assert_frame_equal(Resampler.resample(fine, interval, exchange), expected, check_freq=False)
+
+
+def walk(symbol, derive):
+    original = StockDataFetcher._derived_history
+    if not derive:
+        StockDataFetcher._derived_history = staticmethod(lambda *args: None)
+    timings = {}
+    try:
+        for interval in INTERVALS:
+            record, token = Instrumentation.start_run('bench')
+            started = time.perf_counter()
+            StockDataFetcher.get_historical_data(symbol, period='5d', interval=interval)
+            timings[interval] = (time.perf_counter() - started, record.counters.get('provider.history', 0))
+            Instrumentation.finish_run(record, token)
+    finally:
+        StockDataFetcher._derived_history = original
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--latency', type=float, default=0.3, help='seconds per replayed network call')
+    args = parser.parse_args()
+
+    for symbol in ['AAPL', 'TCS.NS']:
+        check_parity(symbol, ReplayProvider())
+    print("Derived bars match pandas resample (15m, 1h; US and NSE sessions)")
+
+    with replay_backend() as reset:
+        for derive in (False, True):
+            reset(ReplayProvider(latency=args.latency))
+            scratch = os.path.dirname(StockDataFetcher.history_cache.root)
+            StockDataFetcher.bar_store = BarStore(root=os.path.join(scratch, 'bars'))
+            StockDataFetcher.get_historical_data('AAPL', period='5d', interval='5m')
+            timings = walk('AAPL', derive)
+            label = 'derived' if derive else 'download'
+            print(f"{label:9s}" + ''.join(f"  {interval}: {elapsed * 1e3:7.1f} ms ({calls} calls)"
+                                          for interval, (elapsed, calls) in timings.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Latency of SymbolIndex prefix/fuzzy search on a synthetic listings universe.
+
+    python -m benchmarks.bench_symbol_search --universe 20000
+"""
+import argparse
+import random
+import string
+import time
+
+from utils.symbol_index import SymbolIndex
+
+WORDS = ['Global', 'Industries', 'Bank', 'Motors', 'Pharma', 'Energy', 'Steel', 'Power',
+         'Finance', 'Technologies', 'Holdings', 'Cement', 'Foods', 'Chemicals', 'Textiles']
+
+
+def synthetic_listings(size, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for i in range(size):
+        symbol = ''.join(rng.choices(string.ascii_uppercase, k=rng.randint(3, 8)))
+        name = f"{symbol.title()} {rng.choice(WORDS)} {rng.choice(WORDS)} Limited"
+        exchange = rng.choice(['NSE', 'BSE', 'NYSE', 'NASDAQ'])
+        suffix = {'NSE': '.NS', 'BSE': '.BO'}.get(exchange, '')
+        records.append({'symbol': symbol, 'name': name, 'exchange': exchange,
+                        'yahoo_symbol': f"{symbol}{suffix}"})
+    return records
+
+
+def time_queries(index, queries, **kwargs):
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query, **kwargs)
+    return (time.perf_counter() - start) / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--universe', type=int, default=20000)
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    records = synthetic_listings(args.universe)
+    start = time.perf_counter()
+    index = SymbolIndex.from_records(records)
+    build = time.perf_counter() - start
+
+    rng = random.Random(1)
+    picks = [rng.choice(records) for _ in range(args.queries)]
+    prefixes = [r['symbol'][:rng.randint(1, len(r['symbol']))] for r in picks]
+    words = [r['name'].split()[1][:4] for r in picks]
+    typos = [r['name'][:6].upper().replace(r['name'][2].upper(), 'Q', 1) for r in picks[:200]]
+
+    print(f"universe={len(index)} build={build * 1000:.1f}ms")
+    print(f"symbol prefix : {time_queries(index, prefixes) * 1e6:.1f}us/query")
+    print(f"name word     : {time_queries(index, words) * 1e6:.1f}us/query")
+    # Fuzzy candidates come from an n-gram index built per initial letter on first use
+    first = next(query for query in typos if not index.search(query, fuzzy=False))
+    print(f"fuzzy (first) : {time_queries(index, [first]) * 1e3:.1f}ms")
+    print(f"fuzzy (cold)  : {time_queries(index, typos) * 1e6:.1f}us/query")
+    print(f"fuzzy (typos) : {time_queries(index, typos) * 1e6:.1f}us/query")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Synthetic market data and a throwaway fetcher backend for offline benchmarks"""
+import contextlib
+import os
+import shutil
+import tempfile
+
+from utils.data_fetcher import StockDataFetcher
+from utils.history_cache import HistoryCache
+from utils.providers import ReplayProvider, synthetic_ohlcv
+from utils.symbol_resolver import SymbolResolver
+
+__all__ = ['ReplayProvider', 'replay_backend', 'synthetic_ohlcv']
+
+# StockDataFetcher state a benchmark may replace; all of it is restored on exit
+BACKEND_ATTRIBUTES = ['provider', 'history_cache', 'bar_store', 'symbol_resolver', 'governor']
+
+
+@contextlib.contextmanager
+def replay_backend(provider=None):
+    """
+    Point StockDataFetcher at `provider` (default: a zero-latency ReplayProvider)
+    with an empty history cache and symbol resolver in a scratch directory and
+    no bar store, so benchmarks never read or write the user's .cache. The
+    previous backend is restored on exit.
+
+    Yields reset(provider=None), which starts over with a fresh provider and
+    empty caches (a cold start) and returns the provider.
+    """
+    saved = {name: getattr(StockDataFetcher, name) for name in BACKEND_ATTRIBUTES}
+    scratch = tempfile.mkdtemp(prefix='bench-backend-')
+
+    def reset(new_provider=None):
+        root = tempfile.mkdtemp(dir=scratch)
+        StockDataFetcher.provider = new_provider or ReplayProvider()
+        StockDataFetcher.history_cache = HistoryCache(root=os.path.join(root, 'history'))
+        StockDataFetcher.symbol_resolver = SymbolResolver(path=os.path.join(root, 'symbols.json'))
+        StockDataFetcher.bar_store = None
+        StockDataFetcher.info_cache.invalidate()
+        if StockDataFetcher.governor is not None:
+            StockDataFetcher.governor.reset()
+        return StockDataFetcher.provider
+
+    try:
+        reset(provider)
+        yield reset
+    finally:
+        for name, value in saved.items():
+            setattr(StockDataFetcher, name, value)
+        StockDataFetcher.info_cache.invalidate()
+        shutil.rmtree(scratch, ignore_errors=True)
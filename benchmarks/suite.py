@@ -0,0 +1,218 @@
+"""
+Benchmark suite: indicators, chart builds, key metrics and a headless page render.
+
+Every case runs on synthetic data (no network) and reports the median/min
+wall time over --repeat runs plus the peak traced memory of one extra run.
+Results are written as JSON and can be compared against a stored baseline.
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json --threshold 0.25
+
+The comparison exits non-zero when a case is slower (or uses more memory)
+than the baseline by more than the threshold. Baselines are machine
+specific; record one on the machine that runs the comparison.
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from utils.chart_builder import ChartBuilder
+from utils.data_fetcher import StockDataFetcher
+from utils.metrics_calculator import MetricsCalculator
+from benchmarks.fakes import replay_backend, synthetic_ohlcv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SIZES = {
+    'full': {
+        'indicator_rows': [1_000, 10_000, 100_000, 1_000_000],
+        'chart_rows': [1_000, 100_000, 1_000_000],
+        'comparison_symbols': [1, 10, 100, 500],
+        'metrics_symbols': [1, 50, 500],
+        'page_symbols': [2, 10],
+    },
+    'quick': {
+        'indicator_rows': [1_000, 100_000],
+        'chart_rows': [1_000, 100_000],
+        'comparison_symbols': [1, 25],
+        'metrics_symbols': [1, 50],
+        'page_symbols': [2],
+    },
+}
+
+
+def ohlcv(rows, seed=0, tz='America/New_York'):
+    # Business days run out of calendar beyond ~50k rows; use minute bars there
+    freq = 'B' if rows <= 50_000 else '1min'
+    return synthetic_ohlcv(rows=rows, freq=freq, tz=tz, seed=seed)
+
+
+def indicator_cases(sizes, reset):
+    for rows in sizes['indicator_rows']:
+        df = ohlcv(rows)
+        yield f"indicators/rows={rows}", lambda df=df: MetricsCalculator.calculate_technical_indicators(df.copy())
+
+
+def price_chart_cases(sizes, reset):
+    for rows in sizes['chart_rows']:
+        df = ohlcv(rows)
+        yield f"price_chart/rows={rows}", lambda df=df: ChartBuilder.create_price_chart(df)
+
+
+def comparison_chart_cases(sizes, reset):
+    for symbols in sizes['comparison_symbols']:
+        frames = {f"SYM{i}": ohlcv(1250, seed=i, tz='Asia/Kolkata' if i % 2 else 'America/New_York')
+                  for i in range(symbols)}
+        yield (f"comparison_chart/symbols={symbols}",
+               lambda frames=frames: ChartBuilder.create_comparison_chart(frames, fast=len(frames) >= 10))
+
+
+def key_metrics_cases(sizes, reset):
+    for symbols in sizes['metrics_symbols']:
+        names = [f"SYM{i}" for i in range(symbols)]
+
+        def cold(names=names):
+            # Empty info cache: every symbol goes to the (replay) provider
+            StockDataFetcher.info_cache.invalidate()
+            for name in names:
+                StockDataFetcher.get_key_metrics(name)
+        yield f"key_metrics/symbols={symbols}", cold
+
+
+def page_render_cases(sizes, reset):
+    from streamlit.testing.v1 import AppTest
+
+    for symbols in sizes['page_symbols']:
+        stocks = [f"SYM{i}" for i in range(symbols)]
+
+        def render(stocks=stocks, fresh=True):
+            if fresh:
+                reset()
+            # Keep Streamlit's bare-mode/deprecation warnings out of the report
+            logging.disable(logging.WARNING)
+            try:
+                at = AppTest.from_file(os.path.join(ROOT, 'main.py'), default_timeout=120)
+                at.session_state['stocks'] = list(stocks)
+                at.run()
+            finally:
+                logging.disable(logging.NOTSET)
+            if at.exception:
+                raise Exception(f"main.py raised: {at.exception[0].value}")
+        yield f"page_render_cold/symbols={symbols}", render
+        yield f"page_render_warm/symbols={symbols}", lambda render=render: render(fresh=False)
+
+
+GROUPS = {
+    'indicators': indicator_cases,
+    'price_chart': price_chart_cases,
+    'comparison_chart': comparison_chart_cases,
+    'key_metrics': key_metrics_cases,
+    'page_render': page_render_cases,
+}
+
+
+def measure(func, repeat):
+    func()  # warm-up: imports, caches, first-call allocations
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'median_s': statistics.median(times),
+        'min_s': min(times),
+        'runs': repeat,
+        'peak_mb': peak / 1e6
+    }
+
+
+def run(groups, sizes, repeat):
+    """Run the case groups against a throwaway replay backend; returns {case: result}"""
+    results = {}
+    with replay_backend() as reset:
+        for group in groups:
+            for name, func in GROUPS[group](sizes, reset):
+                result = measure(func, repeat)
+                results[name] = result
+                print(f"{name:38s} median {result['median_s'] * 1e3:10.2f} ms   "
+                      f"min {result['min_s'] * 1e3:10.2f} ms   peak {result['peak_mb']:8.1f} MB", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold, memory_threshold, min_delta):
+    """Return a list of regression messages against a baseline result dict"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            continue
+        slower = result['median_s'] / base['median_s'] - 1 if base['median_s'] else 0.0
+        if slower > threshold and result['median_s'] - base['median_s'] > min_delta:
+            regressions.append(f"{name}: {base['median_s'] * 1e3:.2f} ms -> "
+                               f"{result['median_s'] * 1e3:.2f} ms (+{slower:.0%})")
+        grew = result['peak_mb'] / base['peak_mb'] - 1 if base['peak_mb'] else 0.0
+        if grew > memory_threshold and result['peak_mb'] - base['peak_mb'] > 1.0:
+            regressions.append(f"{name}: peak {base['peak_mb']:.1f} MB -> {result['peak_mb']:.1f} MB (+{grew:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--groups', nargs='+', choices=list(GROUPS), default=list(GROUPS))
+    parser.add_argument('--quick', action='store_true', help='Smaller sizes for a fast smoke run')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='Write results JSON here')
+    parser.add_argument('--baseline', help='Compare against this results JSON')
+    parser.add_argument('--save-baseline', help='Write results JSON here as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='Allowed slowdown fraction (default: 0.25)')
+    parser.add_argument('--memory-threshold', type=float, default=0.25, help='Allowed peak memory growth fraction')
+    parser.add_argument('--min-delta', type=float, default=0.002,
+                        help='Ignore slowdowns smaller than this many seconds (default: 0.002)')
+    args = parser.parse_args()
+
+    sizes = SIZES['quick' if args.quick else 'full']
+    report = {
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'sizes': 'quick' if args.quick else 'full',
+        'results': run(args.groups, sizes, args.repeat)
+    }
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"Wrote {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report['results'], baseline, args.threshold, args.memory_threshold, args.min_delta)
+        if regressions:
+            print(f"{len(regressions)} regression(s) against {args.baseline}:")
+            for message in regressions:
+                print(f"  {message}")
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,11 @@
 import streamlit as st
-import pandas as pd
-from utils.data_fetcher import StockDataFetcher
-from utils.chart_builder import ChartBuilder
-from utils.metrics_calculator import MetricsCalculator
-import plotly.graph_objects as go
-import base64
+from utils.instrumentation import Instrumentation
+import threading
 from datetime import datetime, timedelta
-import io
+import time
+
+# The data layer (pandas, numpy, the providers) and chart/analytics modules are imported where
+# they are first used, so the empty dashboard paints without waiting for them
 
 # Page configuration
 st.set_page_config(
@@ -16,9 +15,38 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource(show_spinner=False)
+def load_css():
+    """Read the stylesheet once per process instead of on every rerun"""
+    with open('assets/style.css') as f:
+        return f'<style>{f.read()}</style>'
+
+@st.cache_resource(show_spinner=False)
+def preload_modules():
+    """Import the heavy modules on a background thread once per process, after the first paint"""
+    def load():
+        import utils.data_fetcher
+        import utils.chart_builder
+        import utils.cross_asset
+
+    thread = threading.Thread(target=load, name='preload-modules', daemon=True)
+    thread.start()
+    return thread
+
+@st.cache_resource(show_spinner=False)
+def backtest_engine():
+    """One Backtester (and its worker pool, started on the first large sweep) per process"""
+    from utils.backtester import Backtester
+    return Backtester()
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def live_watchlist(symbols, interval):
+    """One poller per watchlist, shared by every session showing it; it stops itself when unwatched"""
+    from utils.live_watchlist import LiveWatchlist
+    return LiveWatchlist(symbols, interval=interval)
+
 # Load custom CSS
-with open('assets/style.css') as f:
-    st.markdown(f'<style>{f.read()}</style>', unsafe_allow_html=True)
+st.markdown(load_css(), unsafe_allow_html=True)
 
 # Initialize session state
 if 'stocks' not in st.session_state:
@@ -26,12 +54,58 @@ if 'stocks' not in st.session_state:
 if 'search_results' not in st.session_state:
     st.session_state['search_results'] = []
 
-def download_csv(df):
-    csv = df.to_csv(index=True)
-    b64 = base64.b64encode(csv.encode()).decode()
-    filename = f"stock_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    href = f'<a href="data:file/csv;base64,{b64}" download="{filename}">Download CSV File</a>'
-    return href
+# Per-rerun timings, collected when the performance panel is on or STOCK_INSTRUMENTATION=1
+show_performance = st.session_state.get('show_performance', False)
+Instrumentation.clear_run()
+run_record = run_token = None
+if show_performance or Instrumentation.enabled:
+    run_record, run_token = Instrumentation.start_run()
+
+def render_export(key, label, chunks, columns, stem):
+    """Format picker plus a download button whose file is only generated when it is clicked"""
+    from utils.exporter import DataExporter, ExportWriter
+
+    col1, col2 = st.columns([1, 4])
+    fmt = col1.selectbox('Export format', list(ExportWriter.FORMATS), key=f'{key}_format',
+                         label_visibility='collapsed')
+    col2.download_button(
+        label,
+        data=lambda: DataExporter.build(chunks(), columns, fmt),
+        file_name=DataExporter.file_name(f"{stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}", fmt),
+        mime=DataExporter.mime_type(fmt),
+        key=f'{key}_download',
+        on_click='ignore'
+    )
+
+def render_performance_panel(record):
+    import pandas as pd
+    from utils.data_fetcher import StockDataFetcher
+
+    spans = sorted(record.spans.items(), key=lambda item: -item[1][1])
+    timings = pd.DataFrame(
+        [{'Step': name, 'Calls': calls, 'Total (ms)': round(total * 1000, 1), 'Max (ms)': round(peak * 1000, 1)}
+         for name, (calls, total, peak) in spans],
+        columns=['Step', 'Calls', 'Total (ms)', 'Max (ms)']
+    ).set_index('Step')
+    counters = record.counters
+    network = sum(value for name, value in counters.items() if name.startswith('provider.'))
+    st.caption(f"Last rerun: {record.wall * 1000:.0f} ms · network calls: {network}")
+    st.dataframe(timings, width='stretch')
+    st.caption(
+        f"History cache: {counters.get('history_cache.hit', 0)} hit / "
+        f"{counters.get('history_cache.partial', 0)} partial / {counters.get('history_cache.miss', 0)} miss · "
+        f"Info cache: {counters.get('info_cache.hit', 0)} hit / {counters.get('info_cache.miss', 0)} miss · "
+        f"Symbol table: {counters.get('symbol_resolver.hit', 0)} hit / {counters.get('symbol_resolver.miss', 0)} miss"
+    )
+    governor = StockDataFetcher.governor
+    if governor is not None:
+        stale = counters.get('history_cache.stale', 0) + counters.get('info_cache.stale', 0)
+        breakers = ', '.join(f"{host} {state['state']}" for host, state in governor.stats().items()) or 'no calls yet'
+        st.caption(
+            f"Upstream: {breakers} · retries {counters.get('governor.retry', 0)} · "
+            f"rejected {counters.get('governor.rejected', 0) + counters.get('governor.rate_limited', 0)} · "
+            f"stale served {stale}"
+        )
 
 # Main app layout
 st.title('📈 Stock Analysis Dashboard')
@@ -58,8 +132,25 @@ with st.sidebar:
 
     # Show suggestions based on search
     if search_query:
+        from utils.data_fetcher import StockDataFetcher
+
         with st.spinner('Searching...'):
             suggestions = StockDataFetcher.search_stock_symbols(search_query, market)
+            # Not in the listings: Yahoo is only searched on request, never per keystroke
+            if suggestions and not any(suggestion.get('listed', True) for suggestion in suggestions):
+                online = st.session_state.get('online_search')
+                if online is None or online[:2] != (search_query, market):
+                    online = None
+                    slot = st.empty()
+                    if slot.button(f"Search Yahoo Finance for '{search_query}'", key='search_online'):
+                        slot.empty()
+                        online = (search_query, market, StockDataFetcher.search_online(search_query, market))
+                        st.session_state['online_search'] = online
+                if online is not None:
+                    if online[2]:
+                        suggestions = online[2]
+                    else:
+                        st.caption("No online matches; showing unverified symbols.")
             if suggestions:
                 st.session_state['search_results'] = suggestions
                 for suggestion in suggestions:
@@ -69,12 +160,15 @@ with st.sidebar:
                     ):
                         if suggestion['symbol'] not in st.session_state['stocks']:
                             try:
-                                # Verify data availability
-                                test_data = StockDataFetcher.get_historical_data(suggestion['symbol'], '1mo')
-                                if not test_data.empty:
+                                # Verify the symbol upstream; this also warms the shared info cache
+                                # used by the metrics tab
+                                stock_info = StockDataFetcher.get_stock_info(suggestion['symbol'])
+                                if stock_info.get('longName') or stock_info.get('shortName'):
                                     st.session_state['stocks'].append(suggestion['symbol'])
                                     st.success(f"Successfully added {suggestion['symbol']} to comparison")
                                     st.rerun()
+                                else:
+                                    st.error(f"No data available for {suggestion['symbol']}")
                             except Exception as e:
                                 st.error(f"Error: {str(e)}")
             else:
@@ -146,78 +240,327 @@ with st.sidebar:
         period = None
 
 # Main content
+VIEWS = ['Price Comparison', 'Metrics Comparison', 'Correlation & Risk', 'Backtest', 'Live Watchlist']
+# Redraw the progressive comparison chart at most this often while symbols stream in
+PROGRESS_REDRAW_SECONDS = 0.5
+# Live watchlist poll intervals (seconds) offered in the view
+LIVE_POLL_SECONDS = [1, 2, 5, 10, 30, 60]
+
+if timeframe_type == "Preset Periods":
+    history_range = {'period': period, 'interval': interval}
+else:
+    history_range = {
+        'start_date': start_date.strftime('%Y-%m-%d'),
+        'end_date': end_date.strftime('%Y-%m-%d'),
+        'interval': interval
+    }
+
+def render_price_view(stocks):
+    from utils.chart_builder import ChartBuilder
+    from utils.data_fetcher import StockDataFetcher
+    from utils.price_panel import PricePanel
+
+    # Draw the chart as soon as the first history arrives, then grow it as the rest stream in
+    status = st.empty()
+    chart_slot = st.empty()
+    histories = {}
+    drawn = 0
+    last_drawn = None
+
+    def draw():
+        panel = PricePanel.from_frames(
+            {symbol: histories[symbol] for symbol in stocks if symbol in histories}, interval=interval
+        )
+        # WebGL fast path once there are enough series for SVG to get sluggish
+        fig = ChartBuilder.create_comparison_chart(panel, fast=len(stocks) >= 10)
+        with Instrumentation.span('render.plotly_chart'):
+            chart_slot.plotly_chart(fig, width='stretch')
+        return len(histories)
+
+    for count, (symbol, history, error) in enumerate(StockDataFetcher.iter_many(stocks, **history_range), 1):
+        if error is not None:
+            st.warning(f"Could not fetch data for {symbol}: {error}")
+        else:
+            histories[symbol] = history
+            if last_drawn is None or time.monotonic() - last_drawn >= PROGRESS_REDRAW_SECONDS:
+                drawn = draw()
+                last_drawn = time.monotonic()
+        if count < len(stocks):
+            status.caption(f"Loaded {count} of {len(stocks)} symbols...")
+    status.empty()
+
+    if not histories:
+        st.error("No valid data available for comparison")
+        return
+    if drawn < len(histories):
+        draw()
+
+    from utils.exporter import HISTORY_COLUMNS, INDICATOR_COLUMNS, DataExporter
+
+    ordered = {symbol: histories[symbol] for symbol in stocks if symbol in histories}
+    with_indicators = st.checkbox('Include technical indicators in the export', key='export_indicators')
+    render_export(
+        'history', 'Download price history',
+        lambda: DataExporter.history_chunks(ordered, indicators=with_indicators),
+        INDICATOR_COLUMNS if with_indicators else HISTORY_COLUMNS,
+        'stock_history'
+    )
+
+def render_metrics_view(stocks):
+    import pandas as pd
+    from utils.data_fetcher import StockDataFetcher
+    from utils.metrics_calculator import MetricsCalculator
+
+    # Rows appear as each symbol's info arrives; the table keeps the sidebar order
+    table_slot = st.empty()
+    metrics_data = {}
+    for symbol, stock_info, error in StockDataFetcher.iter_info_many(stocks):
+        if error is not None:
+            st.warning(f"Could not fetch metrics for {symbol}: {error}")
+        elif stock_info:
+            metrics_data[symbol] = {
+                'Current Price': MetricsCalculator.format_metric_value(stock_info.get('currentPrice'), 'price'),
+                'Market Cap': MetricsCalculator.format_large_number(stock_info.get('marketCap')),
+                'P/E Ratio': MetricsCalculator.format_metric_value(stock_info.get('trailingPE'), 'ratio'),
+                'Volume': MetricsCalculator.format_large_number(stock_info.get('volume')),
+                'Beta': MetricsCalculator.format_metric_value(stock_info.get('beta'), 'ratio')
+            }
+            table_slot.dataframe(
+                pd.DataFrame({symbol: metrics_data[symbol] for symbol in stocks if symbol in metrics_data}),
+                width='stretch'
+            )
+
+    # Create comparison table
+    if metrics_data:
+        from utils.exporter import DataExporter
+
+        df_metrics = pd.DataFrame({symbol: metrics_data[symbol] for symbol in stocks if symbol in metrics_data})
+        render_export(
+            'metrics', 'Download metrics',
+            lambda: DataExporter.table_chunks(df_metrics, 'Metric'),
+            ['Metric'] + list(df_metrics.columns),
+            'stock_metrics'
+        )
+    else:
+        st.error("No metrics data available for comparison")
+
+def render_risk_view(stocks):
+    from utils.chart_builder import ChartBuilder
+    from utils.cross_asset import CrossAssetAnalytics
+    from utils.data_fetcher import StockDataFetcher
+
+    indian_count = sum(StockDataFetcher.is_indian_stock(symbol) for symbol in stocks)
+    benchmarks = ['^NSEI', '^BSESN', 'SPY', '^GSPC']
+    col1, col2 = st.columns(2)
+    benchmark = col1.selectbox(
+        'Benchmark',
+        benchmarks,
+        index=0 if indian_count * 2 >= len(stocks) else 2,
+        help="Index the rolling beta is measured against"
+    )
+    beta_window = col2.slider('Rolling window (bars)', 20, 250, 60, step=10)
+
+    with st.spinner('Computing cross-asset analytics...'):
+        analysis_panel, _ = StockDataFetcher.fetch_panel(list(dict.fromkeys(stocks + [benchmark])), **history_range)
+
+    if len(analysis_panel.symbols) >= 2:
+        analysis = CrossAssetAnalytics.analyze(
+            analysis_panel,
+            benchmark=benchmark if benchmark in analysis_panel else None,
+            window=beta_window,
+            interval=interval
+        )
+        st.plotly_chart(ChartBuilder.create_correlation_heatmap(analysis['correlation']),
+                        width='stretch')
+
+        summary = analysis['summary'].drop(columns=['Observations'])
+        percent_columns = ['Annual Return', 'Volatility', 'Max Drawdown']
+        st.dataframe(
+            summary.style.format({**{column: '{:.2%}' for column in percent_columns},
+                                  'Beta': '{:.2f}', 'Correlation': '{:.2f}'}, na_rep='N/A'),
+            width='stretch'
+        )
+
+        if analysis['rolling_beta'] is not None:
+            st.plotly_chart(ChartBuilder.create_rolling_beta_chart(analysis['rolling_beta'], benchmark),
+                            width='stretch')
+        else:
+            st.warning(f"No data available for benchmark {benchmark}")
+    else:
+        st.info("Add at least two symbols with data to compare correlations.")
+
+STRATEGY_LABELS = {
+    'rsi': 'RSI thresholds',
+    'macd': 'MACD crossover',
+    'bollinger': 'Bollinger breakout / reversion',
+    'buy_hold': 'Buy & hold'
+}
+
+def render_backtest_view(stocks):
+    from utils.backtester import Backtester
+    from utils.chart_builder import ChartBuilder
+    from utils.data_fetcher import StockDataFetcher
+
+    col1, col2 = st.columns([3, 1])
+    strategies = col1.multiselect(
+        'Strategies',
+        list(STRATEGY_LABELS),
+        default=list(STRATEGY_LABELS),
+        format_func=STRATEGY_LABELS.get,
+        help="Each strategy is swept over its parameter grid on every symbol"
+    )
+    cost_bps = col2.number_input('Cost per trade (bps)', 0.0, 100.0, 5.0, step=1.0)
+    if not strategies:
+        st.info("Select at least one strategy to backtest.")
+        return
+
+    with st.spinner('Running backtests...'):
+        panel, _ = StockDataFetcher.fetch_panel(stocks, **history_range)
+        if not panel.symbols:
+            st.error("No price data available to backtest")
+            return
+        grids = {strategy: Backtester.GRIDS[strategy] for strategy in strategies}
+        results, stats = backtest_engine().sweep(panel, grids, cost_bps=cost_bps, interval=interval)
+
+    st.caption(
+        f"{stats['strategies']} parameter sets x {stats['symbols']} symbols x {stats['years']:.1f} years "
+        f"in {stats['elapsed_s'] * 1e3:.0f} ms "
+        f"({stats['strategy_symbol_years_per_s']:,.0f} strategy-symbol-years/s)"
+    )
+    board = Backtester.leaderboard(results)
+    if board.empty:
+        st.info("No backtest results for the selected strategies and stocks.")
+        return
+    percent_columns = ['Total Return', 'CAGR', 'Max Drawdown', 'Exposure']
+    st.dataframe(
+        board.style.format({**{column: '{:.2%}' for column in percent_columns},
+                            'Sharpe': '{:.2f}', 'Trades': '{:.1f}'}, na_rep='N/A'),
+        width='stretch'
+    )
+
+    choices = list(board.index)
+    strategy, label = st.selectbox(
+        'Equity curves for',
+        choices,
+        format_func=lambda choice: f"{STRATEGY_LABELS[choice[0]]} ({choice[1]})"
+    )
+    params = next(p for s, p in Backtester.expand(grids) if s == strategy and Backtester.describe(p) == label)
+    equity, _ = Backtester.run(panel, strategy, params, cost_bps=cost_bps, interval=interval)
+    buy_hold, _ = Backtester.run(panel, 'buy_hold', cost_bps=cost_bps, interval=interval)
+    st.plotly_chart(
+        ChartBuilder.create_equity_chart(
+            equity, f"{STRATEGY_LABELS[strategy]} ({label})",
+            benchmark=buy_hold.mean(axis=1) if strategy != 'buy_hold' else None
+        ),
+        width='stretch'
+    )
+
+def render_live_view(stocks):
+    from utils.data_fetcher import StockDataFetcher
+    from utils.history_cache import HistoryCache
+
+    col1, col2 = st.columns(2)
+    poll_seconds = col1.select_slider('Poll every (seconds)', LIVE_POLL_SECONDS, value=5)
+    # Live bars are intraday; a daily selection streams 1-minute bars
+    live_interval = interval if interval in HistoryCache.INTRADAY_INTERVALS else '1m'
+    col2.caption(f"Streaming {live_interval} bars, one batched request per poll")
+
+    symbols = tuple(dict.fromkeys(StockDataFetcher.get_valid_symbol(symbol) for symbol in stocks))
+    # The poll interval is a setting of the shared poller, not part of its identity
+    watchlist = live_watchlist(symbols, live_interval)
+    watchlist.set_poll_seconds(poll_seconds)
+    watchlist.start()
+
+    # Only this fragment reruns on each poll; the rest of the page is left alone
+    @st.fragment(run_every=poll_seconds)
+    def live_panel():
+        import pandas as pd
+        from utils.chart_builder import ChartBuilder
+        from utils.metrics_calculator import MetricsCalculator
+
+        # Cursors are only meaningful against the watchlist that issued them
+        state = st.session_state.get('live_chart')
+        if state is None or state['watchlist'] is not watchlist:
+            state = st.session_state['live_chart'] = {
+                'watchlist': watchlist,
+                'figure': ChartBuilder.create_live_chart(symbols),
+                'cursors': {},
+                'bases': {}
+            }
+        watchlist.start()
+        updates, state['cursors'] = watchlist.updates_since(state['cursors'])
+        ChartBuilder.append_live_bars(state['figure'], updates, state['bases'])
+        with Instrumentation.span('render.plotly_chart'):
+            st.plotly_chart(state['figure'], width='stretch', key='live_chart_figure')
+
+        latest = watchlist.latest()
+        if latest:
+            indicators = watchlist.indicators()
+            st.dataframe(pd.DataFrame({
+                symbol: {
+                    'Last': f"{bar['Close']:.2f}",
+                    'Change': f"{(bar['Close'] / state['bases'][symbol] - 1) * 100:+.2f}%"
+                    if symbol in state['bases'] else 'N/A',
+                    'RSI': MetricsCalculator.format_metric_value(indicators.get(symbol, {}).get('RSI'), 'ratio'),
+                    'MACD': MetricsCalculator.format_metric_value(indicators.get(symbol, {}).get('MACD'), 'ratio'),
+                    'Bar Time': str(bar.name),
+                    'Volume': f"{bar.get('Volume', 0):,.0f}"
+                }
+                for symbol, bar in latest.items()
+            }), width='stretch')
+
+        stats = watchlist.stats()
+        parts = [f"{stats['ticks']} polls", f"{stats['new_bars']} bars"]
+        if stats['tick_p50_s'] is not None:
+            parts.append(f"poll p50 {stats['tick_p50_s'] * 1e3:.0f} ms / p95 {stats['tick_p95_s'] * 1e3:.0f} ms")
+        if stats['bar_latency_p50_s'] is not None:
+            parts.append(f"bar latency p50 {stats['bar_latency_p50_s']:.2f} s / p95 {stats['bar_latency_p95_s']:.2f} s")
+        st.caption(' · '.join(parts))
+        if stats['last_tick'] is not None and stats['last_tick']['error']:
+            st.warning(f"Last poll failed: {stats['last_tick']['error']}")
+        if not latest:
+            st.info("Waiting for the first poll...")
+
+    live_panel()
+
 if st.session_state['stocks']:
     try:
-        # Create tabs for different views
-        tab1, tab2 = st.tabs(['Price Comparison', 'Metrics Comparison'])
-
-        with tab1:
-            # Fetch historical data for all stocks
-            historical_data = {}
-            with st.spinner('Fetching historical data...'):
-                for symbol in st.session_state['stocks']:
-                    try:
-                        if timeframe_type == "Preset Periods":
-                            data = StockDataFetcher.get_historical_data(
-                                symbol, period=period, interval=interval
-                            )
-                        else:
-                            data = StockDataFetcher.get_historical_data(
-                                symbol,
-                                start_date=start_date.strftime('%Y-%m-%d'),
-                                end_date=end_date.strftime('%Y-%m-%d'),
-                                interval=interval
-                            )
-
-                        if not data.empty:
-                            historical_data[symbol] = data
-                        else:
-                            st.warning(f"No historical data available for {symbol}")
-                    except Exception as e:
-                        st.warning(f"Could not fetch data for {symbol}: {str(e)}")
-
-                if historical_data:
-                    fig = ChartBuilder.create_comparison_chart(historical_data)
-                    st.plotly_chart(fig, use_container_width=True)
-                else:
-                    st.error("No valid data available for comparison")
-
-        with tab2:
-            # Fetch and display metrics for all stocks
-            metrics_data = {}
-            with st.spinner('Fetching metrics...'):
-                for symbol in st.session_state['stocks']:
-                    try:
-                        stock_info = StockDataFetcher.get_stock_info(symbol)
-                        if stock_info:
-                            metrics_data[symbol] = {
-                                'Current Price': MetricsCalculator.format_metric_value(stock_info.get('currentPrice'), 'price'),
-                                'Market Cap': MetricsCalculator.format_large_number(stock_info.get('marketCap')),
-                                'P/E Ratio': MetricsCalculator.format_metric_value(stock_info.get('trailingPE'), 'ratio'),
-                                'Volume': MetricsCalculator.format_large_number(stock_info.get('volume')),
-                                'Beta': MetricsCalculator.format_metric_value(stock_info.get('beta'), 'ratio')
-                            }
-                    except Exception as e:
-                        st.warning(f"Could not fetch metrics for {symbol}: {str(e)}")
-
-            # Create comparison table
-            if metrics_data:
-                df_metrics = pd.DataFrame(metrics_data)
-                st.dataframe(df_metrics, use_container_width=True)
-
-                # Download button for metrics
-                st.markdown(download_csv(df_metrics), unsafe_allow_html=True)
+        # Only the selected view is computed on a rerun (st.tabs would run all of them)
+        active_view = st.radio('View', VIEWS, horizontal=True, key='active_view', label_visibility='collapsed')
+        stocks = list(st.session_state['stocks'])
+
+        with Instrumentation.span(f"view.{active_view}"):
+            if active_view == 'Price Comparison':
+                render_price_view(stocks)
+            elif active_view == 'Metrics Comparison':
+                render_metrics_view(stocks)
+            elif active_view == 'Correlation & Risk':
+                render_risk_view(stocks)
+            elif active_view == 'Backtest':
+                render_backtest_view(stocks)
             else:
-                st.error("No metrics data available for comparison")
+                render_live_view(stocks)
 
     except Exception as e:
         st.error(f"Error: {str(e)}")
 else:
     st.info('👈 Add stock symbols in the sidebar to begin comparison analysis.')
 
+if run_record is not None:
+    Instrumentation.finish_run(run_record, run_token)
+
+with st.sidebar:
+    st.header('Diagnostics')
+    st.toggle('Show performance panel', key='show_performance',
+              help="Per-rerun timing breakdown, network calls and cache hits")
+    if show_performance and run_record is not None:
+        render_performance_panel(run_record)
+
 # Footer
 st.markdown(f"""
 <div style='text-align: center; color: #666; padding: 20px;'>
     Data provided by Yahoo Finance | Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+# Everything is on screen; warm the data layer so the first search or symbol doesn't pay for it
+preload_modules()
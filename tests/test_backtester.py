@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import backtester
+from utils.backtester import Backtester
+from utils.providers import synthetic_ohlcv
+
+
+def test_position_earns_the_next_return_and_pays_cost_on_changes(monkeypatch):
+    close = pd.DataFrame({'X': [100.0, 110.0, 99.0, 99.0, 108.9, 98.01]},
+                         index=pd.bdate_range('2024-01-02', periods=6))
+    # Long at closes 0-1, flat at 2, short at 3-4, flat at 5
+    target = np.array([[1.0], [1.0], [0.0], [-1.0], [-1.0], [0.0]])
+    monkeypatch.setattr(backtester, '_positions', lambda strategy, params, arrays: target)
+    cost = 0.001
+    equity, summary = Backtester.run(close, 'fixed', cost_bps=10)
+
+    # Bar by bar: return earned by the position held from the previous close,
+    # then cost times the size of the change made at this close
+    pnl = [
+        (1 + 0.0) * (1 - 1 * cost) - 1,   # enter long: no return yet, 1 unit traded
+        (1 + 0.10) - 1,                   # long earns +10%
+        (1 - 0.10) * (1 - 1 * cost) - 1,  # long earns -10%, exit
+        (1 + 0.0) * (1 - 1 * cost) - 1,   # flat earns nothing, go short
+        (1 - 0.10) - 1,                   # short earns -(+10%)
+        (1 + 0.10) * (1 - 1 * cost) - 1,  # short earns -(-10%), cover
+    ]
+    np.testing.assert_allclose(equity['X'].to_numpy(), np.cumprod(1 + np.array(pnl)), rtol=1e-12)
+    assert summary.loc['X', 'Trades'] == 4
+    assert summary.loc['X', 'Total Return'] == pytest.approx(np.prod(1 + np.array(pnl)) - 1)
+    # Held (non-zero) over 4 of the 5 returns
+    assert summary.loc['X', 'Exposure'] == pytest.approx(4 / 5)
+
+
+def test_buy_and_hold_tracks_the_close():
+    close = synthetic_ohlcv(rows=250, seed=1)[['Close']]
+    equity, _ = Backtester.run(close, 'buy_hold', cost_bps=0)
+    np.testing.assert_allclose(equity['Close'], close['Close'] / close['Close'].iloc[0], rtol=1e-12)
+
+
+def test_parallel_and_serial_sweeps_agree():
+    close = pd.DataFrame({f"S{i}": synthetic_ohlcv(rows=500, seed=i)['Close'] for i in range(5)})
+    close.iloc[:40, 1] = np.nan
+    close.iloc[200:205, 3] = np.nan
+    with Backtester(workers=1) as serial:
+        expected, serial_stats = serial.sweep(close, cost_bps=5)
+    with Backtester(workers=2) as engine:
+        engine.MIN_PARALLEL_CELLS = 0
+        results, stats = engine.sweep(close, cost_bps=5)
+    assert serial_stats['workers'] == 1 and stats['workers'] == 2
+    pd.testing.assert_frame_equal(results, expected)
+
+
+def test_empty_results_give_an_empty_leaderboard():
+    assert Backtester.leaderboard(pd.DataFrame()).empty
@@ -0,0 +1,137 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.bar_store import BarStore
+from utils.data_fetcher import StockDataFetcher
+from utils.history_cache import HistoryCache
+from utils.providers import ReplayProvider, synthetic_ohlcv
+from utils.symbol_resolver import SymbolResolver
+
+
+def sessions(days, start='2024-01-02'):
+    """One 390-bar regular US session of 1m bars per business day"""
+    return [synthetic_ohlcv(rows=390, start=day + pd.Timedelta(hours=9, minutes=30), freq='1min', seed=i)
+            for i, day in enumerate(pd.bdate_range(start, periods=days))]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BarStore(root=str(tmp_path / 'bars'))
+
+
+def test_round_trip_one_day_at_a_time(store):
+    frames = sessions(5)
+    full = pd.concat(frames)
+    for frame in frames:
+        store.append('SYN', '1m', frame)
+    # Re-sending the last day (a rerun) must not duplicate anything
+    assert store.append('SYN', '1m', frames[-1]) == 1
+
+    pd.testing.assert_frame_equal(store.read('SYN', '1m'), full[BarStore.FIELDS], check_freq=False)
+    day = full.index[390 * 2].normalize()
+    window = store.view('SYN', '1m', day, day + pd.Timedelta(days=1))
+    np.testing.assert_array_equal(window['Close'], frames[2]['Close'].to_numpy())
+
+
+def test_older_bars_are_merged_in_order(store):
+    frames = sessions(3)
+    store.append('SYN', '1m', frames[2])
+    store.append('SYN', '1m', pd.concat(frames[:2]))
+    pd.testing.assert_frame_equal(store.read('SYN', '1m'), pd.concat(frames)[BarStore.FIELDS], check_freq=False)
+
+
+def test_partial_last_bar_is_replaced(store):
+    frame = sessions(1)[0]
+    store.append('SYN', '1m', frame.iloc[:100])
+    revised = frame.iloc[99:101].copy()
+    revised['Close'] += 1.0
+    store.append('SYN', '1m', revised)
+    stored = store.read('SYN', '1m')
+    assert len(stored) == 101
+    assert stored['Close'].iloc[-2:].tolist() == revised['Close'].tolist()
+
+
+@pytest.mark.parametrize('unit', ['s', 'ms', 'us', 'ns'])
+def test_any_index_unit_is_stored_as_nanoseconds(store, unit):
+    frame = sessions(1)[0]
+    frame.index = frame.index.as_unit(unit)
+    store.append('SYN', '1m', frame)
+    stored = store.read('SYN', '1m')
+    assert (stored.index == frame.index).all()
+    assert store.span('SYN', '1m')[0] == frame.index[0]
+
+
+class TestGet:
+    @pytest.fixture
+    def feed(self):
+        """fetch() over the last 20 sessions of 1m bars, recording each call"""
+        # Periods are measured back from now, as upstream does
+        full = pd.concat(sessions(20, start=pd.Timestamp.now().normalize() - pd.offsets.BDay(21)))
+        calls = []
+
+        def fetch(start=None, end=None, period=None):
+            calls.append((start, end, period))
+            if period is not None:
+                return full if period == 'max' else full[full.index > full.index[-1] - HistoryCache.PERIOD_OFFSETS[period]]
+            start = HistoryCache._to_ts(start, full.index.tz)
+            end = HistoryCache._to_ts(end, full.index.tz) if end is not None else None
+            return full[(full.index >= start) & ((full.index < end) if end is not None else True)]
+        return full, calls, fetch
+
+    def test_second_call_is_served_from_the_store(self, store, feed):
+        full, calls, fetch = feed
+        first = store.get('SYN', '1m', fetch, period='5d')
+        assert len(calls) == 1
+        second = store.get('SYN', '1m', fetch, period='5d')
+        assert len(calls) == 1
+        pd.testing.assert_frame_equal(second, first)
+        expected = full[full.index > full.index[-1] - pd.DateOffset(days=5)]
+        pd.testing.assert_frame_equal(first, expected[BarStore.FIELDS], check_freq=False)
+        assert store.covers('SYN', '1m', '5d')
+        assert not store.covers('SYN', '1m', '1mo')
+
+    def test_stale_tail_refetches_from_the_last_day_only(self, store, feed):
+        full, calls, fetch = feed
+        store.get('SYN', '1m', fetch, period='5d')
+        store.ttl = 0
+        store.get('SYN', '1m', fetch, period='5d')
+        assert len(calls) == 2
+        assert calls[1][0] == full.index[-1].normalize()
+
+    def test_range_ending_in_the_future_is_fresh_within_the_ttl(self, store, feed):
+        full, calls, fetch = feed
+        start = full.index[0].strftime('%Y-%m-%d')
+        end = (pd.Timestamp.now() + pd.Timedelta(days=7)).strftime('%Y-%m-%d')
+        for _ in range(3):
+            store.get('SYN', '1m', fetch, start_date=start, end_date=end)
+        assert len(calls) == 1
+
+    def test_longer_period_fetches_the_head(self, store, feed):
+        full, calls, fetch = feed
+        store.get('SYN', '1m', fetch, period='5d')
+        month = store.get('SYN', '1m', fetch, period='1mo')
+        assert len(calls) == 2 and calls[1][2] is None
+        expected = full[full.index > full.index[-1] - pd.DateOffset(months=1)]
+        assert len(expected) > 390 * 5
+        pd.testing.assert_frame_equal(month, expected[BarStore.FIELDS], check_freq=False)
+
+
+def test_fetcher_keeps_intraday_bars_in_the_bar_store_only(tmp_path, monkeypatch):
+    provider = ReplayProvider()
+    monkeypatch.setattr(StockDataFetcher, 'provider', provider)
+    monkeypatch.setattr(StockDataFetcher, 'governor', None)
+    monkeypatch.setattr(StockDataFetcher, 'history_cache', HistoryCache(root=str(tmp_path / 'history')))
+    monkeypatch.setattr(StockDataFetcher, 'bar_store', BarStore(root=str(tmp_path / 'bars')))
+    monkeypatch.setattr(StockDataFetcher, 'symbol_resolver', SymbolResolver(path=str(tmp_path / 'symbols.json')))
+
+    first = StockDataFetcher.get_historical_data('AAPL', period='5d', interval='5m')
+    again = StockDataFetcher.get_historical_data('AAPL', period='5d', interval='5m')
+    pd.testing.assert_frame_equal(again, first)
+    assert provider.calls['history'] == 1
+    assert not os.path.exists(tmp_path / 'history') or not os.listdir(tmp_path / 'history')
+
+    StockDataFetcher.get_historical_data('AAPL', period='1mo', interval='1d')
+    assert os.listdir(tmp_path / 'history')
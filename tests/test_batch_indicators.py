@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.metrics_calculator import MetricsCalculator
+from utils.providers import synthetic_ohlcv
+
+ROWS = 300
+
+
+def close_series(seed, rows=ROWS):
+    return synthetic_ohlcv(rows=rows, seed=seed)['Close']
+
+
+def per_frame(close):
+    """calculate_technical_indicators on a symbol's own rows (from its first close on)"""
+    listed = close.index >= close.first_valid_index()
+    frame = close[listed].to_frame('Close')
+    return listed, MetricsCalculator.calculate_technical_indicators(frame)
+
+
+def assert_parity(close):
+    batch = MetricsCalculator.calculate_batch_indicators(close)
+    assert list(batch.columns.get_level_values('indicator').unique()) == MetricsCalculator.INDICATORS
+    for symbol in close.columns:
+        listed, expected = per_frame(close[symbol])
+        for indicator in MetricsCalculator.INDICATORS:
+            got = batch[(indicator, symbol)]
+            assert got[~listed].isna().all(), f"{symbol} {indicator} has values before its first close"
+            a = expected[indicator].to_numpy()
+            b = got[listed].to_numpy()
+            np.testing.assert_array_equal(np.isnan(b), np.isnan(a), err_msg=f"{symbol} {indicator} NaN layout")
+            np.testing.assert_allclose(b[~np.isnan(a)], a[~np.isnan(a)], rtol=1e-9, atol=1e-9,
+                                       err_msg=f"{symbol} {indicator}")
+    return batch
+
+
+def test_aligned_columns():
+    assert_parity(pd.DataFrame({f"S{i}": close_series(i) for i in range(4)}))
+
+
+@pytest.mark.parametrize('start', [1, 13, 14, 25, 26, 150])
+def test_leading_nans(start):
+    close = pd.DataFrame({'FULL': close_series(0), 'LATE': close_series(1)})
+    close.iloc[:start, 1] = np.nan
+    assert_parity(close)
+
+
+def test_leading_nan_rsi_starts_at_the_first_close():
+    # RSI of a late lister needs 14 of its own changes; the NaN rows before
+    # its first close are not counted as flat changes
+    close = pd.DataFrame({'FULL': close_series(0), 'LATE': close_series(1)})
+    close.iloc[:40, 1] = np.nan
+    rsi = MetricsCalculator.calculate_batch_indicators(close)[('RSI', 'LATE')]
+    assert rsi.first_valid_index() == close.index[40 + 13]
+
+    padded = MetricsCalculator.calculate_technical_indicators(close[['LATE']].rename(columns={'LATE': 'Close'}))
+    assert padded['RSI'].first_valid_index() < close.index[40 + 13]
+
+
+@pytest.mark.parametrize('gap', [(50, 51), (100, 103), (200, 230)])
+def test_interior_gaps(gap):
+    close = pd.DataFrame({'FULL': close_series(0), 'GAPPY': close_series(2)})
+    close.iloc[gap[0]:gap[1], 1] = np.nan
+    assert_parity(close)
+
+
+def test_ragged_and_gappy_together():
+    close = pd.DataFrame({f"S{i}": close_series(i) for i in range(6)})
+    close.iloc[:60, 1] = np.nan
+    close.iloc[90:95, 2] = np.nan
+    close.iloc[:30, 3] = np.nan
+    close.iloc[120:121, 3] = np.nan
+    assert_parity(close)
+
+
+def test_constant_series():
+    close = pd.DataFrame({'FLAT': np.full(ROWS, 100.0), 'MOVING': close_series(3).to_numpy()},
+                         index=close_series(3).index)
+    batch = assert_parity(close)
+    # No gains and no losses: RSI is 0/0, as in the per-frame function
+    assert batch[('RSI', 'FLAT')].isna().all()
+    assert (batch[('20dSTD', 'FLAT')].dropna() == 0).all()
+
+
+def test_flat_after_moving():
+    # Windows that are flat only after earlier movement: the running sums
+    # must not leave a residual spread
+    close = pd.DataFrame({'X': close_series(3)})
+    close.iloc[60:, 0] = close.iloc[59, 0]
+    batch = assert_parity(close)
+    assert (batch[('20dSTD', 'X')].iloc[79:] == 0).all()
+    assert batch[('RSI', 'X')].iloc[74:].isna().all()
+
+
+@pytest.mark.parametrize('rows',[1, 2, 13, 14, 15, 19, 20, 25, 26, 27])
+def test_shorter_than_the_windows(rows):
+    assert_parity(pd.DataFrame({'A': close_series(4, rows), 'B': close_series(5, rows)}))
+
+
+def test_all_missing_column():
+    close = pd.DataFrame({'A': close_series(6), 'EMPTY': np.nan})
+    batch = MetricsCalculator.calculate_batch_indicators(close)
+    assert batch.xs('EMPTY', axis=1, level='symbol').isna().all().all()
+    assert batch.xs('A', axis=1, level='symbol').notna().any().all()
+
+
+def test_many_histories_on_different_calendars():
+    us = synthetic_ohlcv(rows=ROWS, seed=1)
+    nse = synthetic_ohlcv(rows=ROWS, start='2020-01-03', tz='Asia/Kolkata', seed=2)
+    histories = {'US1': us, 'NSE1': nse, 'US2': synthetic_ohlcv(rows=ROWS, seed=3), 'SHORT': us.iloc[:30]}
+    groups = []
+    result = MetricsCalculator.calculate_indicators_many(
+        histories, compute=lambda close: groups.append(list(close.columns)) or
+        MetricsCalculator.calculate_batch_indicators(close))
+    # Symbols sharing an index are computed together
+    assert groups == [['US1', 'US2'], ['NSE1'], ['SHORT']]
+    assert list(result) == list(histories)
+    for symbol, df in histories.items():
+        expected = MetricsCalculator.calculate_technical_indicators(df.copy())
+        pd.testing.assert_index_equal(result[symbol].index, df.index)
+        for name in MetricsCalculator.INDICATORS:
+            np.testing.assert_allclose(result[symbol][name], expected[name], rtol=1e-9, atol=1e-9,
+                                       err_msg=f"{symbol} {name}")
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import cli
+from utils.data_fetcher import StockDataFetcher
+from utils.metrics_calculator import MetricsCalculator
+from utils.parallel_indicators import ParallelIndicatorEngine
+from utils.providers import ReplayProvider
+
+
+@pytest.fixture
+def universe(tmp_path, monkeypatch):
+    # run_batch swaps in an offline backend; put the shared one back afterwards
+    for name in ('provider', 'history_cache', 'bar_store', 'symbol_resolver'):
+        monkeypatch.setattr(StockDataFetcher, name, getattr(StockDataFetcher, name))
+    path = tmp_path / 'universe.txt'
+    # US and NSE symbols trade on different calendars
+    path.write_text("AAPL\nMSFT  # comment\nTCS.NS\n\nINFY.NS\nAAPL\n")
+    return path
+
+
+def test_batch_writes_per_symbol_indicators(universe, tmp_path, capsys):
+    out = tmp_path / 'out'
+    assert cli.main(['batch', '--symbols', str(universe), '--replay', '--out', str(out), '--quiet']) == 0
+    assert '4 symbols ok, 0 failed' in capsys.readouterr().out
+
+    written = pd.read_csv(out / 'indicators.csv')
+    assert written['symbol'].unique().tolist() == ['AAPL', 'MSFT', 'TCS.NS', 'INFY.NS']
+    provider = ReplayProvider()
+    for symbol, rows in written.groupby('symbol', sort=False):
+        expected = MetricsCalculator.calculate_technical_indicators(provider.history(symbol, period='1y').copy())
+        assert len(rows) == len(expected)
+        for name in MetricsCalculator.INDICATORS:
+            np.testing.assert_allclose(rows[name], expected[name], rtol=1e-9, atol=1e-9, err_msg=f"{symbol} {name}")
+
+    metrics = pd.read_csv(out / 'metrics.csv')
+    assert sorted(metrics['symbol']) == ['AAPL', 'INFY.NS', 'MSFT', 'TCS.NS']
+
+
+def test_indicator_processes_match_in_process(universe, tmp_path, monkeypatch):
+    outputs = {}
+    for processes in (1, 2):
+        out = tmp_path / f"out{processes}"
+        with monkeypatch.context() as patch:
+            # Shard even these few symbols across the worker processes
+            patch.setattr(ParallelIndicatorEngine, 'MIN_SHARD', 1)
+            assert cli.main(['batch', '--symbols', str(universe), '--replay', '--out', str(out), '--quiet',
+                             '--processes', str(processes)]) == 0
+        outputs[processes] = pd.read_csv(out / 'indicators.csv')
+    pd.testing.assert_frame_equal(outputs[2], outputs[1], rtol=1e-9, atol=1e-9)
+
+
+def test_start_and_end_go_together(universe):
+    with pytest.raises(SystemExit):
+        cli.main(['batch', '--symbols', str(universe), '--start', '2024-01-01'])
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.cross_asset import CrossAssetAnalytics
+from utils.price_panel import PricePanel
+from utils.providers import synthetic_ohlcv
+
+
+@pytest.fixture
+def close():
+    """Outer-joined closes: NSE and US calendars, a late lister and a halted symbol"""
+    us = synthetic_ohlcv(rows=400, seed=1)
+    nse = synthetic_ohlcv(rows=400, start='2020-01-01', tz='Asia/Kolkata', seed=2)
+    # Different holidays on each exchange
+    us = us.drop(us.index[[10, 50, 51, 200]])
+    nse = nse.drop(nse.index[[30, 120, 121, 122, 300]])
+    frames = {
+        'SPY': us, 'AAPL': synthetic_ohlcv(rows=400, seed=3).drop(us.index[[10, 50, 51, 200]], errors='ignore'),
+        'TCS.NS': nse, 'LATE': synthetic_ohlcv(rows=150, start='2021-01-04', seed=4),
+    }
+    halted = synthetic_ohlcv(rows=400, seed=5)
+    frames['HALTED'] = halted.drop(halted.index[100:140])
+    return PricePanel.from_frames(frames, how='outer').frame('Close')
+
+
+def own_returns(series):
+    """pct_change over a symbol's own closes, reindexed onto the panel"""
+    return series.dropna().pct_change().reindex(series.index)
+
+
+def test_returns_skip_missing_dates(close):
+    returns = CrossAssetAnalytics.returns(close)
+    for symbol in close.columns:
+        pd.testing.assert_series_equal(returns[symbol], own_returns(close[symbol]), check_names=False)
+    # Misaligned dates stay missing rather than becoming zero returns
+    assert returns['TCS.NS'][close['TCS.NS'].isna()].isna().all()
+
+
+def test_correlation_matches_pandas(close):
+    returns = CrossAssetAnalytics.returns(close)
+    pd.testing.assert_frame_equal(CrossAssetAnalytics.correlation(returns), returns.corr(), rtol=1e-9, atol=1e-12)
+
+
+def test_correlation_needs_overlapping_rows():
+    index = pd.bdate_range('2024-01-01', periods=6)
+    returns = pd.DataFrame({'A': [0.01, -0.02, 0.03, np.nan, np.nan, np.nan],
+                            'B': [np.nan, np.nan, 0.01, 0.02, -0.01, 0.0],
+                            'FLAT': 0.0}, index=index)
+    corr = CrossAssetAnalytics.correlation(returns)
+    expected = returns.corr()
+    # One overlapping row: undefined, as in pandas; a flat series has no correlation
+    assert np.isnan(corr.loc['A', 'B']) and np.isnan(expected.loc['A', 'B'])
+    assert corr['FLAT'].drop('FLAT').isna().all()
+    pd.testing.assert_frame_equal(corr.drop(index='FLAT', columns='FLAT'),
+                                  expected.drop(index='FLAT', columns='FLAT'))
+
+
+@pytest.mark.parametrize('window', [20, 60])
+def test_rolling_beta_matches_pandas(close, window):
+    returns = CrossAssetAnalytics.returns(close)
+    beta = CrossAssetAnalytics.rolling_beta(returns, 'SPY', window=window)
+    min_periods = window // 2
+    for symbol in returns.columns:
+        both = returns[symbol].notna() & returns['SPY'].notna()
+        x, y = returns[symbol].where(both), returns['SPY'].where(both)
+        expected = (x.rolling(window, min_periods=min_periods).cov(y)
+                    / y.rolling(window, min_periods=min_periods).var())
+        pd.testing.assert_series_equal(beta[symbol], expected, check_names=False, rtol=1e-7, atol=1e-9)
+
+
+def test_full_sample_beta_and_correlation(close):
+    result = CrossAssetAnalytics.analyze(close, benchmark='SPY')
+    returns = result['returns']
+    summary = result['summary']
+    for symbol in close.columns.drop('SPY'):
+        pair = returns[[symbol, 'SPY']].dropna()
+        expected = np.cov(pair[symbol], pair['SPY'])[0, 1] / pair['SPY'].var()
+        assert summary.loc[symbol, 'Beta'] == pytest.approx(expected, rel=1e-7)
+        assert summary.loc[symbol, 'Correlation'] == pytest.approx(pair.corr().iloc[0, 1], rel=1e-9)
+    assert summary.loc['SPY', 'Beta'] == pytest.approx(1.0)
+    assert summary.loc['LATE', 'Observations'] == 149
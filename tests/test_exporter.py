@@ -0,0 +1,60 @@
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+from utils.exporter import HISTORY_COLUMNS, INDICATOR_COLUMNS, DataExporter, ExportWriter
+from utils.providers import synthetic_ohlcv
+
+
+def read_back(data, fmt):
+    if fmt == 'csv':
+        return pd.read_csv(io.BytesIO(data))
+    if fmt == 'parquet':
+        return pd.read_parquet(io.BytesIO(data))
+    return pa.ipc.open_file(pa.BufferReader(data)).read_all().to_pandas()
+
+
+@pytest.fixture
+def histories():
+    return {'AAA': synthetic_ohlcv(rows=120, seed=1), 'BBB': synthetic_ohlcv(rows=80, seed=2)}
+
+
+@pytest.mark.parametrize('fmt', list(ExportWriter.FORMATS))
+def test_build_output_is_accepted_by_download_button(histories, fmt):
+    # st.download_button(data=callable) runs the callable's result through this on click
+    built = DataExporter.build(DataExporter.history_chunks(histories), HISTORY_COLUMNS, fmt)
+    data, _ = convert_data_to_bytes_and_infer_mime(built, unsupported_error=TypeError(type(built)))
+
+    frame = read_back(data, fmt)
+    assert list(frame.columns) == HISTORY_COLUMNS
+    assert len(frame) == 200
+    assert frame['symbol'].tolist() == ['AAA'] * 120 + ['BBB'] * 80
+    assert frame['Close'].to_numpy() == pytest.approx(
+        pd.concat([histories['AAA']['Close'], histories['BBB']['Close']]).to_numpy()
+    )
+
+
+@pytest.mark.parametrize('fmt', list(ExportWriter.FORMATS))
+def test_build_with_indicators_and_small_chunks(histories, fmt):
+    chunks = DataExporter.history_chunks(histories, indicators=True, chunk_rows=50)
+    data, _ = convert_data_to_bytes_and_infer_mime(DataExporter.build(chunks, INDICATOR_COLUMNS, fmt),
+                                                   unsupported_error=TypeError())
+    frame = read_back(data, fmt)
+    assert list(frame.columns) == INDICATOR_COLUMNS
+    assert len(frame) == 200
+
+
+def test_table_export(histories):
+    table = pd.DataFrame({'AAA': {'P/E Ratio': '12.00'}, 'BBB': {'P/E Ratio': 'N/A'}})
+    built = DataExporter.build(DataExporter.table_chunks(table, 'Metric'), ['Metric', 'AAA', 'BBB'], 'csv')
+    data, _ = convert_data_to_bytes_and_infer_mime(built, unsupported_error=TypeError())
+    assert data.decode().splitlines() == ['Metric,AAA,BBB', 'P/E Ratio,12.00,N/A']
+
+
+def test_empty_export_is_still_downloadable():
+    built = DataExporter.build(iter([]), HISTORY_COLUMNS, 'csv')
+    data, _ = convert_data_to_bytes_and_infer_mime(built, unsupported_error=TypeError())
+    assert data == b''
@@ -0,0 +1,74 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from utils.data_fetcher import StockDataFetcher
+from utils.providers import synthetic_ohlcv
+from utils.request_governor import RequestGovernor
+
+
+@pytest.fixture
+def history(monkeypatch):
+    """get_historical_data stub: SLOW sleeps, BAD raises, others return a frame; records peak concurrency"""
+    state = {'running': 0, 'peak': 0, 'delay': 0.0}
+    lock = threading.Lock()
+
+    def get_historical_data(symbol, period='1y', start_date=None, end_date=None, interval='1d'):
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        try:
+            if symbol == 'SLOW':
+                time.sleep(2)
+            time.sleep(state['delay'])
+            if symbol == 'BAD':
+                raise Exception(f"Error fetching historical data for {symbol}: No data found")
+            return synthetic_ohlcv(rows=10, seed=len(symbol))
+        finally:
+            with lock:
+                state['running'] -= 1
+
+    monkeypatch.setattr(StockDataFetcher, 'get_historical_data', get_historical_data)
+    monkeypatch.setattr(StockDataFetcher, 'governor', None)
+    return state
+
+
+def test_one_failure_does_not_drop_the_others(history):
+    data, errors = StockDataFetcher.fetch_many(['AAA', 'BAD', 'CCC', 'AAA'])
+    assert list(data) == ['AAA', 'CCC']
+    assert all(isinstance(df, pd.DataFrame) and not df.empty for df in data.values())
+    assert list(errors) == ['BAD'] and 'No data found' in errors['BAD']
+
+
+def test_slow_symbol_times_out_alone(history):
+    started = time.monotonic()
+    data, errors = StockDataFetcher.fetch_many(['AAA', 'SLOW', 'CCC'], timeout=0.2)
+    assert time.monotonic() - started < 1.5
+    assert list(data) == ['AAA', 'CCC']
+    assert 'Timed out' in errors['SLOW']
+
+
+def test_streaming_yields_fast_symbols_first(history):
+    order = [symbol for symbol, _, _ in StockDataFetcher.iter_many(['SLOW', 'AAA'], timeout=5)]
+    assert order == ['AAA', 'SLOW']
+
+
+def test_pool_has_one_thread_per_symbol(history):
+    history['delay'] = 0.1
+    symbols = [f"S{i}" for i in range(12)]
+    data, _ = StockDataFetcher.fetch_many(symbols)
+    assert len(data) == 12 and history['peak'] == 12
+
+
+def test_pool_is_capped_by_the_governor(history, monkeypatch):
+    history['delay'] = 0.05
+    monkeypatch.setattr(StockDataFetcher, 'governor', RequestGovernor(max_concurrency=3))
+    data, _ = StockDataFetcher.fetch_many([f"S{i}" for i in range(12)])
+    assert len(data) == 12 and history['peak'] == 3
+    # An explicit max_workers still wins
+    history['peak'] = 0
+    StockDataFetcher.fetch_many([f"S{i}" for i in range(12)], max_workers=5)
+    assert history['peak'] == 5
+
@@ -0,0 +1,89 @@
+import pandas as pd
+import pytest
+
+from utils.history_cache import HistoryCache
+from utils.providers import synthetic_ohlcv
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HistoryCache(root=str(tmp_path), ttl=0)
+
+
+@pytest.fixture
+def feed():
+    """fetch() over daily bars up to today, recording each call"""
+    full = synthetic_ohlcv(rows=300, start=pd.Timestamp.now().normalize() - pd.offsets.BDay(299),
+                           freq='B', tz='America/New_York')
+    calls = []
+
+    def fetch(start=None, end=None, period=None):
+        calls.append((start, end, period))
+        if period is not None:
+            return full
+        start = HistoryCache._to_ts(start, full.index.tz)
+        end = HistoryCache._to_ts(end, full.index.tz) if end is not None else None
+        return full[(full.index >= start) & ((full.index < end) if end is not None else True)]
+    return full, calls, fetch
+
+
+def test_range_ending_in_the_future_is_covered_up_to_now(cache, feed):
+    full, calls, fetch = feed
+    start = full.index[100].strftime('%Y-%m-%d')
+    end = (pd.Timestamp.now() + pd.Timedelta(days=30)).strftime('%Y-%m-%d')
+    cache.get('SYN', '1d', fetch, start_date=start, end_date=end)
+    _, manifest = cache.load('SYN', '1d')
+    assert pd.Timestamp(manifest['end']) <= HistoryCache._now()
+
+    # The tail is still open, so a stale entry is refreshed
+    cache.get('SYN', '1d', fetch, start_date=start, end_date=end)
+    assert len(calls) == 2
+
+
+def day(full, i):
+    return full.index[i].strftime('%Y-%m-%d')
+
+
+def test_head_gap_is_fetched_and_merged(cache, feed):
+    full, calls, fetch = feed
+    cache.get('SYN', '1d', fetch, start_date=day(full, 150), end_date=day(full, 250))
+    df = cache.get('SYN', '1d', fetch, start_date=day(full, 50), end_date=day(full, 250))
+    # Only the missing head is asked for
+    assert calls[1] == (full.index[50], full.index[150], None)
+    pd.testing.assert_frame_equal(df, full.iloc[50:250], check_freq=False)
+    stored, _ = cache.load('SYN', '1d')
+    assert stored.index.is_unique and stored.index.is_monotonic_increasing
+
+
+def test_tail_gap_is_fetched_and_merged(cache, feed):
+    full, calls, fetch = feed
+    cache.get('SYN', '1d', fetch, start_date=day(full, 50), end_date=day(full, 200))
+    df = cache.get('SYN', '1d', fetch, start_date=day(full, 50), end_date=day(full, 280))
+    # The tail starts at the last stored bar, which is replaced rather than duplicated
+    assert calls[1][0] == full.index[199].normalize()
+    pd.testing.assert_frame_equal(df, full.iloc[50:280], check_freq=False)
+    stored, _ = cache.load('SYN', '1d')
+    assert stored.index.is_unique and len(stored) == 230
+
+
+def test_range_ending_in_the_future_is_fresh_within_the_ttl(tmp_path, feed):
+    full, calls, fetch = feed
+    cache = HistoryCache(root=str(tmp_path), ttl=3600)
+    end = (pd.Timestamp.now() + pd.Timedelta(days=30)).strftime('%Y-%m-%d')
+    for _ in range(4):
+        df = cache.get('SYN', '1d', fetch, start_date=day(full, 100), end_date=end)
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(df, full.iloc[100:], check_freq=False)
+
+
+def test_manifest_write_is_atomic(cache, feed):
+    full, _, fetch = feed
+    cache.get('SYN', '1d', fetch, period='1y')
+    _, before = cache.load('SYN', '1d')
+
+    # A manifest that fails half-way through serializing leaves the old one in place
+    cache.save('SYN', '1d', full, dict(before, fetched_at=object()))
+    df, after = cache.load('SYN', '1d')
+    assert after == before
+    assert df is not None
+
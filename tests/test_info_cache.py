@@ -0,0 +1,137 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils import info_cache
+from utils.info_cache import InfoCache
+from utils.request_governor import UpstreamUnavailable
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {'t': 1000.0}
+    monkeypatch.setattr(info_cache, 'time', SimpleNamespace(monotonic=lambda: now['t']))
+    return now
+
+
+def loader(value, calls):
+    def load():
+        calls.append(value)
+        return value
+    return load
+
+
+def test_hits_until_the_ttl_expires(clock):
+    cache = InfoCache(ttl=300)
+    calls = []
+    assert cache.get('AAPL', loader({'price': 1}, calls)) == {'price': 1}
+    clock['t'] += 299
+    assert cache.get('AAPL', loader({'price': 2}, calls)) == {'price': 1}
+    clock['t'] += 2
+    assert cache.get('AAPL', loader({'price': 2}, calls)) == {'price': 2}
+    assert len(calls) == 2
+    assert cache.stats() == {'size': 1, 'hits': 1, 'misses': 2, 'evictions': 0, 'coalesced': 0, 'stale': 0}
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = InfoCache(maxsize=2)
+    calls = []
+    cache.get('A', loader({'v': 'A'}, calls))
+    cache.get('B', loader({'v': 'B'}, calls))
+    cache.get('A', loader({'v': 'A'}, calls))  # A is now the most recent
+    cache.get('C', loader({'v': 'C'}, calls))
+    assert cache.stats()['evictions'] == 1 and cache.stats()['size'] == 2
+    cache.get('A', loader({'v': 'A'}, calls))
+    cache.get('B', loader({'v': 'B'}, calls))
+    assert calls == [{'v': 'A'}, {'v': 'B'}, {'v': 'C'}, {'v': 'B'}]
+
+
+def test_concurrent_misses_share_one_load():
+    cache = InfoCache()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return {'price': 1}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('AAPL', slow))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while cache.stats()['coalesced'] < 7 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [1] and results == [{'price': 1}] * 8
+    stats = cache.stats()
+    assert (stats['misses'], stats['coalesced'], stats['hits']) == (1, 7, 0)
+
+
+def test_waiters_see_the_loader_error():
+    cache = InfoCache()
+    started, release = threading.Event(), threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise Exception("Error fetching info for AAPL")
+
+    errors = []
+
+    def call():
+        try:
+            cache.get('AAPL', failing)
+        except Exception as e:
+            errors.append(str(e))
+
+    first = threading.Thread(target=call)
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=call)
+    second.start()
+    while cache.stats()['coalesced'] < 1:
+        time.sleep(0.005)
+    release.set()
+    first.join()
+    second.join()
+    assert errors == ["Error fetching info for AAPL"] * 2
+    # Failures are not cached
+    assert cache.get('AAPL', lambda: {'price': 1}) == {'price': 1}
+
+
+def test_stale_value_is_served_during_an_outage(clock):
+    cache = InfoCache(ttl=10)
+    cache.get('AAPL', lambda: {'price': 1})
+    clock['t'] += 11
+
+    def down():
+        raise UpstreamUnavailable("circuit open")
+
+    assert cache.get('AAPL', down) == {'price': 1}
+    assert cache.stats()['stale'] == 1
+    with pytest.raises(UpstreamUnavailable):
+        cache.get('MSFT', down)
+
+
+def test_empty_payloads_are_not_cached(clock):
+    cache = InfoCache()
+    calls = []
+    cache.get('AAPL', loader({}, calls))
+    cache.get('AAPL', loader({}, calls))
+    assert len(calls) == 2 and cache.stats()['size'] == 0
+
+
+def test_invalidate(clock):
+    cache = InfoCache()
+    cache.get('A', lambda: {'v': 1})
+    cache.get('B', lambda: {'v': 2})
+    cache.invalidate('A')
+    assert cache.stats()['size'] == 1
+    cache.invalidate()
+    assert cache.stats()['size'] == 0
@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from utils.data_fetcher import StockDataFetcher
+from utils.history_cache import HistoryCache
+from utils.live_watchlist import LiveWatchlist
+from utils.providers import synthetic_ohlcv
+
+
+@pytest.fixture
+def feed(monkeypatch, tmp_path):
+    """fetch_latest serving one more 1m bar per call"""
+    bars = synthetic_ohlcv(rows=500, freq='1min', seed=3)
+    calls = []
+
+    def fetch_latest(symbols, interval, lookback):
+        calls.append(time.monotonic())
+        return {symbol: bars.iloc[:100 + len(calls)] for symbol in symbols}
+
+    monkeypatch.setattr(StockDataFetcher, 'fetch_latest', fetch_latest)
+    monkeypatch.setattr(StockDataFetcher, 'history_cache', HistoryCache(root=str(tmp_path)))
+    return calls
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_shorter_poll_interval_applies_to_a_running_worker(feed):
+    with LiveWatchlist(['AAA'], poll_seconds=60) as watchlist:
+        assert wait_for(lambda: len(feed) == 1)
+        watchlist.set_poll_seconds(0.05)
+        assert wait_for(lambda: len(feed) >= 4, timeout=2.0)
+    assert not watchlist.running
+
+
+def test_longer_poll_interval_does_not_poll_early(feed):
+    with LiveWatchlist(['AAA'], poll_seconds=0.2) as watchlist:
+        assert wait_for(lambda: len(feed) == 1)
+        watchlist.set_poll_seconds(60)
+        time.sleep(0.5)
+        assert len(feed) == 1
+
+
+def test_cursors_only_return_new_bars(feed):
+    watchlist = LiveWatchlist(['AAA'])
+    watchlist.poll_once()
+    updates, cursors = watchlist.updates_since({})
+    assert len(updates['AAA']) == 101
+
+    assert watchlist.updates_since(cursors)[0] == {}
+    watchlist.poll_once()
+    updates, cursors = watchlist.updates_since(cursors)
+    # The caller's last bar is sent again in case it was revised
+    assert len(updates['AAA']) == 2
+    assert cursors['AAA'][0] == updates['AAA'].index[-1]
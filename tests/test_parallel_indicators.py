@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.metrics_calculator import MetricsCalculator
+from utils.parallel_indicators import ParallelIndicatorEngine
+from utils.price_panel import PricePanel
+from utils.providers import synthetic_ohlcv
+
+
+@pytest.fixture(scope='module')
+def engine():
+    with ParallelIndicatorEngine(workers=2, min_shard=4) as engine:
+        yield engine
+
+
+@pytest.fixture
+def close():
+    close = pd.DataFrame({f"S{i}": synthetic_ohlcv(rows=300, seed=i)['Close'] for i in range(24)})
+    close.iloc[:40, 3] = np.nan
+    close.iloc[100:110, 7] = np.nan
+    close.iloc[:, 11] = 100.0
+    close.iloc[:, 19] = np.nan
+    return close
+
+
+def assert_same(result, expected):
+    pd.testing.assert_index_equal(result.columns, expected.columns)
+    a, b = result.to_numpy(), expected.to_numpy()
+    np.testing.assert_array_equal(np.isnan(a), np.isnan(b))
+    np.testing.assert_allclose(a[~np.isnan(b)], b[~np.isnan(b)], rtol=1e-9, atol=1e-9)
+
+
+def test_sharded_result_matches_the_serial_engine(engine, close):
+    assert len(engine._shards(close.shape[1])) > 1
+    assert_same(engine.compute(close), MetricsCalculator.calculate_batch_indicators(close))
+
+
+def test_price_panel_input(engine, close):
+    panel = PricePanel.from_frames({symbol: close[[symbol]].rename(columns={symbol: 'Close'}).dropna()
+                                    for symbol in close.columns if close[symbol].notna().any()})
+    expected = MetricsCalculator.calculate_batch_indicators(panel.frame('Close'))
+    assert_same(engine.compute(panel), expected)
+
+
+def test_small_input_runs_in_process(close):
+    engine = ParallelIndicatorEngine(workers=2)
+    assert_same(engine.compute(close), MetricsCalculator.calculate_batch_indicators(close))
+    assert engine._pool is None
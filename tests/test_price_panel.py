@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.price_panel import PricePanel
+
+
+def bars(index, start):
+    close = start + np.arange(len(index), dtype=float)
+    return pd.DataFrame({'Open': close - 0.5, 'High': close + 1, 'Low': close - 1, 'Close': close,
+                         'Volume': 1000.0}, index=index)
+
+
+@pytest.fixture
+def daily():
+    """TCS.NS closed 2024-11-20 (election), AAPL closed 2024-11-28 (Thanksgiving)"""
+    days = pd.bdate_range('2024-11-18', '2024-11-29')
+    nse = days.drop(pd.Timestamp('2024-11-20')).tz_localize('Asia/Kolkata')
+    us = days.drop(pd.Timestamp('2024-11-28')).tz_localize('America/New_York')
+    return days, {'TCS.NS': bars(nse, 4000), 'AAPL': bars(us, 200)}
+
+
+def test_daily_bars_share_rows_by_session_date(daily):
+    days, frames = daily
+    panel = PricePanel.from_frames(frames)
+    # Union of sessions, keyed by local date whatever the exchange's time zone
+    assert panel.index.equals(days)
+    assert panel.symbols == ['TCS.NS', 'AAPL']
+    close = panel.frame('Close')
+    assert np.isnan(close.loc['2024-11-20', 'TCS.NS']) and close.loc['2024-11-20', 'AAPL'] == 202
+    assert np.isnan(close.loc['2024-11-28', 'AAPL']) and close.loc['2024-11-28', 'TCS.NS'] == 4007
+    assert close.notna().sum().tolist() == [9, 9]
+
+
+def test_inner_join_keeps_common_sessions(daily):
+    days, frames = daily
+    panel = PricePanel.from_frames(frames, how='inner')
+    assert panel.index.equals(days.drop(pd.to_datetime(['2024-11-20', '2024-11-28'])))
+    assert not np.isnan(panel.values('Close')).any()
+
+
+def test_closed_sessions_are_not_forward_filled(daily):
+    _, frames = daily
+    panel = PricePanel.from_frames(frames)
+    # Every field is missing on a holiday; nothing is carried over from the prior session
+    holiday = panel.symbol_frame('AAPL', dropna=False).loc['2024-11-28']
+    assert holiday.isna().all()
+    # Round trip drops the padding again
+    for symbol, frame in panel.to_frames().items():
+        np.testing.assert_array_equal(frame['Close'], frames[symbol]['Close'])
+
+    # Carried-forward values are opt-in on a frame, and leave the shared block untouched
+    filled = panel.frame('Close').ffill()
+    assert filled.loc['2024-11-28', 'AAPL'] == filled.loc['2024-11-27', 'AAPL'] == 207
+    assert filled.loc['2024-11-20', 'TCS.NS'] == 4001
+    assert np.isnan(panel.column('AAPL')[panel.index.get_loc('2024-11-28')])
+
+
+def test_intraday_sessions_align_on_absolute_time():
+    nse = pd.date_range('2024-11-18 09:15', '2024-11-18 15:15', freq='1h', tz='Asia/Kolkata')
+    us = pd.date_range('2024-11-18 09:30', '2024-11-18 15:30', freq='1h', tz='America/New_York')
+    frames = {'TCS.NS': bars(nse, 4000), 'AAPL': bars(us, 200)}
+
+    panel = PricePanel.from_frames(frames, interval='1h')
+    # NSE closes (09:45 UTC) before New York opens (14:30 UTC): no shared rows
+    assert str(panel.index.tz) == 'UTC' and len(panel) == len(nse) + len(us)
+    assert panel.index[0] == pd.Timestamp('2024-11-18 03:45', tz='UTC')
+    assert panel.frame('Close').notna().sum(axis=1).eq(1).all()
+    assert len(PricePanel.from_frames(frames, interval='1h', how='inner')) == 0
+
+    local = PricePanel.from_frames(frames, interval='1h', tz='Asia/Kolkata')
+    assert local.index[0] == nse[0]
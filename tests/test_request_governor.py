@@ -0,0 +1,159 @@
+import threading
+import time
+import urllib.error
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from utils.providers import FaultInjectingProvider, ReplayProvider
+from utils.request_governor import (CircuitOpenError, RequestGovernor, ThrottledError, UpstreamUnavailable,
+                                    is_transient)
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = SimpleNamespace(status_code=status_code)
+
+
+@pytest.mark.parametrize('error', [
+    ThrottledError("Too Many Requests"),
+    TimeoutError("read timed out"),
+    ConnectionError("refused"),
+    requests.exceptions.ConnectTimeout("connect timed out"),
+    requests.exceptions.ConnectionError("reset by peer"),
+    urllib.error.URLError("Name or service not known"),
+    HTTPStatusError(429),
+    HTTPStatusError(503),
+])
+def test_transient_errors(error):
+    assert is_transient(error)
+
+
+@pytest.mark.parametrize('error', [
+    # Digits in a symbol are not status codes
+    ValueError("500504.BO: possibly delisted; no price data found"),
+    Exception("$502355.BO: No timezone found, symbol may be delisted"),
+    KeyError('connection'),
+    HTTPStatusError(404),
+    urllib.error.HTTPError('https://example.com', 404, 'Not Found', None, None),
+])
+def test_permanent_errors(error):
+    assert not is_transient(error)
+
+
+def test_wrapped_error_follows_its_cause():
+    try:
+        try:
+            raise TimeoutError("read timed out")
+        except TimeoutError as e:
+            raise RuntimeError("history failed") from e
+    except RuntimeError as e:
+        assert is_transient(e)
+
+
+@pytest.fixture
+def provider():
+    return FaultInjectingProvider(ReplayProvider(), seed=1)
+
+
+def fetch(provider):
+    return lambda: provider.history('AAPL', period='1mo')
+
+
+def test_transient_errors_are_retried_with_backoff(provider, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(time, 'sleep', sleeps.append)
+    governor = RequestGovernor(max_retries=5, base_delay=0.5, max_delay=2.0, failure_threshold=100, seed=0)
+    provider.throttle_rate = 0.6
+
+    df = governor.call(provider.host, fetch(provider))
+    assert not df.empty
+    retries = provider.faults['throttle']
+    assert retries > 0 and len(sleeps) == retries
+    # Full jitter: each delay is within [0, min(max_delay, base_delay * 2 ** (attempt - 1))]
+    for attempt, delay in enumerate(sleeps, start=1):
+        assert 0 <= delay <= min(2.0, 0.5 * 2 ** (attempt - 1))
+
+
+def test_retries_are_exhausted(provider, monkeypatch):
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+    governor = RequestGovernor(max_retries=2, failure_threshold=100)
+    provider.set_outage()
+    with pytest.raises(UpstreamUnavailable) as raised:
+        governor.call(provider.host, fetch(provider))
+    assert provider.faults['outage'] == 3
+    assert isinstance(raised.value.__cause__, ConnectionError)
+
+
+def test_breaker_opens_and_closes(provider):
+    governor = RequestGovernor(max_retries=0, failure_threshold=3, reset_timeout=0.05)
+    breaker = governor.breaker(provider.host)
+    provider.set_outage()
+    for _ in range(3):
+        with pytest.raises(UpstreamUnavailable):
+            governor.call(provider.host, fetch(provider))
+    assert breaker.state == 'open'
+
+    # While open, calls fail fast without reaching the provider
+    with pytest.raises(CircuitOpenError):
+        governor.call(provider.host, fetch(provider))
+    assert provider.faults['outage'] == 3
+
+    # After reset_timeout a trial call goes through and closes it again
+    provider.set_outage(False)
+    time.sleep(0.06)
+    assert not governor.call(provider.host, fetch(provider)).empty
+    assert breaker.state == 'closed' and breaker.failures == 0
+
+
+def test_failed_trial_reopens_the_breaker(provider):
+    governor = RequestGovernor(max_retries=0, failure_threshold=1, reset_timeout=0.0)
+    provider.set_outage()
+    with pytest.raises(UpstreamUnavailable):
+        governor.call(provider.host, fetch(provider))
+    with pytest.raises(UpstreamUnavailable):
+        governor.call(provider.host, fetch(provider))
+    assert governor.breaker(provider.host).state == 'open'
+    assert provider.faults['outage'] == 2
+
+
+def test_permanent_errors_pass_straight_through(provider, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(time, 'sleep', sleeps.append)
+    governor = RequestGovernor(max_retries=3, failure_threshold=2)
+    calls = []
+
+    def delisted():
+        calls.append(provider.host)
+        raise ValueError("500504.BO: possibly delisted; no price data found")
+
+    for _ in range(5):
+        with pytest.raises(ValueError):
+            governor.call(provider.host, delisted)
+    assert len(calls) == 5 and not sleeps
+    assert governor.breaker(provider.host).state == 'closed'
+    # The host is still usable
+    assert not governor.call(provider.host, fetch(provider)).empty
+
+
+def test_governor_bounds_calls_in_flight_per_host():
+    governor = RequestGovernor(max_concurrency=2)
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def call():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+
+    threads = [threading.Thread(target=governor.call, args=('host', call)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak[0] == 2
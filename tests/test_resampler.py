@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.bar_store import BarStore
+from utils.data_fetcher import StockDataFetcher
+from utils.history_cache import HistoryCache
+from utils.providers import ReplayProvider, synthetic_ohlcv
+from utils.resampler import Resampler
+from utils.symbol_resolver import SymbolResolver
+
+
+def sessions(days, exchange, freq='5min', start='2024-01-02'):
+    """Regular-session bars in the exchange's timezone, one session per business day"""
+    tz, session_open, session_close = Resampler.SESSIONS[exchange]
+    rows = int((session_close - session_open) / pd.Timedelta(freq))
+    return pd.concat([synthetic_ohlcv(rows=rows, start=day + session_open, freq=freq, tz=tz, seed=i)
+                      for i, day in enumerate(pd.bdate_range(start, periods=days))])
+
+
+def pandas_resample(fine, interval, exchange):
+    """DataFrame.resample on exchange wall time, anchored at the session open"""
+    tz, session_open, _ = Resampler.SESSIONS[exchange]
+    rule = f"{Resampler.INTERVAL_MINUTES[interval]}min"
+    aggregations = {column: how for column, how in Resampler.AGGREGATIONS.items() if column in fine.columns}
+    wall = fine.tz_convert(tz).tz_localize(None)
+    expected = wall.resample(rule, offset=session_open, origin='start_day').agg(aggregations)
+    expected = expected[expected['Close'].notna()]
+    expected.index = expected.index.tz_localize(tz).tz_convert(fine.index.tz)
+    return expected
+
+
+def test_nse_hourly_bars_start_at_the_0915_open():
+    fine = sessions(2, 'NSE')
+    hourly = Resampler.resample(fine, '1h', 'NSE')
+    first_day = hourly[hourly.index.normalize() == hourly.index[0].normalize()]
+    assert [ts.strftime('%H:%M') for ts in first_day.index] == [
+        '09:15', '10:15', '11:15', '12:15', '13:15', '14:15', '15:15']
+    # The last bin of the session only holds 15:15-15:30
+    last = fine[(fine.index >= first_day.index[-1]) & (fine.index < first_day.index[-1] + pd.Timedelta(hours=1))]
+    assert len(last) == 3
+    assert first_day['Close'].iloc[-1] == last['Close'].iloc[-1]
+    assert first_day['Volume'].iloc[-1] == last['Volume'].sum()
+
+
+@pytest.mark.parametrize('start', ['2024-03-07', '2024-10-31'])
+def test_us_bins_follow_wall_time_across_dst(start):
+    # DST starts 2024-03-10 and ends 2024-11-03: the open moves in UTC but
+    # bins stay on 09:30 exchange time
+    fine = sessions(4, 'US', start=start)
+    bars = Resampler.resample(fine, '30m', 'US')
+    opens = bars.groupby(bars.index.normalize()).head(1).index
+    assert {ts.strftime('%H:%M') for ts in opens} == {'09:30'}
+    assert len({ts.utcoffset() for ts in opens}) == 2
+    assert (bars.groupby(bars.index.normalize()).size() == 13).all()
+
+
+@pytest.mark.parametrize('exchange', ['NSE', 'US'])
+@pytest.mark.parametrize('interval,source', [('15m', '5min'), ('30m', '5min'), ('1h', '5min'), ('90m', '15min')])
+def test_matches_pandas_resample(exchange, interval, source):
+    fine = sessions(5, exchange, freq=source, start='2024-03-06')
+    pd.testing.assert_frame_equal(Resampler.resample(fine, interval, exchange),
+                                  pandas_resample(fine, interval, exchange), check_freq=False)
+
+
+def test_utc_input_is_binned_in_exchange_time():
+    fine = sessions(2, 'NSE')
+    utc = fine.tz_convert('UTC')
+    derived = Resampler.resample(utc, '1h', 'NSE')
+    assert str(derived.index.tz) == 'UTC'
+    pd.testing.assert_frame_equal(derived.tz_convert('Asia/Kolkata'), Resampler.resample(fine, '1h', 'NSE'))
+
+
+def test_only_intraday_targets_are_derived():
+    assert Resampler.sources_for('15m') == ['5m', '1m']
+    assert Resampler.sources_for('1h') == ['30m', '15m', '5m', '2m', '1m']
+    assert Resampler.sources_for('1d') == []
+    with pytest.raises(Exception):
+        Resampler.resample(sessions(1, 'US'), '1d', 'US')
+
+
+def test_empty_frame():
+    empty = sessions(1, 'US').iloc[:0]
+    assert Resampler.resample(empty, '1h', 'US').empty
+
+
+class TestDerivedHistory:
+    @pytest.fixture
+    def provider(self, tmp_path, monkeypatch):
+        provider = ReplayProvider(end=pd.Timestamp.now().normalize())
+        monkeypatch.setattr(StockDataFetcher, 'provider', provider)
+        monkeypatch.setattr(StockDataFetcher, 'governor', None)
+        monkeypatch.setattr(StockDataFetcher, 'history_cache', HistoryCache(root=str(tmp_path / 'history')))
+        monkeypatch.setattr(StockDataFetcher, 'bar_store', BarStore(root=str(tmp_path / 'bars')))
+        monkeypatch.setattr(StockDataFetcher, 'symbol_resolver', SymbolResolver(path=str(tmp_path / 'symbols.json')))
+        StockDataFetcher.get_historical_data('AAPL', period='5d', interval='5m')
+        return provider
+
+    def test_intraday_interval_is_built_from_cached_bars(self, provider):
+        calls = provider.calls['history']
+        derived = StockDataFetcher.get_historical_data('AAPL', period='5d', interval='15m')
+        assert provider.calls['history'] == calls
+        fine = StockDataFetcher.get_historical_data('AAPL', period='5d', interval='5m')
+        np.testing.assert_array_equal(derived['Close'], pandas_resample(fine, '15m', 'US')['Close'])
+
+    def test_daily_bars_come_from_upstream(self, provider):
+        calls = provider.calls['history']
+        StockDataFetcher.get_historical_data('AAPL', period='5d', interval='1d')
+        assert provider.calls['history'] == calls + 1
@@ -0,0 +1,153 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.data_fetcher import StockDataFetcher
+from utils.history_cache import HistoryCache
+from utils.live_watchlist import LiveWatchlist
+from utils.metrics_calculator import MetricsCalculator
+from utils.providers import synthetic_ohlcv
+from utils.streaming_indicators import IndicatorState
+
+
+def assert_matches_batch(values, df):
+    expected = MetricsCalculator.calculate_technical_indicators(df.copy()).iloc[-1]
+    for name in MetricsCalculator.INDICATORS:
+        assert values[name] == pytest.approx(expected[name], rel=1e-9, abs=1e-9, nan_ok=True), name
+
+
+@pytest.fixture
+def bars():
+    return synthetic_ohlcv(rows=300, freq='1min', seed=7)
+
+
+def test_every_bar_matches_the_batch_function(bars):
+    state = IndicatorState()
+    streamed = pd.DataFrame([state.update(close, ts) for ts, close in bars['Close'].items()], index=bars.index)
+    expected = MetricsCalculator.calculate_technical_indicators(bars.copy())
+    for name in MetricsCalculator.INDICATORS:
+        np.testing.assert_allclose(streamed[name], expected[name], rtol=1e-9, atol=1e-9, err_msg=name)
+
+
+def test_flat_segment_matches_the_batch_function():
+    # After a run of repeated closes the loss window holds only zeros: RSI is
+    # NaN (0/0) as in pandas, not 0.0 from drift in the running mean
+    bars = synthetic_ohlcv(rows=200, seed=3)
+    bars.iloc[100:140, bars.columns.get_loc('Close')] = 123.37
+    state = IndicatorState()
+    streamed = pd.DataFrame([state.update(close, ts) for ts, close in bars['Close'].items()], index=bars.index)
+    expected = MetricsCalculator.calculate_technical_indicators(bars.copy())
+    for name in MetricsCalculator.INDICATORS:
+        np.testing.assert_allclose(streamed[name], expected[name], rtol=1e-9, atol=1e-9, err_msg=name)
+    assert streamed['RSI'].iloc[114:140].isna().all()
+
+
+def test_revised_last_bar_replaces_it(bars):
+    state = IndicatorState.from_history(bars.iloc[:-1])
+    last = bars.index[-1]
+    for partial in (bars['Close'].iloc[-2] * 1.01, bars['Close'].iloc[-2] * 0.98):
+        state.update(partial, last)
+    state.update(bars['Close'].iloc[-1], last)
+    assert_matches_batch(state.current(), bars)
+
+
+def test_update_frame_reapplies_the_last_bar(bars):
+    revised = bars.iloc[:200].copy()
+    revised.iloc[-1, revised.columns.get_loc('Close')] *= 1.05
+    state = IndicatorState.from_history(revised)
+    state.update_frame(bars.iloc[199:250])
+    assert_matches_batch(state.current(), bars.iloc[:250])
+
+
+def test_revisions_do_not_copy_the_windows(bars, monkeypatch):
+    state = IndicatorState.from_history(bars.iloc[:-1])
+    monkeypatch.setattr(IndicatorState, '_checkpoint', lambda self: pytest.fail('full checkpoint taken'))
+    for close in (bars['Close'].iloc[-1] * 1.01, bars['Close'].iloc[-1]):
+        state.update(close, bars.index[-1])
+    monkeypatch.undo()
+    assert_matches_batch(state.current(), bars)
+
+
+def test_dict_round_trip_continues_where_it_left_off(bars):
+    state = IndicatorState.from_history(bars.iloc[:150])
+    restored = IndicatorState.from_dict(json.loads(json.dumps(state.to_dict())))
+    assert restored.last_timestamp == bars.index[149]
+    assert restored.current() == pytest.approx(state.current(), nan_ok=True)
+
+    # Including a revision of the bar it was saved on
+    restored.update_frame(bars.iloc[149:])
+    assert_matches_batch(restored.current(), bars)
+
+
+def test_older_state_layout_is_rejected(bars):
+    data = IndicatorState.from_history(bars.iloc[:50]).to_dict()
+    del data['version']
+    with pytest.raises(Exception):
+        IndicatorState.from_dict(data)
+
+
+def test_history_cache_state_round_trip(tmp_path, bars):
+    cache = HistoryCache(root=str(tmp_path))
+    state = IndicatorState.from_history(bars)
+    cache.save_state('AAPL', '1m', 'indicators', state.to_dict())
+    loaded = IndicatorState.from_dict(cache.load_state('AAPL', '1m', 'indicators'))
+    assert loaded.current() == pytest.approx(state.current(), nan_ok=True)
+    assert cache.load_state('AAPL', '5m', 'indicators') is None
+
+
+class TestLiveWatchlist:
+    @pytest.fixture
+    def feed(self, monkeypatch, tmp_path, bars):
+        """fetch_latest serving bars[:feed['rows']] with the last Close scaled by feed['revise']"""
+        feed = {'rows': 100, 'revise': 1.0}
+
+        def fetch_latest(symbols, interval, lookback):
+            df = bars.iloc[:feed['rows']].copy()
+            df.iloc[-1, df.columns.get_loc('Close')] *= feed['revise']
+            return {symbol: df for symbol in symbols}
+
+        monkeypatch.setattr(StockDataFetcher, 'fetch_latest', fetch_latest)
+        monkeypatch.setattr(StockDataFetcher, 'history_cache', HistoryCache(root=str(tmp_path)))
+        return feed
+
+    def test_indicators_follow_new_and_revised_bars(self, feed, bars):
+        watchlist = LiveWatchlist(['AAA'], interval='1m')
+        watchlist.poll_once()
+        assert_matches_batch(watchlist.indicators()['AAA'], bars.iloc[:100])
+
+        feed.update(rows=130, revise=1.02)
+        watchlist.poll_once()
+        assert_matches_batch(watchlist.indicators()['AAA'], watchlist.frames['AAA'])
+
+        feed['revise'] = 1.0
+        watchlist.poll_once()
+        assert_matches_batch(watchlist.indicators()['AAA'], bars.iloc[:130])
+
+    def test_saved_state_is_resumed(self, feed, bars):
+        first = LiveWatchlist(['AAA'], interval='1m')
+        first.poll_once()
+        first.save_indicator_states()
+
+        # The next watchlist's backfill starts after the first bars but still
+        # contains the saved one: the state carries the full history
+        feed['rows'] = 160
+        second = LiveWatchlist(['AAA'], interval='1m')
+        with pytest.MonkeyPatch.context() as patch:
+            patch.setattr(StockDataFetcher, 'fetch_latest',
+                          lambda symbols, interval, lookback: {'AAA': bars.iloc[50:160]})
+            second.poll_once()
+        assert_matches_batch(second.indicators()['AAA'], bars.iloc[:160])
+
+    def test_saved_state_with_a_gap_is_rebuilt(self, feed, bars):
+        first = LiveWatchlist(['AAA'], interval='1m')
+        first.poll_once()
+        first.save_indicator_states()
+
+        second = LiveWatchlist(['AAA'], interval='1m')
+        with pytest.MonkeyPatch.context() as patch:
+            patch.setattr(StockDataFetcher, 'fetch_latest',
+                          lambda symbols, interval, lookback: {'AAA': bars.iloc[150:260]})
+            second.poll_once()
+        assert_matches_batch(second.indicators()['AAA'], bars.iloc[150:260])
@@ -0,0 +1,96 @@
+import json
+import time
+
+import pytest
+
+from utils.request_governor import UpstreamUnavailable
+from utils.symbol_resolver import SymbolResolver
+
+
+@pytest.fixture
+def listings(tmp_path):
+    path = tmp_path / 'listings.csv'
+    path.write_text("symbol,name,exchange,yahoo_symbol\n"
+                    "TCS,Tata Consultancy Services,NSE,TCS.NS\n"
+                    "TCS,Tata Consultancy Services,BSE,532540.BO\n")
+    return path
+
+
+@pytest.fixture
+def resolver(tmp_path, listings):
+    return SymbolResolver(path=str(tmp_path / 'cache' / 'symbols.json'), ttl=100, negative_ttl=10,
+                          listings_path=str(listings))
+
+
+class Probe:
+    def __init__(self, listed=(), error=None):
+        self.listed = set(listed)
+        self.error = error
+        self.calls = []
+
+    def __call__(self, candidate):
+        self.calls.append(candidate)
+        if self.error is not None:
+            raise self.error
+        return candidate in self.listed
+
+
+def test_listed_symbols_resolve_without_probing(resolver):
+    probe = Probe()
+    assert resolver.resolve('tcs', ['TCS.NS'], probe, 'TCS') == 'TCS.NS'
+    assert probe.calls == []
+
+
+def test_resolved_symbol_persists_across_instances(resolver, tmp_path, listings):
+    probe = Probe(listed=['INFY.NS'])
+    assert resolver.resolve('infy', ['INFY', 'INFY.NS'], probe, 'INFY') == 'INFY.NS'
+    assert probe.calls == ['INFY', 'INFY.NS']
+    assert json.loads((tmp_path / 'cache' / 'symbols.json').read_text())['INFY']['resolved'] == 'INFY.NS'
+
+    reopened = SymbolResolver(path=resolver.path, listings_path=str(listings))
+    probe = Probe()
+    assert reopened.resolve('INFY', ['INFY', 'INFY.NS'], probe, 'INFY') == 'INFY.NS'
+    assert probe.calls == []
+
+
+def test_failed_probes_are_cached_as_negative(resolver, listings):
+    probe = Probe()
+    assert resolver.resolve('NOPE', ['NOPE', 'NOPE.NS'], probe, 'NOPE') == 'NOPE'
+    assert resolver.lookup('nope') == ('NOPE', False)
+
+    # The negative answer is persisted too, so no instance probes again
+    reopened = SymbolResolver(path=resolver.path, listings_path=str(listings))
+    probe = Probe()
+    assert reopened.resolve('NOPE', ['NOPE', 'NOPE.NS'], probe, 'NOPE') == 'NOPE'
+    assert probe.calls == []
+
+
+def test_entries_expire_after_their_ttl(resolver, monkeypatch):
+    resolver.store('GOOD', 'GOOD.NS', found=True)
+    resolver.store('BAD', 'BAD', found=False)
+    now = time.time()
+
+    monkeypatch.setattr(time, 'time', lambda: now + 50)
+    # Negative entries expire first (negative_ttl=10), positive ones keep (ttl=100)
+    assert resolver.lookup('BAD') is None
+    assert resolver.lookup('GOOD') == ('GOOD.NS', True)
+
+    monkeypatch.setattr(time, 'time', lambda: now + 150)
+    assert resolver.lookup('GOOD') is None
+    probe = Probe(listed=['GOOD.NS'])
+    assert resolver.resolve('GOOD', ['GOOD.NS'], probe, 'GOOD') == 'GOOD.NS'
+    assert probe.calls == ['GOOD.NS']
+
+
+def test_upstream_outage_is_not_cached(resolver):
+    probe = Probe(error=UpstreamUnavailable("circuit open"))
+    assert resolver.resolve('WIPRO', ['WIPRO.NS'], probe, 'WIPRO') == 'WIPRO'
+    assert resolver.lookup('WIPRO') is None
+
+
+def test_unreadable_cache_file_is_ignored(resolver, tmp_path):
+    (tmp_path / 'cache').mkdir()
+    (tmp_path / 'cache' / 'symbols.json').write_text('{not json')
+    assert resolver.lookup('INFY') is None
+    resolver.store('INFY', 'INFY.NS')
+    assert json.loads((tmp_path / 'cache' / 'symbols.json').read_text())['INFY']['found'] is True
@@ -0,0 +1,53 @@
+import pytest
+
+from utils.data_fetcher import StockDataFetcher
+from utils.providers import ReplayProvider
+from utils.symbol_index import SymbolIndex
+
+
+@pytest.fixture
+def replay(monkeypatch):
+    provider = ReplayProvider()
+    monkeypatch.setattr(StockDataFetcher, 'provider', provider)
+    monkeypatch.setattr(StockDataFetcher, 'governor', None)
+    return provider
+
+
+def test_typing_never_calls_the_provider(replay):
+    # Every prefix of a known and an unknown query, as the sidebar sees them per keystroke
+    for query in ('RELIANCE', 'ZZQXW'):
+        for end in range(1, len(query) + 1):
+            StockDataFetcher.search_stock_symbols(query[:end], 'both')
+    assert replay.calls['search'] == 0
+
+
+def test_unknown_query_gets_unlisted_candidates(replay):
+    suggestions = StockDataFetcher.search_stock_symbols('zzqxw', 'both')
+    assert [s['symbol'] for s in suggestions] == ['ZZQXW.NS', 'ZZQXW.BO', 'ZZQXW']
+    assert not any(s.get('listed', True) for s in suggestions)
+
+
+def test_listed_query_is_marked_listed(replay):
+    suggestions = StockDataFetcher.search_stock_symbols('RELIANCE', 'Indian (NSE/BSE)')
+    assert suggestions and all(s.get('listed', True) for s in suggestions)
+
+
+def test_search_online_is_one_provider_call(replay):
+    assert StockDataFetcher.search_online('zzqxw') == []
+    assert replay.calls['search'] == 1
+
+
+def test_fuzzy_candidates_share_an_ngram():
+    index = SymbolIndex.from_records([
+        {'symbol': 'RELIANCE', 'name': 'Reliance Industries Limited', 'exchange': 'NSE', 'yahoo_symbol': 'RELIANCE.NS'},
+        {'symbol': 'RPOWER', 'name': 'Reliance Power Limited', 'exchange': 'NSE', 'yahoo_symbol': 'RPOWER.NS'},
+        {'symbol': 'RIVN', 'name': 'Rivian Automotive', 'exchange': 'NASDAQ', 'yahoo_symbol': 'RIVN'},
+        {'symbol': 'TCS', 'name': 'Tata Consultancy Services', 'exchange': 'NSE', 'yahoo_symbol': 'TCS.NS'},
+    ])
+    # Short (bigram) and long (trigram) typos, and one longer than the indexed span
+    assert [s['symbol'] for s in index.search('RELQ')] == ['RELIANCE.NS', 'RPOWER.NS']
+    assert index.search('RELAINCE IND')[0]['symbol'] == 'RELIANCE.NS'
+    assert index.search('RELIANCE INDUSTRIEZ LTD')[0]['symbol'] == 'RELIANCE.NS'
+    assert index.search('RIVAIN', market_type='Indian (NSE/BSE)') == []
+    assert index.search('TQXZ') == []
+    assert set(index._grams) == {'R', 'T'}
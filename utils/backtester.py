@@ -0,0 +1,275 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.cross_asset import CrossAssetAnalytics
+from utils.instrumentation import Instrumentation
+from utils.metrics_calculator import MetricsCalculator
+from utils.price_panel import PricePanel
+
+# Arrays the strategies read, saved once per sweep for worker processes
+SIGNAL_ARRAYS = ['close', 'returns', 'RSI', 'MACD', 'Signal_Line', 'MA20', '20dSTD']
+
+
+def _latch(entries, exits):
+    """
+    Position that switches on at an entry and off at an exit, held in between.
+
+    Vectorized forward fill: each row takes the state of the latest row with
+    an entry or exit (an exit wins when both fire on the same bar).
+    """
+    state = np.where(exits, 0.0, np.where(entries, 1.0, np.nan))
+    rows = np.arange(len(state))[:, None]
+    last = np.maximum.accumulate(np.where(np.isnan(state), -1, rows), axis=0)
+    held = np.take_along_axis(state, np.maximum(last, 0), axis=0)
+    return np.where(last >= 0, held, 0.0)
+
+
+def _positions(strategy, params, arrays):
+    """Target position (-1, 0 or 1) at each bar's close, for every symbol"""
+    close = arrays['close']
+    with np.errstate(invalid='ignore'):
+        if strategy == 'buy_hold':
+            return np.where(np.isnan(close), np.nan, 1.0)
+        if strategy == 'rsi':
+            rsi = arrays['RSI']
+            return _latch(rsi < params['lower'], rsi > params['upper'])
+        if strategy == 'macd':
+            above = arrays['MACD'] > arrays['Signal_Line']
+            valid = ~np.isnan(arrays['Signal_Line'])
+            return np.where(above, 1.0, -1.0 if params['short'] else 0.0) * valid
+        if strategy == 'bollinger':
+            ma20, band = arrays['MA20'], arrays['20dSTD'] * params['k']
+            if params['mode'] == 'breakout':
+                return _latch(close > ma20 + band, close < ma20)
+            return _latch(close < ma20 - band, close > ma20)
+    raise Exception(f"Unknown strategy: {strategy}")
+
+
+def _performance(strategy, params, arrays, cost, periods):
+    """
+    Per-symbol equity curve and summary statistics for one parameter set.
+
+    A position taken at a bar's close earns the next bar's return; each
+    change of position costs `cost` (a fraction of equity) per unit traded.
+    """
+    returns = arrays['returns']
+    target = _positions(strategy, params, arrays)
+    # Hold through gaps (no close, no new signal)
+    position = pd.DataFrame(target).ffill().fillna(0.0).to_numpy()
+    held = np.vstack([np.zeros((1, position.shape[1])), position[:-1]])
+    traded = np.abs(np.diff(np.vstack([np.zeros((1, position.shape[1])), position]), axis=0))
+    valid = ~np.isnan(returns)
+    pnl = (1.0 + np.where(valid, held * np.nan_to_num(returns), 0.0)) * (1.0 - traded * cost) - 1.0
+    equity = np.cumprod(1.0 + pnl, axis=0)
+
+    observations = valid.sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(valid, pnl, 0.0).sum(axis=0) / observations
+        variance = (np.where(valid, pnl - mean, 0.0) ** 2).sum(axis=0) / (observations - 1)
+        sharpe = mean / np.sqrt(variance) * np.sqrt(periods)
+        years = observations / periods
+        total = equity[-1] - 1.0 if len(equity) else np.full(equity.shape[1], np.nan)
+        cagr = np.power(1.0 + total, 1.0 / years) - 1.0
+        drawdown = np.min(equity / np.maximum.accumulate(equity, axis=0) - 1.0, axis=0)
+    summary = {
+        'Total Return': total,
+        'CAGR': cagr,
+        'Sharpe': np.where(np.isfinite(sharpe), sharpe, np.nan),
+        'Max Drawdown': drawdown,
+        'Trades': (traded > 0).sum(axis=0),
+        'Exposure': np.where(valid, held != 0, False).sum(axis=0) / np.maximum(observations, 1),
+        'Years': years
+    }
+    return equity, summary
+
+
+def _sweep_rows(jobs, arrays, symbols, cost, periods):
+    frames = []
+    for strategy, params in jobs:
+        _, summary = _performance(strategy, params, arrays, cost, periods)
+        frame = pd.DataFrame(summary)
+        frame.insert(0, 'Symbol', symbols)
+        frame.insert(0, 'Params', Backtester.describe(params))
+        frame.insert(0, 'Strategy', strategy)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def _sweep_shard(scratch, symbols, jobs, cost, periods):
+    """Worker: run a slice of the parameter grid against the memory-mapped signal arrays"""
+    arrays = {name: np.load(os.path.join(scratch, f"{name}.npy"), mmap_mode='r') for name in SIGNAL_ARRAYS}
+    return _sweep_rows(jobs, arrays, symbols, cost, periods)
+
+
+class Backtester:
+    """
+    Vectorized rule-based backtests over a close matrix (dates x symbols).
+
+    Signals come from MetricsCalculator's batch indicators (RSI, MACD and
+    Signal_Line, Bollinger Bands), positions and PnL are whole-matrix numpy
+    arithmetic (no per-bar loop), and a parameter sweep is split across a
+    process pool that reads the signal arrays from memory-mapped scratch
+    files. Small sweeps run in-process; the pool is started lazily and
+    reused until close().
+    """
+
+    # Parameter grids swept by default, per strategy
+    GRIDS = {
+        'buy_hold': {},
+        'rsi': {'lower': [20, 25, 30, 35], 'upper': [65, 70, 75, 80]},
+        'macd': {'short': [False, True]},
+        'bollinger': {'k': [1.5, 2.0, 2.5], 'mode': ['breakout', 'reversion']},
+    }
+
+    # Below this many strategy x bar x symbol cells, process overhead outweighs the gain
+    MIN_PARALLEL_CELLS = 20_000_000
+
+    def __init__(self, workers=None, scratch_dir=None):
+        self.workers = workers or os.cpu_count() or 1
+        if scratch_dir is None and os.path.isdir('/dev/shm'):
+            scratch_dir = '/dev/shm'
+        self.scratch_dir = scratch_dir
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    @staticmethod
+    def describe(params):
+        return ', '.join(f"{name}={value}" for name, value in params.items()) or '-'
+
+    @staticmethod
+    def expand(grids=None):
+        """[(strategy, params)] for every combination in {strategy: {param: [values]}}"""
+        jobs = []
+        for strategy, grid in (grids or Backtester.GRIDS).items():
+            names = list(grid)
+            for values in itertools.product(*(grid[name] for name in names)):
+                jobs.append((strategy, dict(zip(names, values))))
+        return jobs
+
+    @staticmethod
+    def signal_arrays(close):
+        """The indicator and return arrays every strategy reads, for a wide close frame"""
+        values = close.to_numpy(dtype=np.float64)
+        rsi, macd, signal, ma20, std20, _, _ = MetricsCalculator._batch_blocks(values)
+        return {
+            'close': values,
+            'returns': CrossAssetAnalytics.returns(close).to_numpy(),
+            'RSI': rsi, 'MACD': macd, 'Signal_Line': signal, 'MA20': ma20, '20dSTD': std20
+        }
+
+    @staticmethod
+    def _close_frame(close):
+        return close.frame('Close') if isinstance(close, PricePanel) else close
+
+    @staticmethod
+    @Instrumentation.timed('backtest.run')
+    def run(close, strategy, params=None, cost_bps=5, interval='1d'):
+        """
+        Backtest one strategy/parameter set on every symbol.
+
+        Returns (equity, summary): the equity curves (starting at 1.0) on the
+        close index, and a per-symbol table of total return, CAGR, Sharpe,
+        max drawdown, trade count and exposure.
+        """
+        close = Backtester._close_frame(close)
+        periods = CrossAssetAnalytics.PERIODS_PER_YEAR.get(interval, 252)
+        equity, summary = _performance(strategy, params or {}, Backtester.signal_arrays(close),
+                                       cost_bps / 10_000, periods)
+        return (pd.DataFrame(equity, index=close.index, columns=close.columns),
+                pd.DataFrame(summary, index=close.columns))
+
+    @Instrumentation.timed('backtest.sweep')
+    def sweep(self, close, grids=None, cost_bps=5, interval='1d'):
+        """
+        Run every strategy/parameter combination in `grids` (default GRIDS).
+
+        Returns (results, stats): one row per strategy, parameter set and
+        symbol, and a dict with the run size, wall time and throughput in
+        strategy-symbol-years per second.
+        """
+        close = Backtester._close_frame(close)
+        jobs = Backtester.expand(grids)
+        periods = CrossAssetAnalytics.PERIODS_PER_YEAR.get(interval, 252)
+        symbols = list(close.columns)
+        rows, width = close.shape
+        started = time.perf_counter()
+
+        arrays = Backtester.signal_arrays(close)
+        workers = min(self.workers, len(jobs))
+        if workers <= 1 or len(jobs) * rows * width < self.MIN_PARALLEL_CELLS:
+            results = _sweep_rows(jobs, arrays, symbols, cost_bps / 10_000, periods)
+            workers = 1
+        else:
+            results = self._sweep_parallel(jobs, arrays, symbols, cost_bps / 10_000, periods, workers)
+
+        elapsed = time.perf_counter() - started
+        years = float(np.mean((~np.isnan(arrays['returns'])).sum(axis=0))) / periods if width else 0.0
+        symbol_years = len(jobs) * width * years
+        stats = {
+            'strategies': len(jobs),
+            'symbols': width,
+            'years': years,
+            'workers': workers,
+            'elapsed_s': elapsed,
+            'strategy_symbol_years_per_s': symbol_years / elapsed if elapsed else float('inf')
+        }
+        return results, stats
+
+    def _sweep_parallel(self, jobs, arrays, symbols, cost, periods, workers):
+        scratch = tempfile.mkdtemp(prefix='backtest-', dir=self.scratch_dir)
+        try:
+            for name in SIGNAL_ARRAYS:
+                np.save(os.path.join(scratch, f"{name}.npy"), arrays[name])
+            pool = self._get_pool()
+            # Interleave so cheap and expensive strategies spread evenly over the workers
+            shards = [jobs[i::workers * 2] for i in range(workers * 2) if jobs[i::workers * 2]]
+            futures = [pool.submit(_sweep_shard, scratch, symbols, shard, cost, periods) for shard in shards]
+            frames = [future.result() for future in futures]
+        except Exception as e:
+            logging.error(f"Parallel backtest sweep failed: {str(e)}")
+            raise Exception(f"Error running backtest sweep in parallel: {str(e)}")
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+        # Back to grid order; a stable sort keeps each job's symbols in order
+        order = pd.DataFrame({
+            'Strategy': [strategy for strategy, _ in jobs],
+            'Params': [Backtester.describe(params) for _, params in jobs],
+            '_rank': np.arange(len(jobs))
+        })
+        results = pd.concat(frames, ignore_index=True).merge(order, on=['Strategy', 'Params'], how='left')
+        results = results.sort_values('_rank', kind='stable').drop(columns='_rank')
+        return results.reset_index(drop=True)
+
+    @staticmethod
+    def leaderboard(results):
+        """Mean statistics across symbols per strategy/parameter set, best Sharpe first"""
+        if results.empty:
+            return results
+        columns = ['Total Return', 'CAGR', 'Sharpe', 'Max Drawdown', 'Trades', 'Exposure']
+        board = results.groupby(['Strategy', 'Params'], sort=False)[columns].mean()
+        return board.sort_values('Sharpe', ascending=False)
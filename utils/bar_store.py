@@ -0,0 +1,336 @@
+import json
+import logging
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.history_cache import HistoryCache
+from utils.instrumentation import Instrumentation
+from utils.request_governor import UpstreamUnavailable
+
+NS_PER_DAY = 86_400 * 10 ** 9
+
+
+class BarStore:
+    """
+    Append-only, memory-mapped OHLCV store for intraday bars.
+
+    Each symbol/interval has three files under `root`:
+      <key>.bars       fixed-width little-endian records (RECORD), sorted by time
+      <key>.idx        (UTC day, first row) pairs, one per day present in .bars
+      <key>.meta.json  exchange timezone used to rebuild DataFrames, and the
+                       range already requested upstream (see get())
+
+    Reads map the .bars file and return NumPy views into it, so opening
+    months of 1m bars costs a date-index lookup, not a full load.
+
+    get() is the intraday counterpart of HistoryCache.get(): it downloads
+    only the ranges not requested yet and appends them, so each refresh
+    writes the new bars instead of the whole history.
+    """
+
+    RECORD = np.dtype([('ts', '<i8'), ('Open', '<f8'), ('High', '<f8'),
+                       ('Low', '<f8'), ('Close', '<f8'), ('Volume', '<f8')])
+    INDEX_RECORD = np.dtype([('day', '<i8'), ('row', '<i8')])
+    FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+    def __init__(self, root=None, ttl=60):
+        self.root = root or os.path.join(os.environ.get('STOCK_CACHE_DIR', '.cache'), 'bars')
+        # Seconds before the latest bar is considered stale and re-fetched
+        self.ttl = ttl
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _key(self, symbol, interval):
+        safe_symbol = re.sub(r'[^A-Za-z0-9.\-]', '_', symbol)
+        return f"{safe_symbol}__{interval}"
+
+    def _paths(self, symbol, interval):
+        base = os.path.join(self.root, self._key(symbol, interval))
+        return f"{base}.bars", f"{base}.idx", f"{base}.meta.json"
+
+    def _lock(self, symbol, interval):
+        key = self._key(symbol, interval)
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.RLock()
+            return self._locks[key]
+
+    @staticmethod
+    def _map(path, dtype, mode='r'):
+        """Map a record file; empty/missing files give an empty (non-mapped) array"""
+        if not os.path.exists(path):
+            return np.empty(0, dtype=dtype)
+        count = os.path.getsize(path) // dtype.itemsize
+        if count == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode=mode, shape=(count,))
+
+    def _records(self, df):
+        """Convert an OHLCV frame to sorted, de-duplicated RECORD rows"""
+        index = df.index
+        index = index.tz_convert('UTC') if index.tz is not None else index.tz_localize('UTC')
+        records = np.empty(len(df), dtype=self.RECORD)
+        records['ts'] = index.as_unit('ns').asi8
+        for field in self.FIELDS:
+            records[field] = df[field].to_numpy(dtype=np.float64) if field in df.columns else np.nan
+        order = np.argsort(records['ts'], kind='stable')
+        records = records[order]
+        # Keep the last occurrence of a repeated timestamp (the freshest bar)
+        keep = np.append(records['ts'][1:] != records['ts'][:-1], True)
+        return records[keep]
+
+    def _day_index(self, ts, first_row, previous_day=None):
+        days = ts // NS_PER_DAY
+        starts = np.flatnonzero(np.diff(days, prepend=previous_day if previous_day is not None else days[0] - 1))
+        index = np.empty(len(starts), dtype=self.INDEX_RECORD)
+        index['day'] = days[starts]
+        index['row'] = starts + first_row
+        return index
+
+    def append(self, symbol, interval, df):
+        """
+        Add bars newer than the stored ones; returns the number of records written.
+
+        A bar with the same timestamp as the last stored one overwrites it (a
+        partial bar being completed). Bars older than the first stored bar
+        trigger a one-off rewrite so the file stays sorted; gaps inside the
+        stored range are left as they are.
+        """
+        if df is None or df.empty:
+            return 0
+        bars_path, index_path, meta_path = self._paths(symbol, interval)
+        records = self._records(df)
+        with self._lock(symbol, interval):
+            try:
+                os.makedirs(self.root, exist_ok=True)
+                stored = self._map(bars_path, self.RECORD)
+                if len(stored) and records['ts'][0] < stored['ts'][0]:
+                    older = records[records['ts'] < stored['ts'][0]]
+                    newer = records[records['ts'] > stored['ts'][-1]]
+                    merged = np.concatenate([older, np.asarray(stored), newer])
+                    del stored
+                    self._rewrite(bars_path, index_path, merged)
+                    written = len(older) + len(newer)
+                else:
+                    written = self._append_records(bars_path, index_path, stored, records)
+                if not os.path.exists(meta_path):
+                    HistoryCache._write_json(meta_path, {'tz': str(df.index.tz) if df.index.tz is not None else 'UTC'})
+                return written
+            except Exception as e:
+                logging.warning(f"Could not write bar store for {symbol} ({interval}): {str(e)}")
+                return 0
+
+    def _append_records(self, bars_path, index_path, stored, records):
+        count = len(stored)
+        last_ts = int(stored['ts'][-1]) if count else None
+        del stored
+        if last_ts is not None:
+            records = records[records['ts'] >= last_ts]
+        if not len(records):
+            return 0
+
+        with open(bars_path, 'ab' if last_ts is None else 'r+b') as f:
+            start_row = count
+            if last_ts is not None and records['ts'][0] == last_ts:
+                start_row = count - 1
+            f.seek(start_row * self.RECORD.itemsize)
+            f.write(records.tobytes())
+
+        # The .idx file is written after the bars it points at
+        previous_day = last_ts // NS_PER_DAY if last_ts is not None else None
+        index = self._day_index(records['ts'], start_row, previous_day)
+        if len(index):
+            with open(index_path, 'ab') as f:
+                f.write(index.tobytes())
+        return len(records)
+
+    def _meta(self, symbol, interval):
+        try:
+            with open(self._paths(symbol, interval)[2]) as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def _rewrite(self, bars_path, index_path, records):
+        for path, data in ((bars_path, records), (index_path, self._day_index(records['ts'], 0))):
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data.tobytes())
+            os.replace(tmp_path, path)
+
+    def _row_at(self, bars, index, ts):
+        """First row with timestamp >= ts, narrowed by the day index"""
+        lo, hi = 0, len(bars)
+        if len(index):
+            day = ts // NS_PER_DAY
+            pos = int(np.searchsorted(index['day'], day, side='right'))
+            if pos > 0:
+                lo = int(index['row'][pos - 1])
+            if pos < len(index):
+                hi = int(index['row'][pos])
+        return lo + int(np.searchsorted(bars['ts'][lo:hi], ts))
+
+    @staticmethod
+    def _ns(value):
+        ts = pd.Timestamp(value)
+        return (ts.tz_localize('UTC') if ts.tzinfo is None else ts.tz_convert('UTC')).value
+
+    def view(self, symbol, interval, start=None, end=None):
+        """
+        Zero-copy structured view of the records in [start, end).
+
+        Fields are 'ts' (UTC nanoseconds) and the OHLCV columns; e.g.
+        view(...)['Close'] is a strided view straight into the mapped file.
+        """
+        bars_path, index_path, _ = self._paths(symbol, interval)
+        bars = self._map(bars_path, self.RECORD)
+        if not len(bars):
+            return bars
+        index = self._map(index_path, self.INDEX_RECORD)
+        lo = self._row_at(bars, index, self._ns(start)) if start is not None else 0
+        hi = self._row_at(bars, index, self._ns(end)) if end is not None else len(bars)
+        return bars[lo:max(lo, hi)]
+
+    def span(self, symbol, interval):
+        """(first, last) stored timestamps in UTC, or None when nothing is stored"""
+        bars = self.view(symbol, interval)
+        if not len(bars):
+            return None
+        return pd.Timestamp(int(bars['ts'][0]), tz='UTC'), pd.Timestamp(int(bars['ts'][-1]), tz='UTC')
+
+    def timezone(self, symbol, interval):
+        return self._meta(symbol, interval).get('tz') or 'UTC'
+
+    def read(self, symbol, interval, start=None, end=None):
+        """DataFrame of the bars in [start, end), indexed in the exchange timezone"""
+        bars = self.view(symbol, interval, start, end)
+        if not len(bars):
+            return pd.DataFrame(columns=self.FIELDS, dtype=np.float64)
+        index = pd.to_datetime(np.array(bars['ts']), unit='ns', utc=True)
+        index = index.tz_convert(self.timezone(symbol, interval))
+        return pd.DataFrame({field: np.array(bars[field]) for field in self.FIELDS}, index=index)
+
+    def covers(self, symbol, interval, period='1y', start_date=None, end_date=None):
+        """Same as HistoryCache.covers(), from the range recorded by get()"""
+        meta = self._meta(symbol, interval)
+        if 'end' not in meta:
+            return False
+        if meta['start'] is None:
+            return True
+        covered_start = pd.Timestamp(meta['start'])
+        if start_date and end_date:
+            return covered_start <= HistoryCache._to_ts(start_date, covered_start.tz)
+        if period == 'max' or (period != 'ytd' and period not in HistoryCache.PERIOD_OFFSETS):
+            return False
+        return covered_start <= HistoryCache._period_start(period, HistoryCache._now())
+
+    def _window(self, symbol, interval, period, start_date, end_date):
+        """Stored bars for a yfinance-style period or [start, end) range (see HistoryCache.slice_history)"""
+        if start_date and end_date:
+            tz = self.timezone(symbol, interval)
+            return self.read(symbol, interval, HistoryCache._to_ts(start_date, tz), HistoryCache._to_ts(end_date, tz))
+        span = self.span(symbol, interval)
+        if span is None or period == 'max':
+            return self.read(symbol, interval)
+        anchor = span[1].tz_convert(self.timezone(symbol, interval))
+        if period == 'ytd':
+            return self.read(symbol, interval, anchor.normalize().replace(month=1, day=1))
+        start = anchor - HistoryCache.PERIOD_OFFSETS[period]
+        df = self.read(symbol, interval, start)
+        return df[df.index > start]
+
+    def get(self, symbol, interval, fetch, period='1y', start_date=None, end_date=None):
+        """
+        Return bars for symbol/interval, downloading only uncovered ranges.
+
+        `fetch(start=None, end=None, period=None)` performs the upstream call,
+        as for HistoryCache.get(). Bars live only here; the stored range is
+        kept in the meta file next to the timezone.
+        """
+        custom_range = bool(start_date and end_date)
+        if not custom_range and period != 'max' and period != 'ytd' and period not in HistoryCache.PERIOD_OFFSETS:
+            return fetch(period=period)
+
+        with self._lock(symbol, interval):
+            now = HistoryCache._now()
+            meta = self._meta(symbol, interval)
+            span = self.span(symbol, interval)
+
+            if span is None or 'end' not in meta:
+                Instrumentation.count('bar_store.miss')
+                df = fetch(start=start_date, end=end_date) if custom_range else fetch(period=period)
+                if df.empty:
+                    return df
+                tz = df.index.tz
+                if custom_range:
+                    covered_start = HistoryCache._to_ts(start_date, tz)
+                    covered_end = min(HistoryCache._to_ts(end_date, tz), now)
+                else:
+                    covered_start = None if period == 'max' else HistoryCache._period_start(period, now)
+                    covered_end = now
+                self.append(symbol, interval, df)
+                self._save_coverage(symbol, interval, covered_start, covered_end, now)
+                return self._window(symbol, interval, period, start_date, end_date)
+
+            tz = self.timezone(symbol, interval)
+            covered_start = HistoryCache._to_ts(meta['start'], tz) if meta['start'] else None
+            covered_end = HistoryCache._to_ts(meta['end'], tz)
+            fetched_at = pd.Timestamp(meta['fetched_at'])
+            if custom_range:
+                req_start = HistoryCache._to_ts(start_date, tz)
+                req_end = HistoryCache._to_ts(end_date, tz)
+            else:
+                req_start = None if period == 'max' else HistoryCache._period_start(period, now)
+                req_end = None
+
+            changed = False
+            try:
+                # Head gap: older bars go in with a one-off rewrite of the file
+                if covered_start is not None and (req_start is None or req_start < covered_start):
+                    head = fetch(period='max') if req_start is None else fetch(start=req_start, end=covered_start)
+                    self.append(symbol, interval, head)
+                    covered_start = req_start
+                    changed = True
+
+                # Tail gap: re-fetch from the last stored bar's day so a partial bar is replaced
+                needs_tail = req_end is None or req_end > covered_end
+                open_ended = req_end is None or req_end >= now
+                if needs_tail and not (open_ended and (now - covered_end).total_seconds() < self.ttl):
+                    tail = fetch(start=span[1].tz_convert(tz).normalize(), end=req_end)
+                    self.append(symbol, interval, tail)
+                    covered_end = now if req_end is None else max(covered_end, min(req_end, now))
+                    fetched_at = now
+                    changed = True
+            except UpstreamUnavailable as e:
+                logging.warning(f"Serving stale {interval} bars for {symbol}: {str(e)}")
+                Instrumentation.count('bar_store.stale')
+
+            Instrumentation.count('bar_store.partial' if changed else 'bar_store.hit')
+            if changed:
+                self._save_coverage(symbol, interval, covered_start, covered_end, fetched_at)
+            return self._window(symbol, interval, period, start_date, end_date)
+
+    def _save_coverage(self, symbol, interval, covered_start, covered_end, fetched_at):
+        meta_path = self._paths(symbol, interval)[2]
+        meta = self._meta(symbol, interval)
+        meta.update(HistoryCache._manifest(covered_start, covered_end, fetched_at))
+        try:
+            HistoryCache._write_json(meta_path, meta)
+        except Exception as e:
+            logging.warning(f"Could not write bar store coverage for {symbol} ({interval}): {str(e)}")
+
+    def clear(self, symbol=None, interval=None):
+        """Remove stored bars, optionally restricted to one symbol/interval"""
+        if not os.path.isdir(self.root):
+            return
+        if symbol is not None and interval is not None:
+            prefix = f"{self._key(symbol, interval)}."
+        else:
+            prefix = self._key(symbol, '') if symbol is not None else ''
+        for name in os.listdir(self.root):
+            if name.startswith(prefix):
+                os.remove(os.path.join(self.root, name))
@@ -1,47 +1,60 @@
+import logging
+
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import pandas as pd
 import numpy as np
+from functools import lru_cache
+from utils.downsampling import Downsampler
+from utils.instrumentation import Instrumentation
+from utils.price_panel import PricePanel
 
 class ChartBuilder:
+    # Points per trace sent to the browser; roughly two per horizontal pixel
+    # of a full-width chart. Pass max_points=None to plot every row.
+    DEFAULT_MAX_POINTS = 2000
+
     @staticmethod
-    def create_price_chart(df):
+    @Instrumentation.timed('chart.create_price_chart')
+    def create_price_chart(df, max_points=DEFAULT_MAX_POINTS):
+        # Calculate moving averages on the full history before any downsampling
+        df['MA20'] = df['Close'].rolling(window=20).mean()
+        df['MA50'] = df['Close'].rolling(window=50).mean()
+        plot_df = Downsampler.ohlc(df[['Open', 'High', 'Low', 'Close', 'Volume', 'MA20', 'MA50']], max_points)
+
         fig = make_subplots(rows=2, cols=1, shared_xaxes=True,
                            vertical_spacing=0.03, 
                            row_heights=[0.7, 0.3])
 
         # Candlestick chart
         fig.add_trace(go.Candlestick(
-            x=df.index,
-            open=df['Open'],
-            high=df['High'],
-            low=df['Low'],
-            close=df['Close'],
+            x=plot_df.index,
+            open=plot_df['Open'],
+            high=plot_df['High'],
+            low=plot_df['Low'],
+            close=plot_df['Close'],
             name='OHLC'
         ), row=1, col=1)
 
         # Add volume bar chart
         fig.add_trace(go.Bar(
-            x=df.index,
-            y=df['Volume'],
+            x=plot_df.index,
+            y=plot_df['Volume'],
             name='Volume',
             marker_color='rgba(0,255,135,0.3)'
         ), row=2, col=1)
 
-        # Calculate and add moving averages
-        df['MA20'] = df['Close'].rolling(window=20).mean()
-        df['MA50'] = df['Close'].rolling(window=50).mean()
-
+        # Add moving averages
         fig.add_trace(go.Scatter(
-            x=df.index,
-            y=df['MA20'],
+            x=plot_df.index,
+            y=plot_df['MA20'],
             name='20 Day MA',
             line=dict(color='#f6d854')
         ), row=1, col=1)
 
         fig.add_trace(go.Scatter(
-            x=df.index,
-            y=df['MA50'],
+            x=plot_df.index,
+            y=plot_df['MA50'],
             name='50 Day MA',
             line=dict(color='#f25f5c')
         ), row=1, col=1)
@@ -62,11 +75,23 @@ class ChartBuilder:
 
         return fig
 
+    COMPARISON_COLORS = ['#00ff87', '#f6d854', '#f25f5c', '#8338ec', '#3a86ff']
+
     @staticmethod
-    def create_comparison_chart(historical_data_dict):
+    @Instrumentation.timed('chart.create_comparison_chart')
+    def create_comparison_chart(historical_data_dict, max_points=DEFAULT_MAX_POINTS, line_method='lttb',
+                                fast=False):
+        if isinstance(historical_data_dict, PricePanel):
+            if fast:
+                return ChartBuilder._create_comparison_chart_fast(historical_data_dict, max_points, line_method)
+            historical_data_dict = historical_data_dict.to_frames()
+
         if not historical_data_dict:
             return go.Figure()
 
+        if fast:
+            return ChartBuilder._create_comparison_chart_fast(historical_data_dict, max_points, line_method)
+
         fig = go.Figure()
         colors = ['#00ff87', '#f6d854', '#f25f5c', '#8338ec', '#3a86ff']
 
@@ -80,9 +105,10 @@ class ChartBuilder:
                     initial_price = df['Close'].iloc[0]
                     if pd.notnull(initial_price) and initial_price != 0:
                         normalized_prices = ((df['Close'] - initial_price) / initial_price) * 100
+                        normalized_prices = Downsampler.line(normalized_prices, max_points, line_method)
 
                         fig.add_trace(go.Scatter(
-                            x=df.index,
+                            x=normalized_prices.index,
                             y=normalized_prices,
                             name=symbol,
                             line=dict(color=colors[i % len(colors)]),
@@ -91,7 +117,7 @@ class ChartBuilder:
                                         f"<b>{symbol}</b><extra></extra>"
                         ))
             except Exception as e:
-                print(f"Error processing {symbol}: {str(e)}")
+                logging.warning(f"Error processing {symbol}: {str(e)}")
                 continue
 
         fig.update_layout(
@@ -114,4 +140,260 @@ class ChartBuilder:
         fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
         fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
 
-        return fig
\ No newline at end of file
+        return fig
+
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _comparison_layout():
+        """Comparison chart layout, built and validated once per process"""
+        fig = go.Figure()
+        fig.update_layout(
+            title="Stock Price Comparison (% Change)",
+            xaxis_title="Date",
+            yaxis_title="Price Change (%)",
+            height=600,
+            template="plotly_dark",
+            showlegend=True,
+            legend=dict(
+                yanchor="top",
+                y=0.99,
+                xanchor="left",
+                x=0.01
+            ),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
+        fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
+        return fig.layout
+
+    @staticmethod
+    def _create_comparison_chart_fast(historical_data, max_points, line_method):
+        """
+        WebGL variant of create_comparison_chart for many series.
+
+        All series are normalized in one vectorized step on a shared
+        wall-clock index (tz dropped, which is what Plotly displays anyway),
+        traces are Scattergl with plain datetime64 x values, and the layout
+        comes from a cached template instead of being rebuilt each rerun.
+        Accepts a {symbol: DataFrame} dict or a PricePanel (used as-is).
+        """
+        palette = ChartBuilder.COMPARISON_COLORS
+        if isinstance(historical_data, PricePanel):
+            panel = historical_data.frame('Close')
+            if panel.index.tz is not None:
+                panel = panel.tz_localize(None)
+            colors = {symbol: palette[i % len(palette)] for i, symbol in enumerate(panel.columns)}
+            values = panel.to_numpy()
+            observed = ~np.isnan(values)
+            first = observed.argmax(axis=0)
+            initial = pd.Series(np.where(observed.any(axis=0), values[first, np.arange(values.shape[1])], np.nan),
+                                index=panel.columns)
+        else:
+            closes = {}
+            colors = {}
+            for i, (symbol, df) in enumerate(historical_data.items()):
+                if df.empty or 'Close' not in df.columns:
+                    continue
+                close = df['Close']
+                if close.index.tz is not None:
+                    close = close.tz_localize(None)
+                closes[symbol] = close
+                colors[symbol] = palette[i % len(palette)]
+            if not closes:
+                return go.Figure(layout=ChartBuilder._comparison_layout())
+            initial = pd.Series({symbol: close.iloc[0] for symbol, close in closes.items()}, dtype=np.float64)
+            panel = pd.concat(closes, axis=1)
+
+        initial = initial[initial.notna() & (initial != 0)]
+        normalized = ((panel[initial.index] - initial) / initial) * 100
+        x_all = normalized.index.to_numpy()
+
+        traces = []
+        for symbol in normalized.columns:
+            column = normalized[symbol].to_numpy()
+            mask = ~np.isnan(column)
+            series = Downsampler.line(pd.Series(column[mask], index=x_all[mask]), max_points, line_method)
+            traces.append(go.Scattergl(
+                x=series.index.to_numpy(),
+                y=series.to_numpy(),
+                name=symbol,
+                mode='lines',
+                line=dict(color=colors[symbol]),
+                hovertemplate="<b>%{x}</b><br>" +
+                            "%{y:.2f}% change<br>" +
+                            f"<b>{symbol}</b><extra></extra>"
+            ))
+
+        return go.Figure(data=traces, layout=ChartBuilder._comparison_layout())
+
+    @staticmethod
+    def create_live_chart(symbols):
+        """Live watchlist chart: one empty line per symbol, filled by append_live_bars()"""
+        palette = ChartBuilder.COMPARISON_COLORS
+        traces = [go.Scattergl(
+            x=np.array([], dtype='datetime64[ns]'),
+            y=np.array([], dtype=np.float64),
+            name=symbol,
+            mode='lines',
+            line=dict(color=palette[i % len(palette)]),
+            hovertemplate="<b>%{x}</b><br>" +
+                        "%{y:.2f}% change<br>" +
+                        f"<b>{symbol}</b><extra></extra>"
+        ) for i, symbol in enumerate(symbols)]
+        fig = go.Figure(data=traces, layout=ChartBuilder._comparison_layout())
+        # Keep the user's zoom/pan while points stream in
+        fig.update_layout(title="Live Watchlist (% Change)", uirevision='live')
+        return fig
+
+    @staticmethod
+    @Instrumentation.timed('chart.append_live_bars')
+    def append_live_bars(fig, updates, bases, max_points=DEFAULT_MAX_POINTS):
+        """
+        Extend the live chart's traces in place with new bars instead of
+        rebuilding the figure.
+
+        `updates` is {symbol: bars} from LiveWatchlist.updates_since(); points
+        at or after a symbol's first new timestamp are replaced, so a revised
+        last bar is redrawn. Values are % change from `bases` (symbol -> first
+        close, filled in as symbols appear). Each trace keeps its latest
+        `max_points` points. Returns the number of points written.
+        """
+        traces = {trace.name: trace for trace in fig.data}
+        written = 0
+        for symbol, df in updates.items():
+            trace = traces.get(symbol)
+            if trace is None or df.empty or 'Close' not in df.columns:
+                continue
+            close = df['Close'].to_numpy(dtype=np.float64)
+            if symbol not in bases:
+                valid = close[~np.isnan(close) & (close != 0)]
+                if not len(valid):
+                    continue
+                bases[symbol] = float(valid[0])
+            index = df.index.tz_localize(None) if df.index.tz is not None else df.index
+            x_new = index.to_numpy()
+            y_new = (close - bases[symbol]) / bases[symbol] * 100
+
+            x_old = np.asarray(trace.x, dtype='datetime64[ns]')
+            y_old = np.asarray(trace.y, dtype=np.float64)
+            keep = x_old < x_new[0]
+            trace.x = np.concatenate([x_old[keep], x_new])[-max_points:]
+            trace.y = np.concatenate([y_old[keep], y_new])[-max_points:]
+            written += len(x_new)
+        return written
+
+    @staticmethod
+    @Instrumentation.timed('chart.create_correlation_heatmap')
+    def create_correlation_heatmap(correlation):
+        """Heatmap of a symbol x symbol correlation matrix (red -1 .. green +1)"""
+        symbols = [str(symbol) for symbol in correlation.columns]
+        values = correlation.to_numpy()
+        # Cell labels only while they are still legible
+        text = np.where(np.isnan(values), '', np.char.mod('%.2f', np.nan_to_num(values))) if len(symbols) <= 20 else None
+        fig = go.Figure(go.Heatmap(
+            z=values,
+            x=symbols,
+            y=symbols,
+            zmin=-1,
+            zmax=1,
+            colorscale=[[0.0, '#f25f5c'], [0.5, '#1e1e1e'], [1.0, '#00ff87']],
+            text=text,
+            texttemplate='%{text}' if text is not None else None,
+            hovertemplate="<b>%{y} / %{x}</b><br>correlation %{z:.2f}<extra></extra>"
+        ))
+        fig.update_layout(
+            title="Return Correlation",
+            height=max(400, min(900, 40 * len(symbols) + 150)),
+            template="plotly_dark",
+            yaxis=dict(autorange='reversed'),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        return fig
+
+    @staticmethod
+    @Instrumentation.timed('chart.create_rolling_beta_chart')
+    def create_rolling_beta_chart(rolling_beta, benchmark, max_points=DEFAULT_MAX_POINTS):
+        """Line chart of each symbol's rolling beta against the benchmark"""
+        palette = ChartBuilder.COMPARISON_COLORS
+        index = rolling_beta.index.tz_localize(None) if rolling_beta.index.tz is not None else rolling_beta.index
+        trace_type = go.Scattergl if rolling_beta.shape[1] >= 10 else go.Scatter
+        traces = []
+        for i, symbol in enumerate(rolling_beta.columns):
+            if symbol == benchmark:
+                continue
+            column = rolling_beta[symbol].to_numpy()
+            mask = ~np.isnan(column)
+            if not mask.any():
+                continue
+            series = Downsampler.line(pd.Series(column[mask], index=index[mask]), max_points)
+            traces.append(trace_type(
+                x=series.index.to_numpy(),
+                y=series.to_numpy(),
+                name=str(symbol),
+                mode='lines',
+                line=dict(color=palette[i % len(palette)]),
+                hovertemplate="<b>%{x}</b><br>beta %{y:.2f}<br>" + f"<b>{symbol}</b><extra></extra>"
+            ))
+        fig = go.Figure(data=traces)
+        fig.add_hline(y=1.0, line_dash='dot', line_color='rgba(200,200,200,0.5)')
+        fig.update_layout(
+            title=f"Rolling Beta vs {benchmark}",
+            xaxis_title="Date",
+            yaxis_title="Beta",
+            height=450,
+            template="plotly_dark",
+            showlegend=True,
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
+        fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
+        return fig
+
+    @staticmethod
+    def create_equity_chart(equity, title, benchmark=None, max_points=DEFAULT_MAX_POINTS):
+        """
+        Backtest equity curves per symbol (growth of 1.0), with an optional
+        dotted `benchmark` equity Series (e.g. mean buy-and-hold) for reference
+        """
+        palette = ChartBuilder.COMPARISON_COLORS
+        index = equity.index.tz_localize(None) if equity.index.tz is not None else equity.index
+        trace_type = go.Scattergl if equity.shape[1] >= 10 else go.Scatter
+        traces = []
+        for i, symbol in enumerate(equity.columns):
+            series = Downsampler.line(pd.Series(equity[symbol].to_numpy(), index=index), max_points)
+            traces.append(trace_type(
+                x=series.index.to_numpy(),
+                y=series.to_numpy(),
+                name=str(symbol),
+                mode='lines',
+                line=dict(color=palette[i % len(palette)]),
+                hovertemplate="<b>%{x}</b><br>%{y:.2f}x<br>" + f"<b>{symbol}</b><extra></extra>"
+            ))
+        if benchmark is not None:
+            series = Downsampler.line(pd.Series(benchmark.to_numpy(), index=index), max_points)
+            traces.append(trace_type(
+                x=series.index.to_numpy(),
+                y=series.to_numpy(),
+                name='Buy & hold (mean)',
+                mode='lines',
+                line=dict(color='rgba(200,200,200,0.8)', dash='dot'),
+                hovertemplate="<b>%{x}</b><br>%{y:.2f}x<br><b>Buy & hold</b><extra></extra>"
+            ))
+        fig = go.Figure(data=traces)
+        fig.add_hline(y=1.0, line_dash='dot', line_color='rgba(200,200,200,0.5)')
+        fig.update_layout(
+            title=title,
+            xaxis_title="Date",
+            yaxis_title="Equity (growth of 1)",
+            height=450,
+            template="plotly_dark",
+            showlegend=True,
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)'
+        )
+        fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
+        fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='rgba(128,128,128,0.2)')
+        return fig
@@ -0,0 +1,160 @@
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pandas as pd
+
+from utils.data_fetcher import StockDataFetcher
+from utils.exporter import INDICATOR_COLUMNS, DataExporter, ExportWriter
+from utils.instrumentation import Instrumentation
+from utils.metrics_calculator import MetricsCalculator
+from utils.parallel_indicators import ParallelIndicatorEngine
+from utils.providers import LocalDataProvider, ReplayProvider
+from utils.symbol_resolver import SymbolResolver
+
+METRIC_COLUMNS = ['symbol', 'Market Cap', 'PE Ratio', 'Volume', 'Avg Volume', 'Dividend Yield', 'Beta']
+
+
+def read_symbols(path):
+    """Symbols from a text file: one per line, blank lines and '#' comments ignored"""
+    symbols = []
+    with open(path) as f:
+        for line in f:
+            symbol = line.split('#', 1)[0].strip()
+            if symbol and symbol not in symbols:
+                symbols.append(symbol)
+    return symbols
+
+
+def metric_row(symbol, metrics):
+    """One row of key metrics, with 'N/A' and other non-numeric values as NaN"""
+    values = metrics.iloc[:, 0].to_dict() if not metrics.empty else {}
+    row = {'symbol': symbol}
+    for column in METRIC_COLUMNS[1:]:
+        row[column] = pd.to_numeric(values.get(column), errors='coerce')
+    return pd.DataFrame([row], columns=METRIC_COLUMNS)
+
+
+def analyze_symbol(symbol, args):
+    """Fetch history and key metrics for one symbol; metrics failures are not fatal"""
+    df = StockDataFetcher.get_historical_data(symbol, period=args.period, start_date=args.start,
+                                              end_date=args.end, interval=args.interval)
+    try:
+        metrics = metric_row(symbol, StockDataFetcher.get_key_metrics(symbol))
+    except Exception as e:
+        logging.warning(str(e))
+        metrics = metric_row(symbol, pd.DataFrame())
+    return df, metrics
+
+
+def use_offline_provider(provider, cache_dir):
+    """Serve every request from an offline provider; nothing is fetched or cached upstream"""
+    StockDataFetcher.provider = provider
+    StockDataFetcher.history_cache = None
+    StockDataFetcher.bar_store = None
+    StockDataFetcher.info_cache.invalidate()
+    StockDataFetcher.symbol_resolver = SymbolResolver(path=os.path.join(cache_dir, 'symbols.json'))
+
+
+def run_batch(args):
+    symbols = read_symbols(args.symbols)
+    if not symbols:
+        raise Exception(f"No symbols found in {args.symbols}")
+    os.makedirs(args.out, exist_ok=True)
+    if args.replay:
+        use_offline_provider(ReplayProvider(args.data_dir, latency=args.latency), args.out)
+    elif args.data_dir:
+        use_offline_provider(LocalDataProvider(args.data_dir), args.out)
+
+    indicators = ExportWriter(os.path.join(args.out, DataExporter.file_name('indicators', args.format)),
+                              INDICATOR_COLUMNS, args.format)
+    metrics = ExportWriter(os.path.join(args.out, DataExporter.file_name('metrics', args.format)),
+                           METRIC_COLUMNS, args.format)
+
+    # Exported through STOCK_METRICS_FILE / STOCK_METRICS_LOG when set
+    record, token = Instrumentation.start_run('batch')
+    started = time.perf_counter()
+    histories = {}
+    failed = []
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(args.workers, len(symbols)))) as pool:
+            futures = {Instrumentation.submit(pool, analyze_symbol, symbol, args): symbol for symbol in symbols}
+            # Results are written by this thread only, metrics in completion order
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    df, metric = future.result()
+                except Exception as e:
+                    failed.append(symbol)
+                    logging.error(f"{symbol}: {str(e)}")
+                    continue
+                histories[symbol] = df
+                metrics.write(metric)
+                if not args.quiet:
+                    elapsed = time.perf_counter() - started
+                    print(f"[{len(histories) + len(failed)}/{len(symbols)}] {symbol}: {len(df)} bars "
+                          f"({len(histories) / elapsed:.1f} symbols/s)", file=sys.stderr)
+
+        # One batched indicator pass over every fetched symbol, sharded across processes
+        # for large universes (small ones run in-process), written in input order
+        ordered = {symbol: histories[symbol] for symbol in symbols if symbol in histories}
+        with ParallelIndicatorEngine(workers=args.processes) as engine:
+            frames = MetricsCalculator.calculate_indicators_many(ordered, compute=engine.compute)
+        for symbol, df in frames.items():
+            indicators.write(DataExporter.long_rows(symbol, df, indicators=True))
+    finally:
+        indicators.close()
+        metrics.close()
+        Instrumentation.finish_run(record, token)
+
+    elapsed = time.perf_counter() - started
+    done = len(histories)
+    total_bytes = indicators.bytes_written + metrics.bytes_written
+    print(f"{done} symbols ok, {len(failed)} failed in {elapsed:.2f}s "
+          f"({done / elapsed if elapsed else 0:.1f} symbols/s)")
+    print(f"{indicators.rows} indicator rows, {total_bytes / 1e6:.2f} MB written "
+          f"({total_bytes / 1e6 / elapsed if elapsed else 0:.2f} MB/s) to {args.out}")
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+    return 0 if done else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='stock-analysis',
+                                     description='Headless stock analysis without the Streamlit UI')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    batch = commands.add_parser('batch', help='Compute indicators and key metrics for a list of symbols')
+    batch.add_argument('--symbols', required=True, help='Text file with one symbol per line')
+    batch.add_argument('--period', default='1y', help='yfinance period, e.g. 1mo, 1y, 5y, max (default: 1y)')
+    batch.add_argument('--interval', default='1d', help='Bar interval (default: 1d)')
+    batch.add_argument('--start', help='Start date (YYYY-MM-DD); use with --end instead of --period')
+    batch.add_argument('--end', help='End date (YYYY-MM-DD), exclusive')
+    batch.add_argument('--out', default='output', help='Output directory (default: output)')
+    batch.add_argument('--format', choices=list(ExportWriter.FORMATS), default='csv')
+    batch.add_argument('--workers', type=int, default=8, help='Parallel fetches (default: 8)')
+    batch.add_argument('--processes', type=int, default=None,
+                       help='Processes for the indicator pass (default: one per CPU; 1 runs in-process)')
+    batch.add_argument('--data-dir', help='Read history/info from this directory instead of the network')
+    batch.add_argument('--replay', action='store_true',
+                       help='Use the deterministic replay provider (fixtures from --data-dir, else synthetic)')
+    batch.add_argument('--latency', type=float, default=0.0, help='Artificial seconds per replayed call')
+    batch.add_argument('--quiet', action='store_true', help='Only print the final summary')
+    batch.set_defaults(handler=run_batch)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if bool(args.start) != bool(args.end):
+        build_parser().error('--start and --end must be given together')
+    logging.basicConfig(level=logging.ERROR if args.quiet else logging.WARNING,
+                        format='%(levelname)s %(message)s')
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+
+from utils.instrumentation import Instrumentation
+from utils.price_panel import PricePanel
+
+
+class CrossAssetAnalytics:
+    """
+    Vectorized cross-symbol statistics over an aligned close-price matrix.
+
+    Inputs are a wide close DataFrame (dates x symbols) or a PricePanel.
+    Symbols may have gaps (e.g. exchange holidays on an outer-joined
+    calendar): returns are taken between a symbol's consecutive valid
+    closes, and pairwise statistics use the rows where both sides have a
+    return, like pandas' pairwise-complete DataFrame.corr().
+    """
+
+    # Bars per year by interval, for annualizing volatility and returns
+    PERIODS_PER_YEAR = {
+        '1d': 252, '5d': 52, '1wk': 52, '1mo': 12, '3mo': 4,
+        '1h': 252 * 7, '60m': 252 * 7, '90m': 252 * 5, '30m': 252 * 13,
+        '15m': 252 * 26, '5m': 252 * 78, '2m': 252 * 195, '1m': 252 * 390
+    }
+
+    @staticmethod
+    def _close_frame(close):
+        if isinstance(close, PricePanel):
+            return close.frame('Close')
+        return close
+
+    @staticmethod
+    def returns(close):
+        """Simple returns between each symbol's consecutive valid closes (NaN elsewhere)"""
+        close = CrossAssetAnalytics._close_frame(close)
+        values = close.to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+        rows = np.arange(len(values))[:, None]
+        last = np.maximum.accumulate(np.where(valid, rows, -1), axis=0)
+        previous = np.vstack([np.full((1, values.shape[1]), -1), last[:-1]])
+        prior = np.take_along_axis(values, np.maximum(previous, 0), axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = np.where(valid & (previous >= 0), values / prior - 1.0, np.nan)
+        return pd.DataFrame(result, index=close.index, columns=close.columns)
+
+    @staticmethod
+    def correlation(returns, min_periods=2):
+        """Pairwise-complete Pearson correlation matrix, via four matrix products"""
+        x = returns.to_numpy(dtype=np.float64)
+        mask = (~np.isnan(x)).astype(np.float64)
+        x = np.where(mask > 0, x, 0.0)
+        n = mask.T @ mask
+        sx = x.T @ mask            # sx[i, j]: sum of x_i over rows where x_j is also valid
+        sxx = (x * x).T @ mask
+        sxy = x.T @ x
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cov = n * sxy - sx * sx.T
+            var = (n * sxx - sx * sx) * (n * sxx - sx * sx).T
+            corr = cov / np.sqrt(var)
+        corr = np.where(n >= min_periods, np.clip(corr, -1.0, 1.0), np.nan)
+        np.fill_diagonal(corr, np.where(np.diag(n) >= min_periods, 1.0, np.nan))
+        return pd.DataFrame(corr, index=returns.columns, columns=returns.columns)
+
+    @staticmethod
+    def rolling_beta(returns, benchmark, window=60, min_periods=None):
+        """
+        Beta of every column against `benchmark` over a trailing window of rows.
+
+        `benchmark` is a column of `returns` or a separate returns Series on
+        the same index. Only rows where both returns exist are used; a
+        window needs at least `min_periods` of them (default: window // 2).
+        """
+        bench = returns[benchmark] if isinstance(benchmark, str) else benchmark.reindex(returns.index)
+        min_periods = min_periods or max(2, window // 2)
+        x = returns.to_numpy(dtype=np.float64)
+        y = bench.to_numpy(dtype=np.float64)[:, None]
+        both = ~np.isnan(x) & ~np.isnan(y)
+        x = np.where(both, x, 0.0)
+        y = np.where(both, y, 0.0)
+
+        def window_sum(values):
+            csum = np.cumsum(values, axis=0)
+            out = csum.copy()
+            out[window:] -= csum[:-window]
+            return out
+
+        n = window_sum(both.astype(np.float64))
+        sx = window_sum(x)
+        sy = window_sum(y)
+        sxy = window_sum(x * y)
+        syy = window_sum(y * y)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            beta = (n * sxy - sx * sy) / (n * syy - sy * sy)
+        beta = np.where((n >= min_periods) & np.isfinite(beta), beta, np.nan)
+        return pd.DataFrame(beta, index=returns.index, columns=returns.columns)
+
+    @staticmethod
+    def drawdowns(close):
+        """Drawdown from the running peak (0 at a new high, -0.25 for 25% below it)"""
+        close = CrossAssetAnalytics._close_frame(close)
+        values = close.to_numpy(dtype=np.float64)
+        peak = np.fmax.accumulate(values, axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drawdown = values / peak - 1.0
+        return pd.DataFrame(drawdown, index=close.index, columns=close.columns)
+
+    @staticmethod
+    @Instrumentation.timed('analytics.analyze')
+    def analyze(close, benchmark=None, window=60, interval='1d'):
+        """
+        Everything the risk tab needs in one pass over the close matrix.
+
+        Returns a dict with 'returns', 'correlation', 'drawdowns',
+        'rolling_beta' (None without a benchmark) and 'summary', a per-symbol
+        table of annualized return/volatility, max drawdown, and beta and
+        correlation against the benchmark.
+        """
+        close = CrossAssetAnalytics._close_frame(close)
+        periods = CrossAssetAnalytics.PERIODS_PER_YEAR.get(interval, 252)
+        returns = CrossAssetAnalytics.returns(close)
+        correlation = CrossAssetAnalytics.correlation(returns)
+        drawdowns = CrossAssetAnalytics.drawdowns(close)
+
+        r = returns.to_numpy()
+        observations = np.sum(~np.isnan(r), axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.nansum(r, axis=0) / observations
+            variance = np.nansum((r - mean) ** 2, axis=0) / (observations - 1)
+            log_growth = np.nansum(np.log1p(r), axis=0)
+            annual_return = np.expm1(log_growth * periods / observations)
+        summary = pd.DataFrame({
+            'Annual Return': annual_return,
+            'Volatility': np.sqrt(np.where(observations > 1, variance, np.nan) * periods),
+            'Max Drawdown': np.nanmin(np.where(np.isnan(drawdowns.to_numpy()), np.inf, drawdowns.to_numpy()), axis=0),
+            'Observations': observations
+        }, index=close.columns)
+        summary.loc[summary['Observations'] == 0, ['Annual Return', 'Max Drawdown']] = np.nan
+
+        rolling_beta = None
+        if benchmark is not None and benchmark in returns.columns:
+            rolling_beta = CrossAssetAnalytics.rolling_beta(returns, benchmark, window)
+            full_beta = CrossAssetAnalytics.rolling_beta(returns, benchmark, window=max(len(returns), 1),
+                                                        min_periods=2)
+            summary['Beta'] = full_beta.iloc[-1] if len(full_beta) else np.nan
+            summary['Correlation'] = correlation[benchmark]
+
+        return {
+            'returns': returns,
+            'correlation': correlation,
+            'drawdowns': drawdowns,
+            'rolling_beta': rolling_beta,
+            'summary': summary
+        }
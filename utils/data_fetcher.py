@@ -1,87 +1,118 @@
-import yfinance as yf
 import pandas as pd
 from datetime import datetime, timedelta
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils.bar_store import BarStore
+from utils.history_cache import HistoryCache
+from utils.info_cache import InfoCache
+from utils.symbol_resolver import SymbolResolver
+from utils.symbol_index import SymbolIndex
+from utils.price_panel import PricePanel
+from utils.providers import provider_from_env
+from utils.request_governor import UpstreamUnavailable, governor_from_env
+from utils.resampler import Resampler
+from utils.instrumentation import Instrumentation
 
 class StockDataFetcher:
+    # Shared on-disk OHLCV store; only uncovered date ranges go to the network
+    history_cache = HistoryCache()
+    # Memory-mapped intraday bars, kept beyond Yahoo's short intraday window
+    bar_store = BarStore()
+    # Market data backend (see utils/providers.py); yfinance unless STOCK_DATA_PROVIDER says otherwise
+    provider = provider_from_env()
+    # Rate limit, retry/backoff and per-host circuit breaker around every provider call
+    governor = governor_from_env()
+    # Shared `.info` cache for get_stock_info/get_key_metrics (5 min TTL)
+    info_cache = InfoCache(ttl=300, maxsize=512)
+    # Raw input -> exchange symbol table, seeded from assets/listings.csv
+    symbol_resolver = SymbolResolver()
+    # Offline prefix index over the same listings, used for autocomplete
+    symbol_index = SymbolIndex()
+    # Thread cap for concurrent fetches when no governor bounds the calls in flight
+    MAX_WORKERS = 16
+
     @staticmethod
+    @Instrumentation.timed('fetcher.search_stock_symbols')
     def search_stock_symbols(query, market_type="both"):
-        """Search for stock symbols based on user input"""
+        """
+        Search for stock symbols based on user input.
+
+        Suggestions come from the local listings index, so this makes no
+        network calls; a symbol is only validated upstream once selected.
+        Queries the listings don't know get unverified candidates marked
+        'listed': False (search_online() is the explicit upstream lookup).
+        """
         try:
-            # Define common Indian stock suffixes and indices
-            indian_suffixes = [".NS", ".BO"]
-            indian_indices = {
-                "NIFTY": "^NSEI",
-                "SENSEX": "^BSESN",
-                "NIFTY50": "^NSEI",
-                "BANKNIFTY": "^NSEBANK"
-            }
+            query = query.strip().upper()
+            if not query:
+                return []
 
-            # First check if it's an index
-            if market_type == "Indian (NSE/BSE)" or market_type == "both":
-                for index_name, symbol in indian_indices.items():
-                    if query.upper() in index_name:
-                        try:
-                            ticker = yf.Ticker(symbol)
-                            info = ticker.info
-                            if info:
-                                return [{
-                                    'symbol': symbol,
-                                    'name': index_name,
-                                    'exchange': 'NSE'
-                                }]
-                        except:
-                            continue
-
-            # Try different combinations for Indian stocks
-            suggestions = []
+            suggestions = StockDataFetcher.symbol_index.search(query, market_type)
+            if suggestions:
+                return suggestions
+
+            # Not in the listings: offer unverified candidates instead of probing
+            candidates = []
             if market_type == "Indian (NSE/BSE)" or market_type == "both":
-                for suffix in indian_suffixes:
-                    try:
-                        test_symbol = f"{query.upper()}{suffix}"
-                        ticker = yf.Ticker(test_symbol)
-                        info = ticker.info
-                        if info and 'longName' in info:
-                            suggestions.append({
-                                'symbol': test_symbol,
-                                'name': info['longName'],
-                                'exchange': 'NSE' if suffix == '.NS' else 'BSE'
-                            })
-                    except:
-                        continue
-
-            # For global markets
+                candidates.append({'symbol': f"{query}.NS", 'name': query, 'exchange': 'NSE', 'listed': False})
+                candidates.append({'symbol': f"{query}.BO", 'name': query, 'exchange': 'BSE', 'listed': False})
             if market_type == "Global" or market_type == "both":
-                try:
-                    ticker = yf.Ticker(query.upper())
-                    info = ticker.info
-                    if info and 'longName' in info:
-                        suggestions.append({
-                            'symbol': query.upper(),
-                            'name': info['longName'],
-                            'exchange': info.get('exchange', 'UNKNOWN')
-                        })
-                except:
-                    pass
-
-            return suggestions
+                candidates.append({'symbol': query, 'name': query, 'exchange': 'UNVERIFIED', 'listed': False})
+            return candidates
         except Exception as e:
             logging.error(f"Error searching symbols: {str(e)}")
             return []
 
+    @staticmethod
+    @Instrumentation.timed('fetcher.search_online')
+    def search_online(query, market_type="both"):
+        """
+        Ask the provider (Yahoo search) for symbols matching `query`.
+
+        One upstream call; the sidebar only makes it when the user asks,
+        never per keystroke. Returns [] on failure.
+        """
+        query = query.strip().upper()
+        if not query:
+            return []
+        try:
+            return StockDataFetcher._upstream(
+                'search', lambda: StockDataFetcher.provider.search(query, market_type)
+            )
+        except Exception as e:
+            logging.warning(f"Provider search failed for {query}: {str(e)}")
+            return []
+
+    @staticmethod
+    def _upstream(kind, func, weight=1):
+        """Make one counted, timed provider call of `kind` through the request governor"""
+        provider = StockDataFetcher.provider
+        Instrumentation.count(f'provider.{kind}')
+        with Instrumentation.span(f'provider.{kind}'):
+            if StockDataFetcher.governor is None:
+                return func()
+            return StockDataFetcher.governor.call(provider.host, func, rate_limit=provider.rate_limit,
+                                                  weight=weight)
+
     @staticmethod
     def _try_fetch_data(symbol, period='1mo'):
         """Helper method to try fetching data for a symbol with detailed error logging"""
         try:
-            stock = yf.Ticker(symbol)
-            data = stock.history(period=period)
+            data = StockDataFetcher._upstream(
+                'probe', lambda: StockDataFetcher.provider.history(symbol, period=period)
+            )
             if not data.empty:
                 return True, None
             return False, "No data available"
+        except UpstreamUnavailable:
+            # Not an answer about the symbol; let the resolver skip caching a negative entry
+            raise
         except Exception as e:
             return False, str(e)
 
     @staticmethod
+    @Instrumentation.timed('fetcher.get_valid_symbol')
     def get_valid_symbol(symbol):
         """Get the valid symbol with appropriate suffix for Indian stocks"""
         # If already has suffix, return as is
@@ -95,43 +126,44 @@ class StockDataFetcher:
             'SENSEX': ['^BSESN']
         }
 
-        if symbol in special_cases:
-            for special_symbol in special_cases[symbol]:
-                success, error = StockDataFetcher._try_fetch_data(special_symbol)
-                if success:
-                    return special_symbol
+        candidates = list(special_cases.get(symbol, []))
+        default = symbol
 
-        # For Indian stocks, try both exchanges
+        # For Indian stocks, try both exchanges (NSE first, more common)
         if any(char.isdigit() for char in symbol) or any(s in symbol for s in ['&', '-']):
-            # Try NSE first (more common)
-            nse_symbol = f"{symbol}.NS"
-            success, error = StockDataFetcher._try_fetch_data(nse_symbol)
-            if success:
-                return nse_symbol
+            candidates += [f"{symbol}.NS", f"{symbol}.BO"]
+            default = f"{symbol}.NS"  # Default to NSE if both fail
+
+        if not candidates:
+            return symbol  # For global stocks, return as is
 
-            # Try BSE if NSE fails
-            bse_symbol = f"{symbol}.BO"
-            success, error = StockDataFetcher._try_fetch_data(bse_symbol)
-            if success:
-                return bse_symbol
+        # Listings/cached answers first; probing the network is the fallback
+        return StockDataFetcher.symbol_resolver.resolve(
+            symbol, candidates,
+            probe=lambda candidate: StockDataFetcher._try_fetch_data(candidate)[0],
+            default=default
+        )
 
-            return nse_symbol  # Default to NSE if both fail
+    @staticmethod
+    def _fetch_info(ticker_symbol):
+        """Fetch `.info` through the shared cache so concurrent callers share one request"""
+        def load():
+            return StockDataFetcher._upstream('info', lambda: StockDataFetcher.provider.info(ticker_symbol))
 
-        return symbol  # For global stocks, return as is
+        return StockDataFetcher.info_cache.get(ticker_symbol, load)
 
     @staticmethod
+    @Instrumentation.timed('fetcher.get_stock_info')
     def get_stock_info(symbol):
         """Fetch stock info with proper suffix handling for Indian stocks"""
         try:
             ticker_symbol = StockDataFetcher.get_valid_symbol(symbol)
-            stock = yf.Ticker(ticker_symbol)
-            info = stock.info
+            info = StockDataFetcher._fetch_info(ticker_symbol)
 
-            # If NSE fails, try BSE
+            # If NSE fails, try BSE (an upstream failure raises instead, so a struggling
+            # upstream is not hit twice)
             if (not info or len(info) == 0) and ticker_symbol.endswith('.NS'):
-                bse_symbol = symbol.replace('.NS', '.BO')
-                stock = yf.Ticker(bse_symbol)
-                info = stock.info
+                info = StockDataFetcher._fetch_info(f"{ticker_symbol[:-3]}.BO")
 
             # Verify we have valid info
             if not info or len(info) == 0:
@@ -142,28 +174,76 @@ class StockDataFetcher:
             raise Exception(f"Error fetching stock info for {symbol}: {str(e)}")
 
     @staticmethod
+    def _fetch_history(ticker_symbol, period, start_date, end_date, interval):
+        """Fetch history through the local cache, downloading only missing ranges"""
+        provider = StockDataFetcher.provider
+
+        def fetch(start=None, end=None, period=None):
+            if period is not None:
+                return StockDataFetcher._upstream(
+                    'history', lambda: provider.history(ticker_symbol, period=period, interval=interval)
+                )
+            return StockDataFetcher._upstream(
+                'history', lambda: provider.history(ticker_symbol, interval=interval, start=start, end=end)
+            )
+
+        cache = StockDataFetcher._store_for(interval)
+        if cache is None:
+            if start_date and end_date:
+                return fetch(start=start_date, end=end_date)
+            return fetch(period=period)
+        return cache.get(ticker_symbol, interval, fetch, period=period, start_date=start_date, end_date=end_date)
+
+    @staticmethod
+    def _store_for(interval):
+        """The one store `interval` bars live in: the bar store for intraday bars, else the history cache"""
+        if interval in HistoryCache.INTRADAY_INTERVALS and StockDataFetcher.bar_store is not None:
+            return StockDataFetcher.bar_store
+        return StockDataFetcher.history_cache
+
+    @staticmethod
+    def _derived_history(ticker_symbol, period, start_date, end_date, interval):
+        """
+        Build `interval` bars from a finer interval whose cache already covers the
+        window, or return None when the interval has to come from upstream.
+        """
+        exchange = Resampler.exchange_for(ticker_symbol)
+        cache = StockDataFetcher._store_for(interval)
+        if cache is None or exchange is None:
+            return None
+        if cache.covers(ticker_symbol, interval, period, start_date, end_date):
+            return None
+        for source in Resampler.sources_for(interval):
+            source_cache = StockDataFetcher._store_for(source)
+            if source_cache is None or not source_cache.covers(ticker_symbol, source, period, start_date, end_date):
+                continue
+            fine = StockDataFetcher._fetch_history(ticker_symbol, period, start_date, end_date, source)
+            if fine.empty:
+                continue
+            Instrumentation.count('resampler.derived')
+            with Instrumentation.span('resampler.resample'):
+                return Resampler.resample(fine, interval, exchange)
+        return None
+
+    @staticmethod
+    @Instrumentation.timed('fetcher.get_historical_data')
     def get_historical_data(symbol, period='1y', start_date=None, end_date=None, interval='1d'):
         """
         Fetch historical data with custom date range and interval support
         """
         try:
             ticker_symbol = StockDataFetcher.get_valid_symbol(symbol)
-            stock = yf.Ticker(ticker_symbol)
 
-            # Try fetching data
-            if start_date and end_date:
-                hist = stock.history(start=start_date, end=end_date, interval=interval)
-            else:
-                hist = stock.history(period=period, interval=interval)
+            # Derive from finer cached bars when possible, otherwise fetch this interval
+            hist = StockDataFetcher._derived_history(ticker_symbol, period, start_date, end_date, interval)
+            if hist is None:
+                hist = StockDataFetcher._fetch_history(ticker_symbol, period, start_date, end_date, interval)
 
-            # If NSE data fetch fails, try BSE
+            # If NSE has no data, try BSE (upstream failures raise instead of falling through)
             if hist.empty and ticker_symbol.endswith('.NS'):
-                bse_symbol = symbol.replace('.NS', '.BO')
-                stock = yf.Ticker(bse_symbol)
-                if start_date and end_date:
-                    hist = stock.history(start=start_date, end=end_date, interval=interval)
-                else:
-                    hist = stock.history(period=period, interval=interval)
+                hist = StockDataFetcher._fetch_history(
+                    f"{ticker_symbol[:-3]}.BO", period, start_date, end_date, interval
+                )
 
             # Verify we have valid data
             if hist.empty:
@@ -174,17 +254,164 @@ class StockDataFetcher:
             raise Exception(f"Error fetching historical data for {symbol}: {str(e)}")
 
     @staticmethod
+    def _pool_size(count, max_workers=None):
+        """
+        Threads for `count` concurrent symbol fetches: one per symbol, capped by
+        `max_workers` or else by the governor's calls-in-flight limit per host
+        (a cold symbol makes several upstream calls, so fewer threads would
+        leave the limit unused).
+        """
+        governor = StockDataFetcher.governor
+        cap = max_workers or (governor.max_concurrency if governor is not None else StockDataFetcher.MAX_WORKERS)
+        return max(1, min(count, cap))
+
+    @staticmethod
+    def _iter_concurrent(func, symbols, max_workers=None, timeout=30):
+        """
+        Run func(symbol) for each symbol on a thread pool sized by _pool_size().
+
+        Yields (symbol, result, error) as each call finishes, so callers can
+        render the fast symbols before the slow ones return. A symbol still
+        running after `timeout` seconds is yielded with a timeout error.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return
+
+        started = {}
+
+        def task(symbol):
+            started[symbol] = time.monotonic()
+            return func(symbol)
+
+        pool = ThreadPoolExecutor(max_workers=StockDataFetcher._pool_size(len(symbols), max_workers))
+        try:
+            pending = {Instrumentation.submit(pool, task, symbol): symbol for symbol in symbols}
+            while pending:
+                done, _ = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+                for future in done:
+                    symbol = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        yield symbol, None, str(e)
+                    else:
+                        yield symbol, result, None
+
+                now = time.monotonic()
+                for future, symbol in list(pending.items()):
+                    if symbol in started and now - started[symbol] > timeout:
+                        future.cancel()
+                        pending.pop(future)
+                        yield symbol, None, f"Timed out after {timeout}s fetching {symbol}"
+        finally:
+            # Do not block the caller on timed-out downloads still in flight
+            # (or on the rest of the batch if it stopped iterating early)
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _collect(stream, symbols):
+        """Gather an _iter_concurrent stream into (results, errors) dicts, results in input order"""
+        results, errors = {}, {}
+        for symbol, result, error in stream:
+            if error is None:
+                results[symbol] = result
+            else:
+                errors[symbol] = error
+        results = {symbol: results[symbol] for symbol in dict.fromkeys(symbols) if symbol in results}
+        return results, errors
+
+    @staticmethod
+    def iter_many(symbols, period='1y', start_date=None, end_date=None, interval='1d',
+                  max_workers=None, timeout=30):
+        """Streaming fetch_many: yields (symbol, history, error) in completion order"""
+        return StockDataFetcher._iter_concurrent(
+            lambda symbol: StockDataFetcher.get_historical_data(
+                symbol, period=period, start_date=start_date,
+                end_date=end_date, interval=interval
+            ),
+            symbols, max_workers=max_workers, timeout=timeout
+        )
+
+    @staticmethod
+    def iter_info_many(symbols, max_workers=None, timeout=30):
+        """Streaming fetch_info_many: yields (symbol, info, error) in completion order"""
+        return StockDataFetcher._iter_concurrent(
+            StockDataFetcher.get_stock_info, symbols,
+            max_workers=max_workers, timeout=timeout
+        )
+
+    @staticmethod
+    @Instrumentation.timed('fetcher.fetch_many')
+    def fetch_many(symbols, period='1y', start_date=None, end_date=None, interval='1d',
+                   max_workers=None, timeout=30):
+        """
+        Fetch historical data for several symbols concurrently.
+
+        Page latency is roughly one round-trip instead of one per symbol.
+        Returns (data, errors) keyed by symbol; failures and timeouts are
+        reported in `errors` without affecting the other symbols.
+        """
+        return StockDataFetcher._collect(
+            StockDataFetcher.iter_many(
+                symbols, period=period, start_date=start_date, end_date=end_date,
+                interval=interval, max_workers=max_workers, timeout=timeout
+            ),
+            symbols
+        )
+
+    @staticmethod
+    @Instrumentation.timed('fetcher.fetch_panel')
+    def fetch_panel(symbols, period='1y', start_date=None, end_date=None, interval='1d',
+                    max_workers=None, timeout=30, how='outer'):
+        """Like fetch_many, but returns the histories aligned into a PricePanel"""
+        data, errors = StockDataFetcher.fetch_many(
+            symbols, period=period, start_date=start_date, end_date=end_date,
+            interval=interval, max_workers=max_workers, timeout=timeout
+        )
+        return PricePanel.from_frames(data, interval=interval, how=how), errors
+
+    @staticmethod
+    @Instrumentation.timed('fetcher.fetch_info_many')
+    def fetch_info_many(symbols, max_workers=None, timeout=30):
+        """Fetch stock info for several symbols concurrently, returning (info, errors)"""
+        return StockDataFetcher._collect(
+            StockDataFetcher.iter_info_many(symbols, max_workers=max_workers, timeout=timeout),
+            symbols
+        )
+
+    @staticmethod
+    @Instrumentation.timed('fetcher.fetch_latest')
+    def fetch_latest(symbols, interval='1m', period='1d'):
+        """
+        Recent bars for several (already resolved) symbols in one batched
+        provider call, bypassing the history cache; used by the live
+        watchlist on every poll. Intraday bars are appended to the bar
+        store. Returns {symbol: history}, empty frames for symbols with no data.
+        """
+        provider = StockDataFetcher.provider
+        symbols = list(symbols)
+        frames = StockDataFetcher._upstream(
+            'history_many',
+            lambda: provider.history_many(symbols, period=period, interval=interval),
+            weight=1 if provider.batch_history else len(symbols)
+        )
+        if interval in HistoryCache.INTRADAY_INTERVALS and StockDataFetcher.bar_store is not None:
+            for symbol, df in frames.items():
+                StockDataFetcher.bar_store.append(symbol, interval, df)
+        return frames
+
+    @staticmethod
+    @Instrumentation.timed('fetcher.get_key_metrics')
     def get_key_metrics(symbol):
         try:
             ticker_symbol = StockDataFetcher.get_valid_symbol(symbol)
-            stock = yf.Ticker(ticker_symbol)
-            info = stock.info
+            info = StockDataFetcher._fetch_info(ticker_symbol)
 
-            # If NSE fails, try BSE
+            # If NSE fails, try BSE (an upstream failure raises instead, so a struggling
+            # upstream is not hit twice)
             if (not info or len(info) == 0) and ticker_symbol.endswith('.NS'):
-                bse_symbol = symbol.replace('.NS', '.BO')
-                stock = yf.Ticker(bse_symbol)
-                info = stock.info
+                info = StockDataFetcher._fetch_info(f"{ticker_symbol[:-3]}.BO")
 
             if not info or len(info) == 0:
                 raise Exception(f"No metrics data available for {symbol}")
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+
+class Downsampler:
+    """
+    Point-budget reduction of chart series before they are handed to Plotly.
+
+    Lines use LTTB (largest-triangle-three-buckets) or min/max per bucket,
+    candlesticks are merged into coarser OHLC bars, and volume is summed per
+    bucket. Inputs at or under the budget are returned unchanged.
+    """
+
+    @staticmethod
+    def _bucket_edges(length, buckets):
+        return np.linspace(0, length, buckets + 1).astype(np.int64)
+
+    @staticmethod
+    def lttb_indices(y, threshold):
+        """Row positions selected by LTTB on y (x taken as the row position)"""
+        y = np.asarray(y, dtype=np.float64)
+        n = len(y)
+        if threshold >= n or threshold < 3:
+            return np.arange(n)
+
+        x = np.arange(n, dtype=np.float64)
+        # Missing values would poison the triangle areas; treat them as flat
+        y = pd.Series(y).ffill().bfill().to_numpy()
+        edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+        selected = np.empty(threshold, dtype=np.int64)
+        selected[0] = 0
+        selected[-1] = n - 1
+        a = 0
+        for i in range(threshold - 2):
+            start, stop = edges[i], edges[i + 1]
+            next_start, next_stop = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+            if next_stop <= next_start:
+                next_stop = next_start + 1
+            avg_x = x[next_start:next_stop].mean()
+            avg_y = y[next_start:next_stop].mean()
+            areas = np.abs((x[a] - avg_x) * (y[start:stop] - y[a])
+                           - (x[a] - x[start:stop]) * (avg_y - y[a]))
+            a = start + int(areas.argmax())
+            selected[i + 1] = a
+        return selected
+
+    @staticmethod
+    def minmax_indices(y, threshold):
+        """Row positions of the min and max of y in each of threshold/2 buckets"""
+        y = np.asarray(y, dtype=np.float64)
+        n = len(y)
+        if threshold >= n or threshold < 2:
+            return np.arange(n)
+        buckets = threshold // 2
+        edges = Downsampler._bucket_edges(n, buckets)
+        filled = np.where(np.isnan(y), np.nanmean(y) if np.isfinite(y).any() else 0.0, y)
+        picks = []
+        for start, stop in zip(edges[:-1], edges[1:]):
+            if stop <= start:
+                continue
+            segment = filled[start:stop]
+            picks.append(start + int(segment.argmin()))
+            picks.append(start + int(segment.argmax()))
+        return np.unique(picks)
+
+    @staticmethod
+    def line(series, max_points, method='lttb'):
+        """Downsample a Series for a line trace, keeping its index labels"""
+        if max_points is None or len(series) <= max_points:
+            return series
+        if method == 'minmax':
+            positions = Downsampler.minmax_indices(series.to_numpy(), max_points)
+        else:
+            positions = Downsampler.lttb_indices(series.to_numpy(), max_points)
+        return series.iloc[positions]
+
+    @staticmethod
+    def ohlc(df, max_points):
+        """
+        Merge consecutive bars so at most max_points remain.
+
+        Each bucket keeps the first Open, highest High, lowest Low and last
+        Close, sums Volume, and is labelled with its first timestamp.
+        """
+        if max_points is None or len(df) <= max_points:
+            return df
+        edges = Downsampler._bucket_edges(len(df), max_points)
+        starts = edges[:-1][edges[1:] > edges[:-1]]
+        stops = np.append(starts[1:], len(df))
+
+        result = {}
+        if 'Open' in df.columns:
+            result['Open'] = df['Open'].to_numpy()[starts]
+        if 'High' in df.columns:
+            result['High'] = np.fmax.reduceat(df['High'].to_numpy(dtype=np.float64), starts)
+        if 'Low' in df.columns:
+            result['Low'] = np.fmin.reduceat(df['Low'].to_numpy(dtype=np.float64), starts)
+        if 'Close' in df.columns:
+            result['Close'] = df['Close'].to_numpy()[stops - 1]
+        if 'Volume' in df.columns:
+            volume = np.nan_to_num(df['Volume'].to_numpy(dtype=np.float64))
+            result['Volume'] = np.add.reduceat(volume, starts)
+        # Any other numeric column (e.g. moving averages) takes the bucket's last value
+        for column in df.columns:
+            if column not in result:
+                result[column] = df[column].to_numpy()[stops - 1]
+        return pd.DataFrame(result, index=df.index[starts])[list(df.columns)]
@@ -0,0 +1,152 @@
+import io
+import os
+
+import numpy as np
+
+from utils.instrumentation import Instrumentation
+from utils.metrics_calculator import MetricsCalculator
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+HISTORY_COLUMNS = ['symbol', 'timestamp'] + PRICE_COLUMNS
+INDICATOR_COLUMNS = HISTORY_COLUMNS + MetricsCalculator.INDICATORS
+
+
+class ExportWriter:
+    """
+    Incremental CSV / Parquet / Arrow IPC writer with a fixed column schema.
+
+    `target` is a path or a binary file object. Each write() appends one
+    chunk (a block of CSV lines, a Parquet row group or an Arrow record
+    batch), so memory use is one chunk however large the export grows.
+    """
+
+    # format: (file extension, MIME type)
+    FORMATS = {
+        'csv': ('csv', 'text/csv'),
+        'parquet': ('parquet', 'application/vnd.apache.parquet'),
+        'arrow': ('arrow', 'application/vnd.apache.arrow.file')
+    }
+
+    def __init__(self, target, columns, fmt='csv'):
+        if fmt not in ExportWriter.FORMATS:
+            raise Exception(f"Unknown export format: {fmt}")
+        self.columns = list(columns)
+        self.fmt = fmt
+        self.rows = 0
+        self._writer = None
+        self._schema = None
+        self.path = target if isinstance(target, str) else None
+        if self.path is not None:
+            self._sink = open(self.path, 'wb')
+        else:
+            self._sink = target
+
+    def write(self, df):
+        if df.empty:
+            return
+        df = df.reindex(columns=self.columns)
+        if self.fmt == 'csv':
+            self._sink.write(df.to_csv(index=False, header=self.rows == 0).encode())
+        else:
+            import pyarrow as pa
+
+            if self._writer is None:
+                self._schema = pa.Table.from_pandas(df, preserve_index=False).schema
+                if self.fmt == 'parquet':
+                    import pyarrow.parquet as pq
+                    self._writer = pq.ParquetWriter(self._sink, self._schema)
+                else:
+                    self._writer = pa.ipc.new_file(self._sink, self._schema)
+            self._writer.write_table(pa.Table.from_pandas(df, schema=self._schema, preserve_index=False))
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self.path is not None and not self._sink.closed:
+            self._sink.close()
+
+    @property
+    def bytes_written(self):
+        if self.path is not None:
+            return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return self._sink.tell()
+
+
+class DataExporter:
+    """
+    Builds downloadable exports from price histories and tables.
+
+    Sources are turned into a stream of DataFrame chunks and written with
+    ExportWriter into an in-memory buffer. The dashboard passes build() to
+    st.download_button as a callable, so nothing is serialized until the
+    user actually clicks (Streamlit needs a BytesIO or bytes back, and
+    holds the whole file in memory to serve it either way).
+    """
+
+    CHUNK_ROWS = 50_000
+
+    @staticmethod
+    def long_rows(symbol, df, indicators=False):
+        """
+        Long-format rows (symbol, UTC timestamp, OHLCV[, indicators]) for one history frame.
+
+        Indicator columns already on `df` (e.g. from calculate_indicators_many)
+        are used as they are; otherwise they are computed here.
+        """
+        if indicators and not set(MetricsCalculator.INDICATORS) <= set(df.columns):
+            df = MetricsCalculator.calculate_technical_indicators(df.copy())
+        columns = PRICE_COLUMNS + (MetricsCalculator.INDICATORS if indicators else [])
+        rows = df.reindex(columns=columns).astype(np.float64)
+        index = df.index.tz_convert('UTC') if df.index.tz is not None else df.index
+        rows.insert(0, 'timestamp', index)
+        rows.insert(0, 'symbol', symbol)
+        return rows.reset_index(drop=True)
+
+    @staticmethod
+    def history_chunks(histories, indicators=False, chunk_rows=CHUNK_ROWS):
+        """
+        Yield long-format chunks of at most `chunk_rows` rows for {symbol: history}.
+
+        Without indicators each chunk is converted straight from a slice of the
+        source frame; indicators need the whole series, so they are computed
+        once per symbol and the result is then sliced.
+        """
+        for symbol, df in histories.items():
+            if df is None or df.empty:
+                continue
+            if indicators:
+                rows = DataExporter.long_rows(symbol, df, indicators=True)
+                for start in range(0, len(rows), chunk_rows):
+                    yield rows.iloc[start:start + chunk_rows]
+            else:
+                for start in range(0, len(df), chunk_rows):
+                    yield DataExporter.long_rows(symbol, df.iloc[start:start + chunk_rows])
+
+    @staticmethod
+    def table_chunks(df, index_label='index'):
+        """A small table (e.g. the metrics comparison) as a single chunk with its index as a column"""
+        yield df.rename_axis(index_label).reset_index()
+
+    @staticmethod
+    @Instrumentation.timed('export.build')
+    def build(chunks, columns, fmt='csv'):
+        """Write `chunks` in `fmt` and return the result as a rewound io.BytesIO"""
+        sink = io.BytesIO()
+        writer = ExportWriter(sink, columns, fmt)
+        try:
+            for chunk in chunks:
+                writer.write(chunk)
+        finally:
+            writer.close()
+        sink.seek(0)
+        return sink
+
+    @staticmethod
+    def file_name(stem, fmt):
+        return f"{stem}.{ExportWriter.FORMATS[fmt][0]}"
+
+    @staticmethod
+    def mime_type(fmt):
+        return ExportWriter.FORMATS[fmt][1]
@@ -0,0 +1,288 @@
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from utils.instrumentation import Instrumentation
+from utils.request_governor import UpstreamUnavailable
+
+
+class HistoryCache:
+    """
+    On-disk OHLCV store keyed by symbol and interval.
+
+    Each entry is a Parquet file holding the bars plus a small JSON manifest
+    recording the date range that has already been requested upstream. A
+    lookup only downloads the head/tail ranges that are not covered yet and
+    merges them into the stored frame.
+    """
+
+    PERIOD_OFFSETS = {
+        '1d': pd.DateOffset(days=1),
+        '5d': pd.DateOffset(days=5),
+        '1mo': pd.DateOffset(months=1),
+        '3mo': pd.DateOffset(months=3),
+        '6mo': pd.DateOffset(months=6),
+        '1y': pd.DateOffset(years=1),
+        '2y': pd.DateOffset(years=2),
+        '5y': pd.DateOffset(years=5),
+        '10y': pd.DateOffset(years=10),
+    }
+
+    INTRADAY_INTERVALS = ['1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h']
+
+    def __init__(self, root=None, ttl=None, intraday_ttl=60):
+        self.root = root or os.path.join(os.environ.get('STOCK_CACHE_DIR', '.cache'), 'history')
+        # Seconds before the tail (latest bar) is considered stale and re-fetched
+        self.ttl = 15 * 60 if ttl is None else ttl
+        self.intraday_ttl = intraday_ttl
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _key(self, symbol, interval):
+        safe_symbol = re.sub(r'[^A-Za-z0-9.\-]', '_', symbol)
+        return f"{safe_symbol}__{interval}"
+
+    def _paths(self, symbol, interval):
+        key = self._key(symbol, interval)
+        return (os.path.join(self.root, f"{key}.parquet"),
+                os.path.join(self.root, f"{key}.json"))
+
+    def _lock(self, symbol, interval):
+        key = self._key(symbol, interval)
+        with self._locks_guard:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    @staticmethod
+    def _now():
+        return pd.Timestamp(datetime.now(timezone.utc))
+
+    @staticmethod
+    def _to_ts(value, tz):
+        """Convert a date string/datetime to a timestamp in the data's timezone"""
+        if value is None:
+            return None
+        ts = pd.Timestamp(value)
+        if ts.tzinfo is None:
+            return ts.tz_localize(tz) if tz is not None else ts.tz_localize('UTC')
+        return ts.tz_convert(tz) if tz is not None else ts
+
+    def load(self, symbol, interval):
+        """Return (frame, manifest) for a cached entry, or (None, None)"""
+        data_path, manifest_path = self._paths(symbol, interval)
+        if not (os.path.exists(data_path) and os.path.exists(manifest_path)):
+            return None, None
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            return pd.read_parquet(data_path), manifest
+        except Exception as e:
+            logging.warning(f"Discarding unreadable history cache for {symbol} ({interval}): {str(e)}")
+            return None, None
+
+    def covers(self, symbol, interval, period='1y', start_date=None, end_date=None):
+        """
+        True if the stored range for symbol/interval already reaches back to the
+        start of the requested window, so get() would at most refresh the tail.
+        Only the small JSON manifest is read.
+        """
+        _, manifest_path = self._paths(symbol, interval)
+        if not os.path.exists(manifest_path):
+            return False
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        except Exception:
+            return False
+        if manifest['start'] is None:
+            return True
+        covered_start = pd.Timestamp(manifest['start'])
+        if start_date and end_date:
+            return covered_start <= self._to_ts(start_date, covered_start.tz)
+        if period == 'max' or (period != 'ytd' and period not in self.PERIOD_OFFSETS):
+            return False
+        return covered_start <= self._period_start(period, self._now())
+
+    def save(self, symbol, interval, df, manifest):
+        data_path, manifest_path = self._paths(symbol, interval)
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            tmp_path = f"{data_path}.tmp"
+            df.to_parquet(tmp_path)
+            os.replace(tmp_path, data_path)
+            self._write_json(manifest_path, manifest)
+        except Exception as e:
+            logging.warning(f"Could not write history cache for {symbol} ({interval}): {str(e)}")
+
+    @staticmethod
+    def _write_json(path, data):
+        """Replace `path` in one step, so readers never see a half-written file"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _is_fresh(self, covered_end, interval, now):
+        ttl = self.intraday_ttl if interval in self.INTRADAY_INTERVALS else self.ttl
+        return (now - covered_end).total_seconds() < ttl
+
+    def get(self, symbol, interval, fetch, period='1y', start_date=None, end_date=None):
+        """
+        Return history for symbol/interval, downloading only uncovered ranges.
+
+        `fetch(start=None, end=None, period=None)` performs the upstream call
+        and must return an OHLCV DataFrame indexed by timestamp.
+        """
+        custom_range = bool(start_date and end_date)
+        if not custom_range and period != 'max' and period != 'ytd' and period not in self.PERIOD_OFFSETS:
+            return fetch(period=period)
+
+        with self._lock(symbol, interval):
+            now = self._now()
+            df, manifest = self.load(symbol, interval)
+
+            if df is None or df.empty:
+                Instrumentation.count('history_cache.miss')
+                if custom_range:
+                    df = fetch(start=start_date, end=end_date)
+                else:
+                    df = fetch(period=period)
+                if df.empty:
+                    return df
+                tz = df.index.tz
+                if custom_range:
+                    covered_start = self._to_ts(start_date, tz)
+                    # A range ending in the future is only covered up to now
+                    covered_end = min(self._to_ts(end_date, tz), now)
+                else:
+                    covered_start = None if period == 'max' else self._period_start(period, now)
+                    covered_end = now
+                manifest = self._manifest(covered_start, covered_end, now)
+                self.save(symbol, interval, df, manifest)
+                return self.slice_history(df, period, start_date, end_date)
+
+            tz = df.index.tz
+            covered_start = self._to_ts(manifest['start'], tz) if manifest['start'] else None
+            covered_end = self._to_ts(manifest['end'], tz)
+
+            if custom_range:
+                req_start = self._to_ts(start_date, tz)
+                req_end = self._to_ts(end_date, tz)
+            else:
+                req_start = None if period == 'max' else self._period_start(period, now)
+                req_end = None
+
+            parts = [df]
+            changed = False
+            fetched_at = pd.Timestamp(manifest['fetched_at'])
+
+            try:
+                # Head gap: requested range starts before anything we have asked for
+                if covered_start is not None and (req_start is None or req_start < covered_start):
+                    if req_start is None:
+                        head = fetch(period='max')
+                        head = head[head.index < df.index[0]] if not head.empty else head
+                    else:
+                        head = fetch(start=req_start, end=covered_start)
+                    parts.insert(0, head)
+                    covered_start = req_start
+                    changed = True
+
+                # Tail gap: re-fetch from the last stored bar so a partial bar is replaced.
+                # A request reaching now or later is only as complete as the TTL allows.
+                needs_tail = req_end is None or req_end > covered_end
+                open_ended = req_end is None or req_end >= now
+                if needs_tail and not (open_ended and self._is_fresh(covered_end, interval, now)):
+                    tail_start = df.index[-1].normalize()
+                    tail = fetch(start=tail_start, end=req_end)
+                    parts.append(tail)
+                    covered_end = now if req_end is None else max(covered_end, min(req_end, now))
+                    fetched_at = now
+                    changed = True
+            except UpstreamUnavailable as e:
+                # Serve what we have (plus any gap fetched before the failure) rather than
+                # failing the page while upstream is down; the manifest keeps the gap open
+                logging.warning(f"Serving stale {interval} history for {symbol}: {str(e)}")
+                Instrumentation.count('history_cache.stale')
+
+            Instrumentation.count('history_cache.partial' if changed else 'history_cache.hit')
+            if changed:
+                parts = [p for p in parts if p is not None and not p.empty]
+                df = pd.concat(parts)
+                df = df[~df.index.duplicated(keep='last')].sort_index()
+                manifest = self._manifest(covered_start, covered_end, fetched_at)
+                self.save(symbol, interval, df, manifest)
+
+            return self.slice_history(df, period, start_date, end_date)
+
+    @staticmethod
+    def _manifest(covered_start, covered_end, fetched_at):
+        return {
+            'start': covered_start.isoformat() if covered_start is not None else None,
+            'end': covered_end.isoformat(),
+            'fetched_at': fetched_at.isoformat()
+        }
+
+    @classmethod
+    def _period_start(cls, period, now):
+        if period == 'ytd':
+            return now.normalize().replace(month=1, day=1)
+        return now - cls.PERIOD_OFFSETS[period]
+
+    @classmethod
+    def slice_history(cls, df, period, start_date=None, end_date=None):
+        """Cut a stored frame down to a yfinance-style period or [start, end) range"""
+        if df.empty:
+            return df
+        tz = df.index.tz
+        if start_date and end_date:
+            start = cls._to_ts(start_date, tz)
+            end = cls._to_ts(end_date, tz)
+            return df[(df.index >= start) & (df.index < end)]
+        if period == 'max':
+            return df
+        # Anchor on the latest bar so short periods behave like yfinance on
+        # weekends/holidays (e.g. '1d' still returns the last session)
+        anchor = df.index[-1]
+        if period == 'ytd':
+            return df[df.index >= anchor.normalize().replace(month=1, day=1)]
+        return df[df.index > anchor - cls.PERIOD_OFFSETS[period]]
+
+    def save_state(self, symbol, interval, name, state):
+        """Store a JSON-serializable state dict (e.g. streaming indicators) next to the bars"""
+        path = os.path.join(self.root, f"{self._key(symbol, interval)}.{name}.json")
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            self._write_json(path, state)
+        except Exception as e:
+            logging.warning(f"Could not write {name} state for {symbol} ({interval}): {str(e)}")
+
+    def load_state(self, symbol, interval, name):
+        path = os.path.join(self.root, f"{self._key(symbol, interval)}.{name}.json")
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except Exception as e:
+            logging.warning(f"Discarding unreadable {name} state for {symbol} ({interval}): {str(e)}")
+            return None
+
+    def clear(self, symbol=None, interval=None):
+        """Remove cached entries, optionally restricted to one symbol/interval"""
+        if not os.path.isdir(self.root):
+            return
+        if symbol is not None and interval is not None:
+            prefix = f"{self._key(symbol, interval)}."
+        else:
+            prefix = self._key(symbol, '') if symbol is not None else ''
+        targets = [os.path.join(self.root, name) for name in os.listdir(self.root)
+                   if name.startswith(prefix)]
+        for path in targets:
+            os.remove(path)
@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from utils.instrumentation import Instrumentation
+from utils.request_governor import UpstreamUnavailable
+
+
+class InfoCache:
+    """
+    Process-wide, thread-safe TTL + LRU cache for ticker `.info` payloads.
+
+    Concurrent requests for a key that is already being fetched wait on the
+    in-flight fetch instead of issuing their own (request coalescing).
+    Expired entries stay until evicted and are served (stale) if the refresh
+    fails with UpstreamUnavailable.
+    """
+
+    def __init__(self, ttl=300, maxsize=512):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+        self.stale = 0
+
+    def get(self, key, loader):
+        """Return the cached value for key, calling loader() at most once per miss"""
+        stale = None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    Instrumentation.count('info_cache.hit')
+                    return value
+                stale = value
+
+            waiter = self._inflight.get(key)
+            if waiter is not None:
+                self.coalesced += 1
+            else:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+
+        if waiter is not None:
+            Instrumentation.count('info_cache.coalesced')
+            return waiter.result()
+        Instrumentation.count('info_cache.miss')
+
+        try:
+            value = loader()
+        except UpstreamUnavailable as e:
+            with self._lock:
+                del self._inflight[key]
+                if stale is not None:
+                    self.stale += 1
+            if stale is None:
+                future.set_exception(e)
+                raise
+            Instrumentation.count('info_cache.stale')
+            future.set_result(stale)
+            return stale
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            # Empty payloads are not worth keeping; let the next call retry
+            if value:
+                self._data[key] = (value, time.monotonic() + self.ttl)
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+            del self._inflight[key]
+        future.set_result(value)
+        return value
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'coalesced': self.coalesced,
+                'stale': self.stale
+            }
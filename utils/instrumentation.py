@@ -0,0 +1,221 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+_current_run = contextvars.ContextVar('stock_analysis_run', default=None)
+_logger = logging.getLogger('stock_analysis.instrumentation')
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ('name', 'record', 'started')
+
+    def __init__(self, name, record):
+        self.name = name
+        self.record = record
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        Instrumentation._record(self.name, time.perf_counter() - self.started, self.record)
+        return False
+
+
+class RunRecord:
+    """Spans and counters collected during one dashboard rerun (or CLI run)"""
+
+    def __init__(self, label='rerun'):
+        self.label = label
+        self.started = time.perf_counter()
+        self.wall = None
+        self.spans = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, name, elapsed):
+        with self._lock:
+            entry = self.spans.get(name)
+            if entry is None:
+                self.spans[name] = [1, elapsed, elapsed]
+            else:
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] = max(entry[2], elapsed)
+
+    def add_count(self, name, n):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def finish(self):
+        self.wall = time.perf_counter() - self.started
+        return self
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'label': self.label,
+                'wall_s': self.wall,
+                'spans': {name: {'calls': calls, 'total_s': total, 'max_s': peak}
+                          for name, (calls, total, peak) in self.spans.items()},
+                'counters': dict(self.counters)
+            }
+
+
+class Instrumentation:
+    """
+    Lightweight spans and counters around the fetch/indicator/chart hot paths.
+
+    Nothing is recorded unless a RunRecord is active in the current context
+    (the dashboard's per-rerun panel) or process-wide collection is enabled
+    (STOCK_INSTRUMENTATION=1). When neither is on, span() returns a shared
+    no-op context manager and timed() calls straight through.
+
+    Process-wide totals can be exported as Prometheus text
+    (STOCK_METRICS_FILE) and each finished run appended as a JSON line
+    (STOCK_METRICS_LOG).
+    """
+
+    enabled = os.environ.get('STOCK_INSTRUMENTATION', '').lower() in ('1', 'true', 'yes')
+    prometheus_path = os.environ.get('STOCK_METRICS_FILE')
+    log_path = os.environ.get('STOCK_METRICS_LOG')
+
+    _totals = {}
+    _counters = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def span(name):
+        """Context manager timing a block under `name`"""
+        record = _current_run.get()
+        if record is None and not Instrumentation.enabled:
+            return _NOOP
+        return _Span(name, record)
+
+    @staticmethod
+    def _record(name, elapsed, record):
+        if record is not None:
+            record.add_span(name, elapsed)
+        if Instrumentation.enabled:
+            with Instrumentation._lock:
+                entry = Instrumentation._totals.setdefault(name, [0, 0.0])
+                entry[0] += 1
+                entry[1] += elapsed
+
+    @staticmethod
+    def timed(name):
+        """Decorator form of span(); a single context lookup when disabled"""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                record = _current_run.get()
+                if record is None and not Instrumentation.enabled:
+                    return func(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    Instrumentation._record(name, time.perf_counter() - started, record)
+            return wrapper
+        return decorate
+
+    @staticmethod
+    def count(name, n=1):
+        """Increment an event counter (network calls, cache hits, ...)"""
+        record = _current_run.get()
+        if record is not None:
+            record.add_count(name, n)
+        if Instrumentation.enabled:
+            with Instrumentation._lock:
+                Instrumentation._counters[name] = Instrumentation._counters.get(name, 0) + n
+
+    @staticmethod
+    def start_run(label='rerun'):
+        """Begin collecting a RunRecord for the current context; returns (record, token)"""
+        record = RunRecord(label)
+        return record, _current_run.set(record)
+
+    @staticmethod
+    def clear_run():
+        """Drop any RunRecord left active by an interrupted run (e.g. st.rerun())"""
+        _current_run.set(None)
+
+    @staticmethod
+    def finish_run(record, token):
+        """Stop collecting, then write the configured exports"""
+        _current_run.reset(token)
+        record.finish()
+        Instrumentation.count(f'runs.{record.label}')
+        if Instrumentation.log_path:
+            Instrumentation.append_log(record, Instrumentation.log_path)
+        if Instrumentation.prometheus_path:
+            Instrumentation.write_prometheus(Instrumentation.prometheus_path)
+        return record
+
+    @staticmethod
+    def submit(pool, func, *args):
+        """pool.submit that carries the caller's active RunRecord into the worker thread"""
+        return pool.submit(contextvars.copy_context().run, func, *args)
+
+    @staticmethod
+    def append_log(record, path):
+        try:
+            with open(path, 'a') as f:
+                f.write(json.dumps({'time': time.time(), **record.to_dict()}) + '\n')
+        except Exception as e:
+            _logger.warning(f"Could not append run metrics to {path}: {str(e)}")
+
+    @staticmethod
+    def prometheus_text():
+        """Process-wide totals in the Prometheus text exposition format"""
+        with Instrumentation._lock:
+            totals = sorted(Instrumentation._totals.items())
+            counters = sorted(Instrumentation._counters.items())
+        lines = [
+            '# HELP stock_analysis_span_seconds_total Time spent in instrumented code paths.',
+            '# TYPE stock_analysis_span_seconds_total counter'
+        ]
+        lines += [f'stock_analysis_span_seconds_total{{span="{name}"}} {total:.6f}' for name, (_, total) in totals]
+        lines += [
+            '# HELP stock_analysis_span_calls_total Calls of instrumented code paths.',
+            '# TYPE stock_analysis_span_calls_total counter'
+        ]
+        lines += [f'stock_analysis_span_calls_total{{span="{name}"}} {calls}' for name, (calls, _) in totals]
+        lines += [
+            '# HELP stock_analysis_events_total Network calls, cache hits and other events.',
+            '# TYPE stock_analysis_events_total counter'
+        ]
+        lines += [f'stock_analysis_events_total{{event="{name}"}} {value}' for name, value in counters]
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def write_prometheus(path):
+        """Atomically replace `path` with the current totals (node_exporter textfile style)"""
+        try:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w') as f:
+                f.write(Instrumentation.prometheus_text())
+            os.replace(tmp_path, path)
+        except Exception as e:
+            _logger.warning(f"Could not write metrics file {path}: {str(e)}")
+
+    @staticmethod
+    def reset():
+        with Instrumentation._lock:
+            Instrumentation._totals.clear()
+            Instrumentation._counters.clear()
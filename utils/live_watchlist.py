@@ -0,0 +1,243 @@
+import logging
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from utils.data_fetcher import StockDataFetcher
+from utils.instrumentation import Instrumentation
+from utils.streaming_indicators import IndicatorState
+
+
+class LiveWatchlist:
+    """
+    Background poller that keeps recent bars for a set of symbols current.
+
+    Every `poll_seconds` a worker thread makes one batched provider request
+    (StockDataFetcher.fetch_latest) for all symbols and appends only the
+    bars newer than the last one held; a bar with the same timestamp as the
+    last held bar replaces it (a partial bar being completed). Frames keep
+    at most `max_bars` rows. Readers keep the cursors updates_since()
+    returns and pass them back, so a chart only appends what is new.
+
+    Each symbol's indicators are kept current by an IndicatorState fed
+    only the merged bars. The states are saved in the history cache when
+    the worker stops and picked up again by the next watchlist when they
+    end on a bar it received.
+
+    The worker stops itself once nobody has read updates for
+    `idle_timeout` seconds; start() is cheap to call on every render.
+    set_poll_seconds() changes the interval of a running worker.
+    """
+
+    # Ticks kept for the latency statistics
+    HISTORY_TICKS = 500
+
+    def __init__(self, symbols, interval='1m', poll_seconds=5.0, lookback='1d', max_bars=2000,
+                 idle_timeout=120.0):
+        self.symbols = list(symbols)
+        self.interval = interval
+        self.poll_seconds = poll_seconds
+        self.lookback = lookback
+        self.max_bars = max_bars
+        self.idle_timeout = idle_timeout
+        self.frames = {}
+        self.revisions = {}
+        self.indicator_states = {}
+        self.ticks = deque(maxlen=self.HISTORY_TICKS)
+        self.tick_count = 0
+        self.new_bars = 0
+        self.errors = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self._last_read = time.monotonic()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start (or restart after going idle) the polling thread"""
+        self._last_read = time.monotonic()
+        with self._lock:
+            if self.running:
+                return
+            self._stop.clear()
+            self._wake.clear()
+            self._thread = threading.Thread(target=self._run, name='live-watchlist', daemon=True)
+            self._thread.start()
+
+    def set_poll_seconds(self, poll_seconds):
+        """Poll every `poll_seconds` from the next wait on; a running worker is woken to pick it up"""
+        if poll_seconds != self.poll_seconds:
+            self.poll_seconds = poll_seconds
+            self._wake.set()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.poll_once()
+            if time.monotonic() - self._last_read > self.idle_timeout:
+                logging.info(f"Live watchlist for {len(self.symbols)} symbols idle; stopping")
+                break
+            # Sleep until the next poll is due, re-measured if the interval changes meanwhile
+            while not self._stop.is_set():
+                remaining = self.poll_seconds - (time.monotonic() - started)
+                if remaining <= 0 or not self._wake.wait(remaining):
+                    break
+                self._wake.clear()
+        self.save_indicator_states()
+
+    def _indicator_state(self, symbol, df):
+        """A saved state that ends on a bar of `df`, else one built from `df`"""
+        saved = StockDataFetcher.history_cache.load_state(symbol, self.interval, 'indicators')
+        if saved is not None:
+            try:
+                state = IndicatorState.from_dict(saved)
+                if state.last_timestamp in df.index:
+                    state.update_frame(df)
+                    return state
+            except Exception as e:
+                logging.warning(f"Discarding saved indicators for {symbol} ({self.interval}): {str(e)}")
+        return IndicatorState.from_history(df)
+
+    def save_indicator_states(self):
+        with self._lock:
+            states = {symbol: state.to_dict() for symbol, state in self.indicator_states.items()}
+        for symbol, state in states.items():
+            StockDataFetcher.history_cache.save_state(symbol, self.interval, 'indicators', state)
+
+    def _merge(self, symbol, df):
+        """Append bars newer than the last held one; returns the number of new bars"""
+        held = self.frames.get(symbol)
+        if held is None or held.empty:
+            self.frames[symbol] = df.iloc[-self.max_bars:]
+            self.revisions[symbol] = self.revisions.get(symbol, 0) + 1
+            self.indicator_states[symbol] = self._indicator_state(symbol, df)
+            return len(self.frames[symbol])
+        last = held.index[-1]
+        fresh = df[df.index >= last].reindex(columns=held.columns)
+        if fresh.empty or (len(fresh) == 1 and fresh.iloc[0].equals(held.iloc[-1])):
+            return 0
+        if fresh.index[0] == last:
+            held = held.iloc[:-1]
+        self.frames[symbol] = pd.concat([held, fresh]).iloc[-self.max_bars:]
+        self.revisions[symbol] += 1
+        self.indicator_states[symbol].update_frame(fresh)
+        return int((fresh.index > last).sum())
+
+    def poll_once(self):
+        """Run one tick: a single batched request, then append the new bars. Returns the tick record."""
+        started = time.perf_counter()
+        tick = {'tick': self.tick_count + 1, 'time': time.time(), 'new_bars': 0, 'error': None}
+        try:
+            with Instrumentation.span('live.tick'):
+                latest = StockDataFetcher.fetch_latest(self.symbols, self.interval, self.lookback)
+                received = time.monotonic()
+                appended = {}
+                with self._lock:
+                    for symbol, df in latest.items():
+                        if df is not None and not df.empty:
+                            count = self._merge(symbol, df)
+                            if count:
+                                appended[symbol] = self.frames[symbol].index[-count:]
+            tick['new_bars'] = sum(len(index) for index in appended.values())
+            tick['bar_latency_s'] = self._bar_latency(appended, received)
+            Instrumentation.count('live.new_bars', tick['new_bars'])
+        except Exception as e:
+            tick['error'] = str(e)
+            logging.warning(f"Live watchlist poll failed: {str(e)}")
+        tick['duration_s'] = time.perf_counter() - started
+
+        with self._lock:
+            self.tick_count += 1
+            self.new_bars += tick['new_bars']
+            if tick['error'] is not None:
+                self.errors += 1
+                self.last_error = tick['error']
+            self.ticks.append(tick)
+        return tick
+
+    def _bar_latency(self, appended, received):
+        """
+        Time from the release of the oldest new bar to its arrival here, for
+        providers that report release times (LiveReplayProvider); the first
+        tick's backfill is skipped.
+        """
+        emitted_at = getattr(StockDataFetcher.provider, 'emitted_at', None)
+        if emitted_at is None or self.tick_count == 0 or not appended:
+            return None
+        return max(received - emitted_at(symbol, self.interval, index[0])
+                   for symbol, index in appended.items())
+
+    def updates_since(self, cursors):
+        """
+        Bars the caller doesn't have yet, and its new cursors.
+
+        `cursors` maps symbol -> (last bar timestamp, revision) from the
+        previous call ({} the first time). Returns (updates, cursors) where
+        updates maps symbol -> bars at or after the caller's last timestamp
+        (everything held for a new symbol). The caller's last bar is sent
+        again since it may have been revised; drop it before appending.
+        """
+        self._last_read = time.monotonic()
+        updates = {}
+        cursors = dict(cursors)
+        with self._lock:
+            for symbol in self.symbols:
+                df = self.frames.get(symbol)
+                revision = self.revisions.get(symbol)
+                if df is None or df.empty:
+                    continue
+                cursor = cursors.get(symbol)
+                if cursor is None:
+                    updates[symbol] = df
+                elif cursor[1] != revision:
+                    updates[symbol] = df[df.index >= cursor[0]]
+                else:
+                    continue
+                cursors[symbol] = (df.index[-1], revision)
+        return updates, cursors
+
+    def latest(self):
+        """{symbol: last held bar} for the quote table"""
+        with self._lock:
+            return {symbol: df.iloc[-1] for symbol, df in self.frames.items() if not df.empty}
+
+    def indicators(self):
+        """{symbol: calculate_technical_indicators values for the last held bar}"""
+        with self._lock:
+            return {symbol: state.current() for symbol, state in self.indicator_states.items()}
+
+    def stats(self):
+        """Tick counts and p50/p95 tick duration and bar latency over the recent ticks"""
+        with self._lock:
+            ticks = list(self.ticks)
+            stats = {'ticks': self.tick_count, 'new_bars': self.new_bars, 'errors': self.errors,
+                     'last_error': self.last_error, 'running': self.running}
+        durations = [tick['duration_s'] for tick in ticks]
+        latencies = [tick['bar_latency_s'] for tick in ticks if tick.get('bar_latency_s') is not None]
+        for name, values in (('tick', durations), ('bar_latency', latencies)):
+            stats[f'{name}_p50_s'] = float(np.percentile(values, 50)) if values else None
+            stats[f'{name}_p95_s'] = float(np.percentile(values, 95)) if values else None
+        stats['last_tick'] = ticks[-1] if ticks else None
+        return stats
@@ -1,8 +1,10 @@
 import pandas as pd
 import numpy as np
+from utils.instrumentation import Instrumentation
 
 class MetricsCalculator:
     @staticmethod
+    @Instrumentation.timed('indicators.calculate_technical_indicators')
     def calculate_technical_indicators(df):
         # Calculate RSI
         delta = df['Close'].diff()
@@ -25,6 +27,216 @@ class MetricsCalculator:
 
         return df
 
+    # Output columns of calculate_technical_indicators, in order
+    INDICATORS = ['RSI', 'MACD', 'Signal_Line', 'MA20', '20dSTD', 'Upper_Band', 'Lower_Band']
+
+    @staticmethod
+    def _window_sum(filled, window):
+        """Trailing-window sum of a NaN-free array down axis 0 (leading rows are partial)"""
+        csum = np.cumsum(filled, axis=0)
+        out = csum.copy()
+        np.subtract(csum[window:], csum[:-window], out=out[window:])
+        return out
+
+    @staticmethod
+    def _complete_windows(missing, window):
+        """Boolean mask of rows whose trailing window contains no missing values"""
+        steps = np.arange(len(missing))[:, None]
+        last_missing = np.maximum.accumulate(np.where(missing, steps, -1), axis=0)
+        return last_missing <= steps - window
+
+    @staticmethod
+    def _ewm(values, span, block=64):
+        """
+        ewm(span=span, adjust=False).mean() down axis 0, matching pandas.
+
+        Gap-free columns (leading NaNs allowed) are filtered in blocks with a
+        single matrix product per block; columns with interior gaps go
+        through _ewm_with_gaps.
+        """
+        alpha = 2.0 / (span + 1.0)
+        decay = 1.0 - alpha
+        rows, cols = values.shape
+        out = np.full(values.shape, np.nan)
+        if rows == 0:
+            return out
+
+        valid = ~np.isnan(values)
+        first = np.where(valid.any(axis=0), valid.argmax(axis=0), rows)
+        seen = np.arange(rows)[:, None] >= first[None, :]
+        gappy = (seen & ~valid).any(axis=0)
+
+        dense = np.flatnonzero(~gappy & (first < rows))
+        if len(dense):
+            x = values[:, dense]
+            # Back-fill leading NaNs with the first observation: the filter then
+            # sits at that value until the series starts, as pandas' seed does
+            x = np.where(seen[:, dense], x, values[first[dense], dense][None, :])
+            steps = np.arange(block)
+            lag = steps[:, None] - steps[None, :]
+            weights = np.where(lag >= 0, alpha * decay ** np.maximum(lag, 0), 0.0)
+            carry = decay ** (steps + 1)
+            state = x[0]
+            y = np.empty_like(x)
+            y[0] = state
+            for start in range(1, rows, block):
+                chunk = x[start:start + block]
+                n = len(chunk)
+                state_part = carry[:n, None] * state[None, :]
+                y[start:start + n] = weights[:n, :n] @ chunk + state_part
+                state = y[start + n - 1]
+            out[:, dense] = np.where(seen[:, dense], y, np.nan)
+
+        sparse = np.flatnonzero(gappy)
+        if len(sparse):
+            out[:, sparse] = MetricsCalculator._ewm_with_gaps(values[:, sparse], alpha)
+        return out
+
+    @staticmethod
+    def _ewm_with_gaps(values, alpha):
+        """
+        pandas' adjust=False recurrence for columns with missing rows.
+
+        After a gap of k rows the previous value is weighted by
+        (1 - alpha) ** (k + 1), so the recurrence y_t = c_t * y_(t-1) + b_t
+        has per-row coefficients. It is solved in small blocks using
+        log-space cumulative products, which keeps every weight <= 1.
+        """
+        decay = 1.0 - alpha
+        rows, cols = values.shape
+        valid = ~np.isnan(values)
+        steps = np.arange(rows)[:, None]
+        last = np.maximum.accumulate(np.where(valid, steps, -1), axis=0)
+        prev = np.vstack([np.full((1, cols), -1), last[:-1]])
+
+        old_wt = decay ** (steps - prev).astype(np.float64)
+        follows = valid & (prev >= 0)
+        c = np.where(follows, old_wt / (old_wt + alpha), 1.0)
+        b = np.where(follows, alpha / (old_wt + alpha) * np.where(valid, values, 0.0), 0.0)
+        # First observation seeds the series (y was 0 before it)
+        seed = valid & (prev < 0)
+        b = np.where(seed, values, b)
+        log_c = np.log(np.maximum(c, 1e-300))
+
+        block = int(np.clip(np.sqrt(30000 / cols), 8, 256))
+        tril = np.tril(np.ones((block, block), dtype=bool))[:, :, None]
+        y = np.empty(values.shape)
+        state = np.zeros(cols)
+        for start in range(0, rows, block):
+            lc = np.cumsum(log_c[start:start + block], axis=0)
+            n = len(lc)
+            weights = np.where(tril[:n, :n], np.exp(np.minimum(lc[:, None, :] - lc[None, :, :], 0.0)), 0.0)
+            y[start:start + n] = np.einsum('tjm,jm->tm', weights, b[start:start + n]) + np.exp(lc) * state
+            state = y[start + n - 1]
+        y[last < 0] = np.nan
+        return y
+
+    @staticmethod
+    def _batch_blocks(values):
+        """Indicator arrays (dates x symbols), in INDICATORS order, for a close matrix"""
+        missing = np.isnan(values)
+        steps = np.arange(len(values))[:, None]
+        first = np.where(missing.all(axis=0), len(values), missing.argmin(axis=0))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # RSI (14-day simple averages of gains/losses); a missing change
+            # counts as 0 like delta.where(...), but rows before a symbol's
+            # first close are absent from its own frame
+            delta = np.full(values.shape, np.nan)
+            np.subtract(values[1:], values[:-1], out=delta[1:])
+            gain_sum = MetricsCalculator._window_sum(np.fmax(delta, 0.0), 14)
+            loss_sum = MetricsCalculator._window_sum(np.fmax(-delta, 0.0), 14)
+            rsi = np.where(steps >= first + 13, 100 - (100 / (1 + gain_sum / loss_sum)), np.nan)
+
+            # MACD
+            macd = MetricsCalculator._ewm(values, 12) - MetricsCalculator._ewm(values, 26)
+            signal = MetricsCalculator._ewm(macd, 9)
+
+            # Bollinger Bands, from sums of centred prices to limit cancellation
+            complete = MetricsCalculator._complete_windows(missing, 20)
+            centre = values[np.minimum(first, len(values) - 1), np.arange(values.shape[1])]
+            centre = np.where(np.isnan(centre), 0.0, centre)
+            centred = np.where(missing, 0.0, values - centre)
+            s1 = MetricsCalculator._window_sum(centred, 20)
+            s2 = MetricsCalculator._window_sum(centred * centred, 20)
+            ma20 = np.where(complete, s1 / 20 + centre, np.nan)
+            std20 = np.where(complete, np.sqrt(np.maximum((s2 - s1 * s1 / 20) / 19, 0.0)), np.nan)
+            # A window of one repeated price is exactly that price with zero
+            # spread (as in pandas), not the rounding left over from the sums
+            flat = complete & (MetricsCalculator._window_sum(np.where(delta == 0, 0.0, 1.0), 19) == 0)
+            ma20 = np.where(flat, values, ma20)
+            std20 = np.where(flat, 0.0, std20)
+
+        return [rsi, macd, signal, ma20, std20, ma20 + std20 * 2, ma20 - std20 * 2]
+
+    @staticmethod
+    @Instrumentation.timed('indicators.calculate_batch_indicators')
+    def calculate_batch_indicators(close):
+        """
+        Compute the calculate_technical_indicators columns for many symbols at once.
+
+        `close` is a wide DataFrame of close prices (dates x symbols). Returns a
+        DataFrame on the same index with (indicator, symbol) MultiIndex columns.
+
+        Each symbol gets what calculate_technical_indicators returns for its
+        own rows, i.e. from its first close on. Leading NaNs (a symbol that
+        lists later than the others) are therefore not rows of that symbol:
+        everything is NaN before its first close and RSI starts 13 rows after
+        it. Running calculate_technical_indicators on the NaN-padded column
+        would instead count the padding as flat changes and report RSI early.
+        Interior NaNs are gaps, handled as the per-frame function does: a
+        flat change for RSI, NaN for any 20-row window containing one, and
+        decayed over by the MACD averages (ewm with ignore_na=False).
+        """
+        columns = pd.MultiIndex.from_product([MetricsCalculator.INDICATORS, close.columns],
+                                             names=['indicator', 'symbol'])
+        if close.empty:
+            return pd.DataFrame(index=close.index, columns=columns, dtype=np.float64)
+
+        values = close.to_numpy(dtype=np.float64, copy=False)
+        blocks = MetricsCalculator._batch_blocks(values)
+        width = values.shape[1]
+        result = np.empty((len(values), width * len(blocks)), order='F')
+        for i, block in enumerate(blocks):
+            result[:, i * width:(i + 1) * width] = block
+        return pd.DataFrame(result, index=close.index, columns=columns, copy=False)
+
+    @staticmethod
+    @Instrumentation.timed('indicators.calculate_indicators_many')
+    def calculate_indicators_many(histories, compute=None):
+        """
+        calculate_technical_indicators for each frame of {symbol: history}, batched.
+
+        Symbols whose histories share an index (the same exchange calendar and
+        range) are computed together by `compute` on their close matrix: a
+        function of a wide close frame returning calculate_batch_indicators'
+        column layout (the default), e.g. ParallelIndicatorEngine.compute.
+        Grouping by index rather than aligning everything keeps each symbol on
+        its own rows, so a holiday on one exchange is not a gap in another's
+        series. Returns {symbol: copy of the history with indicator columns}.
+        """
+        compute = compute or MetricsCalculator.calculate_batch_indicators
+        groups = []
+        for symbol, df in histories.items():
+            for index, members in groups:
+                if index.equals(df.index):
+                    members.append(symbol)
+                    break
+            else:
+                groups.append((df.index, [symbol]))
+
+        results = {}
+        for index, members in groups:
+            close = pd.DataFrame({symbol: histories[symbol]['Close'].to_numpy(dtype=np.float64)
+                                  for symbol in members}, index=index)
+            # Columns are indicator-major, so symbol j's indicators are every width-th column from j
+            values = compute(close).to_numpy()
+            width = len(members)
+            for j, symbol in enumerate(members):
+                indicators = pd.DataFrame(values[:, j::width], index=index, columns=MetricsCalculator.INDICATORS)
+                results[symbol] = pd.concat([histories[symbol], indicators], axis=1)
+        return {symbol: results[symbol] for symbol in histories}
+
     @staticmethod
     def format_large_number(num):
         """
@@ -0,0 +1,130 @@
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from utils.metrics_calculator import MetricsCalculator
+from utils.price_panel import PricePanel
+
+
+def _indicator_shard(input_path, output_path, shape, start, stop):
+    """
+    Worker: compute indicators for columns [start, stop) of the shared close matrix.
+
+    Both matrices are Fortran-ordered memory-mapped files, so the shard's
+    input columns and each indicator's output columns are contiguous and
+    nothing but the file paths and bounds crosses the process boundary.
+    """
+    rows, width = shape
+    close = np.memmap(input_path, dtype=np.float64, mode='r', shape=shape, order='F')
+    out = np.memmap(output_path, dtype=np.float64, mode='r+',
+                    shape=(rows, width * len(MetricsCalculator.INDICATORS)), order='F')
+    blocks = MetricsCalculator._batch_blocks(np.asarray(close[:, start:stop]))
+    for i, block in enumerate(blocks):
+        out[:, i * width + start:i * width + stop] = block
+    out.flush()
+    del close, out
+    return start, stop
+
+
+def _worker_pid(_):
+    return os.getpid()
+
+
+class ParallelIndicatorEngine:
+    """
+    Shards calculate_batch_indicators across a process pool.
+
+    The close matrix is written once to a memory-mapped scratch file (under
+    /dev/shm when available), workers compute disjoint column ranges and
+    write into a shared output file, and the parent reads the merged table
+    back. The pool is started lazily and reused until close().
+    """
+
+    # Below this many symbols per worker, process overhead outweighs the gain
+    MIN_SHARD = 64
+
+    def __init__(self, workers=None, min_shard=None, scratch_dir=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.min_shard = min_shard or self.MIN_SHARD
+        if scratch_dir is None and os.path.isdir('/dev/shm'):
+            scratch_dir = '/dev/shm'
+        self.scratch_dir = scratch_dir
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _get_pool(self):
+        if self._pool is None:
+            # spawn: safe from Streamlit's threads and behaves the same on Windows
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    def warm_up(self):
+        """Start every worker process now instead of on the first compute()"""
+        if self.workers > 1:
+            pool = self._get_pool()
+            list(pool.map(_worker_pid, range(self.workers)))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def _shards(self, width):
+        count = min(self.workers * 4, max(1, width // self.min_shard))
+        edges = np.linspace(0, width, count + 1).astype(np.int64)
+        return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+    def compute(self, close):
+        """
+        Same result as MetricsCalculator.calculate_batch_indicators(close), up to
+        float rounding (the gap-aware EWM picks its block size per shard width).
+
+        `close` is a wide close DataFrame (dates x symbols) or a PricePanel.
+        Small inputs, or a single worker, are computed in-process.
+        """
+        if isinstance(close, PricePanel):
+            close = close.frame('Close')
+        rows, width = close.shape
+        shards = self._shards(width)
+        if self.workers <= 1 or len(shards) <= 1 or rows == 0:
+            return MetricsCalculator.calculate_batch_indicators(close)
+
+        scratch = tempfile.mkdtemp(prefix='indicators-', dir=self.scratch_dir)
+        try:
+            input_path = os.path.join(scratch, 'close.f64')
+            output_path = os.path.join(scratch, 'indicators.f64')
+            shared = np.memmap(input_path, dtype=np.float64, mode='w+', shape=(rows, width), order='F')
+            shared[:] = close.to_numpy(dtype=np.float64, copy=False)
+            shared.flush()
+            out_width = width * len(MetricsCalculator.INDICATORS)
+            out = np.memmap(output_path, dtype=np.float64, mode='w+', shape=(rows, out_width), order='F')
+
+            pool = self._get_pool()
+            futures = [pool.submit(_indicator_shard, input_path, output_path, (rows, width), start, stop)
+                       for start, stop in shards]
+            for future in futures:
+                future.result()
+
+            result = np.array(out, order='F')
+            del shared, out
+        except Exception as e:
+            logging.error(f"Parallel indicator computation failed: {str(e)}")
+            raise Exception(f"Error computing indicators in parallel: {str(e)}")
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+        columns = pd.MultiIndex.from_product([MetricsCalculator.INDICATORS, close.columns],
+                                             names=['indicator', 'symbol'])
+        return pd.DataFrame(result, index=close.index, columns=columns, copy=False)
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+from utils.history_cache import HistoryCache
+
+
+class PricePanel:
+    """
+    Aligned multi-symbol OHLCV store.
+
+    One shared date index plus one contiguous 2-D block (dates x symbols)
+    per field. Column views and cross-sections are NumPy views into those
+    blocks, so chart/indicator code can read them without copying.
+    """
+
+    FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+    def __init__(self, index, symbols, blocks):
+        self.index = index
+        self.symbols = list(symbols)
+        self._positions = {symbol: i for i, symbol in enumerate(self.symbols)}
+        # Blocks are Fortran-ordered so each symbol's column is contiguous
+        self.blocks = {field: np.asfortranarray(block) for field, block in blocks.items()}
+
+    @classmethod
+    def from_frames(cls, frames, fields=None, dtype=np.float64, interval='1d', how='outer', tz=None):
+        """
+        Build a panel from {symbol: OHLCV DataFrame} as returned by the fetcher.
+
+        Calendar alignment: daily (and coarser) bars from different exchanges
+        are keyed by their local session date, so an NSE and a NYSE bar for the
+        same day share a row. Intraday bars are aligned on absolute time,
+        converted to `tz` (UTC by default). `how` is 'outer' (union of
+        sessions, NaN where a market was closed) or 'inner' (common sessions).
+        Closed sessions are not forward-filled; use frame(field).ffill() for
+        carried-over values.
+        """
+        fields = fields or cls.FIELDS
+        daily = interval not in HistoryCache.INTRADAY_INTERVALS
+        keyed = {}
+        for symbol, df in frames.items():
+            if df is None or df.empty:
+                continue
+            index = df.index
+            if daily:
+                if index.tz is not None:
+                    index = index.tz_localize(None)
+                index = index.normalize()
+            elif index.tz is not None:
+                index = index.tz_convert(tz or 'UTC')
+            else:
+                index = index.tz_localize(tz or 'UTC')
+            frame = df.set_axis(index)
+            keyed[symbol] = frame[~frame.index.duplicated(keep='last')]
+
+        if not keyed:
+            return cls(pd.DatetimeIndex([]), [], {field: np.empty((0, 0), dtype=dtype) for field in fields})
+
+        indexes = [frame.index for frame in keyed.values()]
+        joined = indexes[0]
+        for index in indexes[1:]:
+            joined = joined.union(index) if how == 'outer' else joined.intersection(index)
+        joined = joined.sort_values()
+
+        symbols = list(keyed)
+        blocks = {field: np.full((len(joined), len(symbols)), np.nan, dtype=dtype, order='F')
+                  for field in fields}
+        for j, symbol in enumerate(symbols):
+            frame = keyed[symbol]
+            rows = joined.get_indexer(frame.index)
+            present = rows >= 0
+            for field in fields:
+                if field in frame.columns:
+                    blocks[field][rows[present], j] = frame[field].to_numpy(dtype=dtype)[present]
+        return cls(joined, symbols, blocks)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, symbol):
+        return symbol in self._positions
+
+    @property
+    def nbytes(self):
+        return sum(block.nbytes for block in self.blocks.values())
+
+    def values(self, field='Close'):
+        """The (dates x symbols) block for a field; no copy"""
+        return self.blocks[field]
+
+    def frame(self, field='Close'):
+        """A DataFrame over one field's block (dates x symbols), sharing its memory"""
+        return pd.DataFrame(self.blocks[field], index=self.index, columns=self.symbols, copy=False)
+
+    def column(self, symbol, field='Close'):
+        """Contiguous 1-D view of one symbol's values for a field"""
+        return self.blocks[field][:, self._positions[symbol]]
+
+    def cross_section(self, row, field='Close'):
+        """Values of every symbol at one row position (or timestamp label)"""
+        if not isinstance(row, (int, np.integer)):
+            row = self.index.get_loc(row)
+        return self.blocks[field][row, :]
+
+    def symbol_frame(self, symbol, dropna=True):
+        """OHLCV DataFrame for one symbol, shaped like the fetcher's output"""
+        position = self._positions[symbol]
+        frame = pd.DataFrame({field: block[:, position] for field, block in self.blocks.items()},
+                             index=self.index)
+        return frame.dropna(how='all') if dropna else frame
+
+    def to_frames(self):
+        """Inverse of from_frames: {symbol: OHLCV DataFrame} on each symbol's own rows"""
+        return {symbol: self.symbol_frame(symbol) for symbol in self.symbols}
+
+    def select(self, symbols):
+        """Panel restricted to a subset of symbols (copies the selected columns)"""
+        positions = [self._positions[symbol] for symbol in symbols]
+        return PricePanel(self.index, symbols,
+                          {field: block[:, positions] for field, block in self.blocks.items()})
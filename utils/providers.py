@@ -0,0 +1,565 @@
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.history_cache import HistoryCache
+from utils.request_governor import ThrottledError
+
+
+class DataProvider:
+    """
+    Market data backend used by StockDataFetcher.
+
+    A provider answers three questions for one symbol at a time:
+    history() returns a yfinance-style OHLCV DataFrame (empty when there is
+    no data), info() returns the `.info` mapping (empty when unknown) and
+    search() returns suggestion dicts with symbol, name and exchange.
+    Caching, symbol resolution and fan-out stay in the fetcher.
+
+    `host` keys the fetcher's per-host circuit breaker and `rate_limit`
+    ((requests per second, burst) or None) its token bucket.
+    history_many() answers several symbols in one call; `batch_history`
+    says whether that is a single upstream request or one per symbol.
+    """
+
+    name = 'base'
+    rate_limit = None
+    batch_history = False
+
+    @property
+    def host(self):
+        return self.name
+
+    def history(self, symbol, period='1mo', interval='1d', start=None, end=None):
+        raise NotImplementedError
+
+    def history_many(self, symbols, period='1mo', interval='1d', start=None, end=None):
+        """{symbol: history} for several symbols (empty frames for symbols without data)"""
+        return {symbol: self.history(symbol, period=period, interval=interval, start=start, end=end)
+                for symbol in symbols}
+
+    def info(self, symbol):
+        raise NotImplementedError
+
+    def search(self, query, market_type='both', limit=10):
+        return []
+
+
+class YFinanceProvider(DataProvider):
+    """Live Yahoo Finance data through yfinance"""
+
+    name = 'yfinance'
+    host = 'finance.yahoo.com'
+
+    def __init__(self, search_timeout=5, rate_limit=(8, 32)):
+        self.search_timeout = search_timeout
+        self.rate_limit = rate_limit
+
+    @staticmethod
+    def _ticker(symbol):
+        # yfinance (and its HTTP stack) is imported on first use, not at startup
+        import yfinance as yf
+        return yf.Ticker(symbol)
+
+    def history(self, symbol, period='1mo', interval='1d', start=None, end=None):
+        if start is not None or end is not None:
+            return self._ticker(symbol).history(start=start, end=end, interval=interval)
+        return self._ticker(symbol).history(period=period, interval=interval)
+
+    def history_many(self, symbols, period='1mo', interval='1d', start=None, end=None):
+        # One yf.download call; Yahoo has no multi-symbol bars endpoint, so yfinance
+        # still requests each symbol (batch_history stays False for the rate limit)
+        import yfinance as yf
+
+        symbols = list(symbols)
+        window = {'start': start, 'end': end} if start is not None or end is not None else {'period': period}
+        data = yf.download(symbols, interval=interval, group_by='ticker', auto_adjust=True, actions=True,
+                           threads=True, progress=False, multi_level_index=True, ignore_tz=False, **window)
+        frames = {}
+        for symbol in symbols:
+            if symbol in data.columns.get_level_values(0):
+                frames[symbol] = data[symbol].dropna(how='all')
+            else:
+                frames[symbol] = pd.DataFrame()
+        return frames
+
+    def info(self, symbol):
+        return self._ticker(symbol).info
+
+    def search(self, query, market_type='both', limit=10):
+        import yfinance as yf
+        quotes = yf.Search(query, max_results=limit, news_count=0, lists_count=0,
+                           timeout=self.search_timeout, raise_errors=False).quotes
+        return [{'symbol': quote['symbol'],
+                 'name': quote.get('longname') or quote.get('shortname') or quote['symbol'],
+                 'exchange': quote.get('exchange', 'UNKNOWN')}
+                for quote in quotes if quote.get('symbol')]
+
+
+class LocalDataProvider(DataProvider):
+    """
+    Serves history/info from a local data directory (no network).
+
+    Layout: `<SYMBOL>_<interval>.csv|.parquet` (or `<SYMBOL>.csv|.parquet`
+    for any interval) holding yfinance-style OHLCV with a timestamp index,
+    and an optional `<SYMBOL>.info.json` with the `.info` payload.
+    """
+
+    name = 'local'
+
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+
+    @staticmethod
+    def _stem(symbol):
+        return re.sub(r'[^A-Za-z0-9.\-^&]', '_', symbol)
+
+    def _history_path(self, symbol, interval):
+        stem = os.path.join(self.data_dir, self._stem(symbol))
+        for candidate in (f"{stem}_{interval}.parquet", f"{stem}_{interval}.csv",
+                          f"{stem}.parquet", f"{stem}.csv"):
+            if os.path.exists(candidate):
+                return candidate
+        return None
+
+    def _info_path(self, symbol):
+        return os.path.join(self.data_dir, f"{self._stem(symbol)}.info.json")
+
+    @staticmethod
+    def read_history(path):
+        if path.endswith('.parquet'):
+            df = pd.read_parquet(path)
+        else:
+            df = pd.read_csv(path, index_col=0)
+        if not isinstance(df.index, pd.DatetimeIndex):
+            df.index = pd.to_datetime(df.index, utc=True)
+        return df.sort_index()
+
+    @staticmethod
+    def _slice(df, period, start, end):
+        """Apply a yfinance-style period or [start, end) range to a full frame"""
+        if df.empty:
+            return df
+        if start is not None or end is not None:
+            tz = df.index.tz
+            if start is not None:
+                df = df[df.index >= HistoryCache._to_ts(start, tz)]
+            if end is not None:
+                df = df[df.index < HistoryCache._to_ts(end, tz)]
+            return df
+        if period in HistoryCache.PERIOD_OFFSETS or period in ('max', 'ytd'):
+            return HistoryCache.slice_history(df, period)
+        return df
+
+    def _load_history(self, symbol, interval):
+        path = self._history_path(symbol, interval)
+        return self.read_history(path) if path is not None else None
+
+    def history(self, symbol, period='1mo', interval='1d', start=None, end=None):
+        df = self._load_history(symbol, interval)
+        if df is None:
+            return pd.DataFrame()
+        return self._slice(df, period, start, end)
+
+    def info(self, symbol):
+        path = self._info_path(symbol)
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def symbols(self):
+        """Symbols that have history files in the data directory"""
+        if not os.path.isdir(self.data_dir):
+            return []
+        found = set()
+        for name in os.listdir(self.data_dir):
+            match = re.match(r'^(.+?)(?:_[0-9]+[a-z]+)?\.(csv|parquet)$', name)
+            if match:
+                found.add(match.group(1))
+        return sorted(found)
+
+    def search(self, query, market_type='both', limit=10):
+        query = query.strip().upper()
+        hits = [symbol for symbol in self.symbols() if symbol.upper().startswith(query)]
+        return [{'symbol': symbol, 'name': LocalDataProvider.info(self, symbol).get('longName', symbol),
+                 'exchange': self.name.upper()}
+                for symbol in hits[:limit]]
+
+
+SYNTHETIC_FREQUENCIES = {
+    '1m': '1min', '2m': '2min', '5m': '5min', '15m': '15min', '30m': '30min',
+    '60m': '60min', '90m': '90min', '1h': '60min',
+    '1d': 'B', '5d': '5B', '1wk': 'W-FRI', '1mo': 'MS', '3mo': 'QS'
+}
+
+
+def _date_range(start=None, end=None, periods=None, freq='B', tz=None):
+    """
+    pd.date_range, with business days cut from a daily range: pandas steps a
+    'B' range one Python offset at a time (~40 ms for ten years with a
+    timezone), which held the GIL long enough to dominate concurrent
+    benchmarks against the replay provider.
+    """
+    if freq != 'B':
+        return pd.date_range(start=start, end=end, periods=periods, freq=freq, tz=tz)
+    if periods is None:
+        days = pd.date_range(start=start, end=end, freq='D', tz=tz)
+        return days[days.dayofweek < 5]
+    days = pd.date_range(start=start, periods=periods * 7 // 5 + 7, freq='D', tz=tz)
+    return days[days.dayofweek < 5][:periods]
+
+
+def synthetic_ohlcv(rows=1250, start='2020-01-01', freq='B', tz='America/New_York', seed=0):
+    """Random-walk OHLCV frame shaped like yf.Ticker.history output"""
+    rng = np.random.default_rng(seed)
+    index = _date_range(start=start, periods=rows, freq=freq, tz=tz)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, rows)))
+    open_ = close * (1 + rng.normal(0, 0.003, rows))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, rows))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, rows))
+    volume = rng.integers(1e5, 1e7, rows).astype(float)
+    return pd.DataFrame({
+        'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume,
+        'Dividends': 0.0, 'Stock Splits': 0.0
+    }, index=index)
+
+
+class ReplayProvider(LocalDataProvider):
+    """
+    Deterministic offline backend with configurable artificial latency.
+
+    Recorded fixtures (a LocalDataProvider directory, e.g. written by
+    RecordingProvider) are served when present. Other symbols get a
+    synthetic random walk seeded from the symbol name and ending at `end`,
+    so repeated runs see identical data. Every call sleeps `latency`
+    seconds, +/- `jitter` (a fraction of latency) from a seeded RNG.
+    """
+
+    name = 'replay'
+    batch_history = True
+    DAILY_YEARS = 10
+    INTRADAY_DAYS = 60
+
+    def __init__(self, fixture_dir=None, latency=0.0, jitter=0.0, seed=0, end='2025-01-03',
+                 synthetic=True):
+        super().__init__(fixture_dir or '')
+        self.latency = latency
+        self.jitter = jitter
+        self.end = pd.Timestamp(end)
+        self.synthetic = synthetic
+        self._rng = random.Random(seed)
+        self._frames = {}
+        self._lock = threading.Lock()
+        self.calls = {'history': 0, 'history_many': 0, 'info': 0, 'search': 0}
+
+    def _wait(self, kind):
+        with self._lock:
+            self.calls[kind] += 1
+            delay = self.latency * (1 + self.jitter * (2 * self._rng.random() - 1))
+        if delay > 0:
+            time.sleep(delay)
+
+    @staticmethod
+    def _seed(symbol):
+        return sum(ord(c) * (i + 1) for i, c in enumerate(symbol))
+
+    @staticmethod
+    def _timezone(symbol):
+        return 'Asia/Kolkata' if symbol.endswith(('.NS', '.BO')) else 'America/New_York'
+
+    def _synthetic(self, symbol, interval):
+        freq = SYNTHETIC_FREQUENCIES.get(interval, 'B')
+        tz = self._timezone(symbol)
+        if interval in HistoryCache.INTRADAY_INTERVALS:
+            days = pd.bdate_range(end=self.end, periods=self.INTRADAY_DAYS)
+            session = pd.Timedelta(hours=9, minutes=15 if tz == 'Asia/Kolkata' else 30)
+            per_day = int(pd.Timedelta(hours=6) / pd.Timedelta(freq))
+            index = pd.DatetimeIndex(np.concatenate([
+                pd.date_range(day + session, periods=per_day, freq=freq, tz=tz).asi8 for day in days
+            ])).tz_localize('UTC').tz_convert(tz)
+        else:
+            start = self.end - pd.DateOffset(years=self.DAILY_YEARS)
+            index = _date_range(start=start, end=self.end, freq=freq, tz=tz)
+        df = synthetic_ohlcv(rows=len(index), seed=self._seed(symbol))
+        return df.set_axis(index)
+
+    def _load_history(self, symbol, interval):
+        key = (symbol, interval)
+        with self._lock:
+            df = self._frames.get(key)
+        if df is None:
+            df = super()._load_history(symbol, interval) if self.data_dir else None
+            if df is None and self.synthetic:
+                df = self._synthetic(symbol, interval)
+            with self._lock:
+                self._frames[key] = df
+        return df
+
+    def history(self, symbol, period='1mo', interval='1d', start=None, end=None):
+        self._wait('history')
+        return super().history(symbol, period, interval, start, end)
+
+    def history_many(self, symbols, period='1mo', interval='1d', start=None, end=None):
+        # One simulated round trip for the whole batch
+        self._wait('history_many')
+        return {symbol: LocalDataProvider.history(self, symbol, period, interval, start, end) for symbol in symbols}
+
+    def info(self, symbol):
+        self._wait('info')
+        info = super().info(symbol) if self.data_dir else {}
+        if info or not self.synthetic:
+            return info
+        rng = np.random.default_rng(self._seed(symbol))
+        close = float(self._load_history(symbol, '1d')['Close'].iloc[-1])
+        return {
+            'symbol': symbol,
+            'longName': f"{symbol} (replay)",
+            'shortName': symbol,
+            'currency': 'INR' if symbol.endswith(('.NS', '.BO')) else 'USD',
+            'currentPrice': close,
+            'previousClose': close,
+            'marketCap': float(rng.uniform(1e9, 2e12)),
+            'trailingPE': float(rng.uniform(8, 60)),
+            'volume': float(rng.integers(1e5, 1e7)),
+            'averageVolume': float(rng.integers(1e5, 1e7)),
+            'dividendYield': float(rng.uniform(0, 0.04)),
+            'beta': float(rng.uniform(0.5, 1.8)),
+            'exchange': 'REPLAY'
+        }
+
+    def search(self, query, market_type='both', limit=10):
+        self._wait('search')
+        return super().search(query, market_type, limit) if self.data_dir else []
+
+
+class LiveReplayProvider(ReplayProvider):
+    """
+    ReplayProvider whose bars arrive over time, like a live feed.
+
+    The last `live_bars` bars of every history (at most half of it) are
+    held back when first loaded and released at `bars_per_second` per
+    symbol, whatever the interval, so a poller sees new bars at a steady
+    rate. emitted_at() is the `clock` time a bar was released, for
+    measuring end-to-end latency.
+    """
+
+    name = 'live-replay'
+
+    def __init__(self, fixture_dir=None, bars_per_second=1.0, live_bars=1000, clock=time.monotonic, **kwargs):
+        super().__init__(fixture_dir, **kwargs)
+        self.bars_per_second = bars_per_second
+        self.live_bars = live_bars
+        self.clock = clock
+        self.started = clock()
+
+    def _full_history(self, symbol, interval):
+        return super()._load_history(symbol, interval)
+
+    def _first_live(self, df):
+        return len(df) - min(self.live_bars, len(df) // 2)
+
+    def _load_history(self, symbol, interval):
+        df = self._full_history(symbol, interval)
+        if df is None:
+            return None
+        released = int((self.clock() - self.started) * self.bars_per_second)
+        return df.iloc[:min(len(df), self._first_live(df) + released)]
+
+    def emitted_at(self, symbol, interval, timestamp):
+        """Clock time at which the bar at `timestamp` was released (start time for history bars)"""
+        df = self._full_history(symbol, interval)
+        position = df.index.searchsorted(timestamp)
+        return self.started + max(0, position - self._first_live(df) + 1) / self.bars_per_second
+
+
+class RecordingProvider(DataProvider):
+    """
+    Pass-through provider that saves every non-empty answer as a fixture.
+
+    The fixture directory uses the LocalDataProvider layout, so a recorded
+    session can be replayed later with ReplayProvider(fixture_dir).
+    History is stored per symbol/interval as the union of all bars seen.
+    """
+
+    def __init__(self, inner, fixture_dir):
+        self.inner = inner
+        self.fixture_dir = fixture_dir
+        self.name = f"recording:{inner.name}"
+        self._lock = threading.Lock()
+
+    @property
+    def host(self):
+        return self.inner.host
+
+    @property
+    def rate_limit(self):
+        return self.inner.rate_limit
+
+    def _path(self, symbol, suffix):
+        return os.path.join(self.fixture_dir, f"{LocalDataProvider._stem(symbol)}{suffix}")
+
+    @property
+    def batch_history(self):
+        return self.inner.batch_history
+
+    def history(self, symbol, period='1mo', interval='1d', start=None, end=None):
+        df = self.inner.history(symbol, period=period, interval=interval, start=start, end=end)
+        self._record_history(symbol, interval, df)
+        return df
+
+    def history_many(self, symbols, period='1mo', interval='1d', start=None, end=None):
+        frames = self.inner.history_many(symbols, period=period, interval=interval, start=start, end=end)
+        for symbol, df in frames.items():
+            self._record_history(symbol, interval, df)
+        return frames
+
+    def _record_history(self, symbol, interval, df):
+        if df is None or df.empty:
+            return
+        path = self._path(symbol, f"_{interval}.parquet")
+        try:
+            with self._lock:
+                os.makedirs(self.fixture_dir, exist_ok=True)
+                if os.path.exists(path):
+                    stored = pd.read_parquet(path)
+                    merged = pd.concat([stored, df])
+                    merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+                else:
+                    merged = df
+                merged.to_parquet(path)
+        except Exception as e:
+            logging.warning(f"Could not record history fixture for {symbol}: {str(e)}")
+
+    def info(self, symbol):
+        info = self.inner.info(symbol)
+        if info:
+            try:
+                with self._lock:
+                    os.makedirs(self.fixture_dir, exist_ok=True)
+                    with open(self._path(symbol, '.info.json'), 'w') as f:
+                        json.dump(info, f, default=str)
+            except Exception as e:
+                logging.warning(f"Could not record info fixture for {symbol}: {str(e)}")
+        return info
+
+    def search(self, query, market_type='both', limit=10):
+        return self.inner.search(query, market_type, limit)
+
+
+class FaultInjectingProvider(DataProvider):
+    """
+    Wraps a provider and makes a seeded fraction of calls fail the way a
+    struggling upstream does: `throttle_rate` raise ThrottledError (HTTP
+    429), `error_rate` raise a connection error and `timeout_rate` sleep
+    `timeout` seconds then raise TimeoutError. set_outage(True) fails every
+    call until cleared. Counts what it injected in `faults`.
+    """
+
+    def __init__(self, inner, throttle_rate=0.0, error_rate=0.0, timeout_rate=0.0, timeout=1.0,
+                 seed=0, rate_limit=None):
+        self.inner = inner
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.timeout = timeout
+        self.rate_limit = rate_limit
+        self.name = f"faulty:{inner.name}"
+        self.outage = False
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.faults = {'throttle': 0, 'error': 0, 'timeout': 0, 'outage': 0, 'ok': 0}
+
+    @property
+    def host(self):
+        return self.inner.host
+
+    @property
+    def batch_history(self):
+        return self.inner.batch_history
+
+    def set_outage(self, outage=True):
+        self.outage = outage
+
+    def _inject(self):
+        with self._lock:
+            roll = self._rng.random()
+            if self.outage:
+                kind = 'outage'
+            elif roll < self.throttle_rate:
+                kind = 'throttle'
+            elif roll < self.throttle_rate + self.error_rate:
+                kind = 'error'
+            elif roll < self.throttle_rate + self.error_rate + self.timeout_rate:
+                kind = 'timeout'
+            else:
+                kind = 'ok'
+            self.faults[kind] += 1
+        if kind == 'throttle':
+            raise ThrottledError("Too Many Requests. Rate limited. Try after a while.")
+        if kind in ('error', 'outage'):
+            raise ConnectionError(f"Connection to {self.host} refused")
+        if kind == 'timeout':
+            time.sleep(self.timeout)
+            raise TimeoutError(f"Read from {self.host} timed out")
+
+    def history(self, symbol, period='1mo', interval='1d', start=None, end=None):
+        self._inject()
+        return self.inner.history(symbol, period=period, interval=interval, start=start, end=end)
+
+    def history_many(self, symbols, period='1mo', interval='1d', start=None, end=None):
+        self._inject()
+        return self.inner.history_many(symbols, period=period, interval=interval, start=start, end=end)
+
+    def info(self, symbol):
+        self._inject()
+        return self.inner.info(symbol)
+
+    def search(self, query, market_type='both', limit=10):
+        self._inject()
+        return self.inner.search(query, market_type, limit)
+
+
+def provider_from_env():
+    """
+    Provider selected by STOCK_DATA_PROVIDER: 'yfinance' (default), 'local' or
+    'replay'. STOCK_DATA_DIR points at the data/fixture directory,
+    STOCK_REPLAY_LATENCY sets the replay delay in seconds,
+    STOCK_REPLAY_RATE (bars per second) makes the replay a LiveReplayProvider,
+    STOCK_RECORD_DIR wraps the provider in a RecordingProvider and
+    STOCK_FAULT_RATE (a fraction) in a FaultInjectingProvider that throttles
+    that share of calls. STOCK_RATE_LIMIT overrides Yahoo's requests/second.
+    """
+    kind = os.environ.get('STOCK_DATA_PROVIDER', 'yfinance').lower()
+    data_dir = os.environ.get('STOCK_DATA_DIR')
+    if kind == 'replay':
+        latency = float(os.environ.get('STOCK_REPLAY_LATENCY', 0))
+        rate = float(os.environ.get('STOCK_REPLAY_RATE', 0))
+        if rate:
+            provider = LiveReplayProvider(data_dir, bars_per_second=rate, latency=latency)
+        else:
+            provider = ReplayProvider(data_dir, latency=latency)
+    elif kind == 'local':
+        if not data_dir:
+            raise Exception("STOCK_DATA_PROVIDER=local requires STOCK_DATA_DIR")
+        provider = LocalDataProvider(data_dir)
+    elif kind == 'yfinance':
+        rate = float(os.environ.get('STOCK_RATE_LIMIT', 8))
+        provider = YFinanceProvider(rate_limit=(rate, max(1, int(rate * 4))))
+    else:
+        raise Exception(f"Unknown data provider: {kind}")
+
+    record_dir = os.environ.get('STOCK_RECORD_DIR')
+    if record_dir:
+        provider = RecordingProvider(provider, record_dir)
+    fault_rate = float(os.environ.get('STOCK_FAULT_RATE', 0))
+    if fault_rate:
+        provider = FaultInjectingProvider(provider, throttle_rate=fault_rate)
+    return provider
@@ -0,0 +1,288 @@
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+
+from utils.instrumentation import Instrumentation
+
+
+class UpstreamUnavailable(Exception):
+    """An upstream call was given up on (retries exhausted, rate limit wait or open breaker)"""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    """Raised without calling upstream while a host's circuit breaker is open"""
+
+
+class ThrottledError(Exception):
+    """Upstream said "slow down" (HTTP 429 or equivalent); always retryable"""
+
+
+# HTTP statuses that mean "try again later"
+TRANSIENT_STATUS = frozenset({429, 502, 503, 504})
+
+# Retryable exception classes of the HTTP clients, by module. Only modules
+# that are already loaded are consulted: an error from one of them means it
+# has been imported, and yfinance stays a lazy import.
+CLIENT_TRANSIENT_ERRORS = {
+    'requests.exceptions': ('ConnectionError', 'Timeout'),
+    'curl_cffi.requests.exceptions': ('ConnectionError', 'Timeout'),
+    'yfinance.exceptions': ('YFRateLimitError',),
+}
+
+
+def _status_code(error):
+    """HTTP status carried by an error (requests/curl response or urllib HTTPError), else None"""
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status is None:
+        status = getattr(error, 'status_code', None)
+    if status is None and isinstance(error, urllib.error.HTTPError):
+        status = error.code
+    return status
+
+
+def _transient_types():
+    types = [ThrottledError, TimeoutError, ConnectionError, urllib.error.URLError]
+    for module_name, names in CLIENT_TRANSIENT_ERRORS.items():
+        module = sys.modules.get(module_name)
+        if module is not None:
+            types.extend(getattr(module, name) for name in names if hasattr(module, name))
+    return tuple(types)
+
+
+def is_transient(error):
+    """
+    True for throttling, timeouts and connection errors; False for e.g. a bad symbol.
+
+    Decided by the HTTP status when the error carries one, else by exception
+    type (following `raise ... from`); the message text is never inspected,
+    since symbols such as 500504.BO would look like status codes.
+    """
+    while error is not None:
+        status = _status_code(error)
+        if status is not None:
+            return status in TRANSIENT_STATUS
+        if isinstance(error, _transient_types()):
+            return True
+        error = error.__cause__
+    return False
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, at most `burst` banked"""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens):
+        """Take `tokens`, returning how long the caller must wait before using them"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self, timeout=None, tokens=1):
+        """Block until `tokens` are available; False (tokens returned) if that takes over `timeout`"""
+        delay = self._reserve(tokens)
+        if timeout is not None and delay > timeout:
+            with self._lock:
+                self._tokens += tokens
+            return False
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one upstream host.
+
+    'closed' passes calls through. `failure_threshold` transient failures in
+    a row open it: calls are rejected for `reset_timeout` seconds, then a
+    single trial call is let through ('half_open') whose outcome closes or
+    re-opens the breaker.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._trial_running = False
+            if self.state == 'half_open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        """Count a transient failure; returns True if this call opened the breaker"""
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == 'half_open' or (self.state == 'closed' and self.failures >= self.failure_threshold):
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+                return True
+            return False
+
+    def retry_after(self):
+        with self._lock:
+            if self.state != 'open':
+                return 0.0
+            return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+
+class RequestGovernor:
+    """
+    Central policy for every upstream call StockDataFetcher makes.
+
+    Per host: a token bucket (only for hosts whose provider declares a
+    rate limit), at most `max_concurrency` calls in flight, retries of
+    transient errors with exponential backoff and full jitter, and a
+    circuit breaker that fails fast while the host is down. Non-transient errors (e.g. an unknown symbol) pass straight
+    through. When a call is given up on, UpstreamUnavailable is raised so
+    the caches can serve what they already have.
+    """
+
+    def __init__(self, max_retries=3, base_delay=0.5, max_delay=8.0, failure_threshold=5,
+                 reset_timeout=30.0, acquire_timeout=10.0, max_concurrency=16, seed=None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.acquire_timeout = acquire_timeout
+        self.max_concurrency = max_concurrency
+        self._rng = random.Random(seed)
+        self._buckets = {}
+        self._breakers = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host, rate_limit):
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(*rate_limit)
+            return bucket
+
+    def _slot(self, host):
+        """Semaphore bounding the calls in flight to `host`"""
+        with self._lock:
+            slot = self._slots.get(host)
+            if slot is None:
+                slot = self._slots[host] = threading.BoundedSemaphore(self.max_concurrency)
+            return slot
+
+    def breaker(self, host):
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def backoff(self, attempt):
+        """Full-jitter delay before retry number `attempt` (1-based)"""
+        with self._lock:
+            return self._rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def call(self, host, func, rate_limit=None, weight=1):
+        """
+        Run func() against `host` under the rate limit, retry and breaker policy.
+
+        `rate_limit` is (requests per second, burst) or None for no limit;
+        `weight` is how many upstream requests one call makes (a batch
+        that the client library fans out per symbol), capped at the
+        bucket's burst so a large batch drains it rather than never fitting.
+        """
+        breaker = self.breaker(host)
+        bucket = self._bucket(host, rate_limit) if rate_limit else None
+        slot = self._slot(host)
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                Instrumentation.count('governor.rejected')
+                raise CircuitOpenError(
+                    f"{host} is unavailable (circuit open, retry in {breaker.retry_after():.0f}s)"
+                )
+            if bucket is not None:
+                with Instrumentation.span('governor.rate_wait'):
+                    if not bucket.acquire(self.acquire_timeout, min(weight, bucket.burst)):
+                        Instrumentation.count('governor.rate_limited')
+                        raise UpstreamUnavailable(f"Rate limit for {host} exceeded; gave up waiting")
+
+            try:
+                with slot:
+                    result = func()
+            except Exception as e:
+                if not is_transient(e):
+                    breaker.record_success()
+                    raise
+                Instrumentation.count('governor.transient_error')
+                if breaker.record_failure():
+                    Instrumentation.count('governor.circuit_opened')
+                    logging.warning(f"Circuit opened for {host} after repeated failures: {str(e)}")
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise UpstreamUnavailable(f"{host} failed after {attempt} attempts: {str(e)}") from e
+                Instrumentation.count('governor.retry')
+                time.sleep(self.backoff(attempt))
+                continue
+
+            breaker.record_success()
+            return result
+
+    def stats(self):
+        """Breaker state per host, for the diagnostics panel"""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {host: {'state': breaker.state, 'failures': breaker.failures,
+                       'retry_after_s': breaker.retry_after()}
+                for host, breaker in breakers.items()}
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+            self._breakers.clear()
+            self._slots.clear()
+
+
+def governor_from_env():
+    """
+    RequestGovernor configured by STOCK_MAX_RETRIES, STOCK_BREAKER_THRESHOLD,
+    STOCK_BREAKER_RESET (seconds) and STOCK_MAX_CONCURRENCY (calls in flight
+    per host); STOCK_GOVERNOR=0 disables it.
+    """
+    if os.environ.get('STOCK_GOVERNOR', '1').lower() in ('0', 'false', 'no'):
+        return None
+    return RequestGovernor(
+        max_retries=int(os.environ.get('STOCK_MAX_RETRIES', 3)),
+        failure_threshold=int(os.environ.get('STOCK_BREAKER_THRESHOLD', 5)),
+        reset_timeout=float(os.environ.get('STOCK_BREAKER_RESET', 30)),
+        max_concurrency=int(os.environ.get('STOCK_MAX_CONCURRENCY', 16))
+    )
@@ -0,0 +1,82 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+
+class Resampler:
+    """
+    Derives coarser OHLCV bars from finer ones already in hand.
+
+    Intraday bars are binned in exchange wall time from the session open
+    (NSE 09:15, US 09:30), the way Yahoo labels them: NSE hourly bars start
+    at 09:15, 10:15, ... and the last bin of a session may be shorter.
+    Open is the first open, Close the last close, High/Low the extremes and
+    Volume the sum.
+
+    Only intraday targets are derived. Daily bars always come from upstream:
+    Yahoo's intraday bars are unadjusted for splits and dividends and miss
+    the auction prints, so daily bars built from them would not match.
+    """
+
+    # exchange: (timezone, session open, session close)
+    SESSIONS = {
+        'NSE': ('Asia/Kolkata', pd.Timedelta(hours=9, minutes=15), pd.Timedelta(hours=15, minutes=30)),
+        'US': ('America/New_York', pd.Timedelta(hours=9, minutes=30), pd.Timedelta(hours=16)),
+    }
+
+    INTERVAL_MINUTES = {
+        '1m': 1, '2m': 2, '5m': 5, '15m': 15, '30m': 30, '60m': 60, '90m': 90, '1h': 60
+    }
+
+    AGGREGATIONS = {
+        'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last',
+        'Volume': 'sum', 'Dividends': 'sum', 'Stock Splits': 'max'
+    }
+
+    @staticmethod
+    def exchange_for(symbol):
+        """'NSE', 'US' or None (unknown session: don't derive, fetch instead)"""
+        if symbol.endswith(('.NS', '.BO')) or symbol in ('^NSEI', '^BSESN'):
+            return 'NSE'
+        # Plain tickers and indices (AAPL, BRK-B, ^GSPC); not FX, futures, crypto or other exchanges
+        if re.fullmatch(r'\^?[A-Z]{1,5}(-[A-Z])?', symbol):
+            return 'US'
+        return None
+
+    @staticmethod
+    def sources_for(interval):
+        """Finer intervals that intraday `interval` can be built from exactly, coarsest first"""
+        target = Resampler.INTERVAL_MINUTES.get(interval)
+        if target is None:
+            return []
+        candidates = [source for source, minutes in Resampler.INTERVAL_MINUTES.items()
+                      if minutes < target and target % minutes == 0]
+        return sorted(candidates, key=lambda source: -Resampler.INTERVAL_MINUTES[source])
+
+    @staticmethod
+    def resample(df, interval, exchange):
+        """Aggregate `df` (finer bars with a DatetimeIndex) to intraday `interval` bars for `exchange`"""
+        if interval not in Resampler.INTERVAL_MINUTES:
+            raise Exception(f"Cannot derive {interval} bars from intraday bars")
+        tz, session_open, _ = Resampler.SESSIONS[exchange]
+        aggregations = {column: how for column, how in Resampler.AGGREGATIONS.items() if column in df.columns}
+        if df.empty:
+            return df.reindex(columns=list(aggregations))
+
+        index = df.index.tz_convert(tz) if df.index.tz is not None else df.index.tz_localize(tz)
+        # Bin in naive exchange wall time so DST changes don't shift the session grid
+        wall = index.tz_localize(None)
+        day = wall.normalize()
+        elapsed = (wall - day).to_numpy()
+
+        step = np.timedelta64(Resampler.INTERVAL_MINUTES[interval], 'm')
+        since_open = elapsed - session_open.to_numpy()
+        # Floor division keeps pre-open bars in their own bins before the open
+        keys = day + session_open + pd.to_timedelta((since_open // step) * step)
+
+        out = df.groupby(keys.to_numpy(), sort=True).agg(aggregations)
+        out = out[out['Close'].notna()] if 'Close' in out.columns else out
+        out.index = pd.DatetimeIndex(out.index).tz_localize(tz).tz_convert(df.index.tz or tz)
+        out.index.name = df.index.name
+        return out
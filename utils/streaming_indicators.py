@@ -0,0 +1,267 @@
+import math
+from collections import deque
+
+import pandas as pd
+
+from utils.metrics_calculator import MetricsCalculator
+
+
+class RollingWindow:
+    """
+    Fixed-size ring buffer with O(1) running mean and sample variance.
+
+    Uses the same add/remove (Welford) updates as pandas' rolling var, so
+    values track `Series.rolling(window).mean()/.std()` closely.
+    """
+
+    def __init__(self, window, values=None):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.mean = 0.0
+        self.ssqdm = 0.0
+        for value in values or []:
+            self.push(value)
+
+    def _add(self, value):
+        n = len(self.values)
+        delta = value - self.mean
+        self.mean += delta / n
+        self.ssqdm += ((n - 1) * delta * delta) / n
+
+    def _remove(self, value):
+        n = len(self.values)
+        if n == 0:
+            self.mean = 0.0
+            self.ssqdm = 0.0
+            return
+        delta = value - self.mean
+        self.mean -= delta / n
+        self.ssqdm -= ((n + 1) * delta * delta) / n
+
+    def push(self, value):
+        if len(self.values) == self.window:
+            oldest = self.values.popleft()
+            self._remove(oldest)
+        self.values.append(value)
+        self._add(value)
+
+    def undo_record(self):
+        """What undo() needs to take back the next push: (evicted value or None, mean, ssqdm)"""
+        evicted = self.values[0] if self.full else None
+        return evicted, self.mean, self.ssqdm
+
+    def undo(self, record):
+        """Take back the last push, given undo_record() from just before it"""
+        evicted, mean, ssqdm = record
+        self.values.pop()
+        if evicted is not None:
+            self.values.appendleft(evicted)
+        self.mean = mean
+        self.ssqdm = ssqdm
+
+    @property
+    def full(self):
+        return len(self.values) == self.window
+
+    def sum(self):
+        """Exact sum of the held values (the running mean drifts off zero on flat windows)"""
+        return math.fsum(self.values)
+
+    def std(self):
+        if len(self.values) < 2:
+            return float('nan')
+        return math.sqrt(max(self.ssqdm, 0.0) / (len(self.values) - 1))
+
+
+class StreamingEWM:
+    """Running `ewm(span=span, adjust=False).mean()` with O(1) updates"""
+
+    def __init__(self, span, value=None):
+        self.span = span
+        self.alpha = 2.0 / (span + 1.0)
+        self.value = value
+
+    def update(self, x):
+        if self.value is None:
+            self.value = x
+        elif self.value != x:
+            # Same arithmetic as pandas' adjust=False recurrence
+            decay = 1.0 - self.alpha
+            self.value = (decay * self.value + self.alpha * x) / (decay + self.alpha)
+        return self.value
+
+
+class IndicatorState:
+    """
+    Incremental version of MetricsCalculator.calculate_technical_indicators.
+
+    Holds the RSI gain/loss windows, the 12/26/9 MACD EWMs and the 20-bar
+    Bollinger window, so each new bar costs O(1) instead of a full recompute.
+    A bar with the same timestamp as the last one applied replaces it (a
+    partial bar being revised): what each bar changed is recorded and undone
+    first, which stays O(1) per bar. The state round-trips through
+    to_dict()/from_dict() (JSON-safe) so it can be stored next to cached
+    OHLCV history with HistoryCache.save_state().
+    """
+
+    RSI_WINDOW = 14
+    BAND_WINDOW = 20
+    # Bumped when the to_dict() layout changes; older saved states are rejected
+    STATE_VERSION = 2
+
+    def __init__(self):
+        self.gains = RollingWindow(self.RSI_WINDOW)
+        self.losses = RollingWindow(self.RSI_WINDOW)
+        self.band = RollingWindow(self.BAND_WINDOW)
+        self.fast = StreamingEWM(12)
+        self.slow = StreamingEWM(26)
+        self.signal = StreamingEWM(9)
+        self.last_close = None
+        self.last_timestamp = None
+        self.previous = None
+
+    @classmethod
+    def from_history(cls, df):
+        """Build state by replaying an OHLCV frame once"""
+        state = cls()
+        state.update_frame(df)
+        return state
+
+    def update(self, bar, timestamp=None):
+        """
+        Apply one bar (a mapping/Series with 'Close', or a bare close price).
+
+        Returns the indicator values for that bar, keyed like the columns of
+        calculate_technical_indicators. Bars with a missing close are skipped;
+        a bar at the last applied timestamp replaces that bar.
+        """
+        close = bar['Close'] if isinstance(bar, (dict, pd.Series)) else bar
+        close = float(close)
+        if math.isnan(close):
+            return self.current()
+        if timestamp is not None:
+            timestamp = pd.Timestamp(timestamp)
+            if timestamp == self.last_timestamp and self.previous is not None:
+                self._undo(self.previous)
+        self.previous = self._undo_record()
+
+        # RSI: the first bar has no change and counts as 0 gain/0 loss
+        delta = 0.0 if self.last_close is None else close - self.last_close
+        self.gains.push(delta if delta > 0 else 0.0)
+        self.losses.push(-delta if delta < 0 else 0.0)
+        self.last_close = close
+
+        macd = self.fast.update(close) - self.slow.update(close)
+        self.signal.update(macd)
+        self.band.push(close)
+
+        self.last_timestamp = timestamp
+        return self.current()
+
+    def update_frame(self, df):
+        """Apply the rows of df from the last applied bar on (that bar is replaced)"""
+        if self.last_timestamp is not None:
+            df = df[df.index >= self.last_timestamp]
+        for timestamp, close in df['Close'].items():
+            self.update(close, timestamp)
+        return self.current()
+
+    def current(self):
+        nan = float('nan')
+        if self.last_close is None:
+            return {name: nan for name in MetricsCalculator.INDICATORS}
+
+        rsi = nan
+        if self.gains.full:
+            gain = self.gains.sum() / self.RSI_WINDOW
+            loss = self.losses.sum() / self.RSI_WINDOW
+            if loss != 0:
+                rsi = 100 - (100 / (1 + gain / loss))
+            elif gain != 0:
+                rsi = 100.0
+
+        ma20 = std20 = nan
+        if self.band.full:
+            ma20 = self.band.mean
+            std20 = self.band.std()
+
+        macd = self.fast.value - self.slow.value
+        return {
+            'RSI': rsi,
+            'MACD': macd,
+            'Signal_Line': self.signal.value,
+            'MA20': ma20,
+            '20dSTD': std20,
+            'Upper_Band': ma20 + std20 * 2,
+            'Lower_Band': ma20 - std20 * 2
+        }
+
+    def _checkpoint(self):
+        return {
+            'gains': (list(self.gains.values), self.gains.mean, self.gains.ssqdm),
+            'losses': (list(self.losses.values), self.losses.mean, self.losses.ssqdm),
+            'band': (list(self.band.values), self.band.mean, self.band.ssqdm),
+            'fast': self.fast.value,
+            'slow': self.slow.value,
+            'signal': self.signal.value,
+            'last_close': self.last_close,
+            'last_timestamp': self.last_timestamp
+        }
+
+    def _restore(self, checkpoint):
+        for name in ('gains', 'losses', 'band'):
+            values, mean, ssqdm = checkpoint[name]
+            window = getattr(self, name)
+            window.values = deque(values, maxlen=window.window)
+            window.mean = mean
+            window.ssqdm = ssqdm
+        self.fast.value = checkpoint['fast']
+        self.slow.value = checkpoint['slow']
+        self.signal.value = checkpoint['signal']
+        self.last_close = checkpoint['last_close']
+        timestamp = checkpoint['last_timestamp']
+        self.last_timestamp = pd.Timestamp(timestamp) if timestamp is not None else None
+
+    def _undo_record(self):
+        """The scalars needed to take back the bar about to be applied"""
+        return {
+            'gains': self.gains.undo_record(),
+            'losses': self.losses.undo_record(),
+            'band': self.band.undo_record(),
+            'fast': self.fast.value,
+            'slow': self.slow.value,
+            'signal': self.signal.value,
+            'last_close': self.last_close,
+            'last_timestamp': self.last_timestamp
+        }
+
+    def _undo(self, record):
+        for name in ('gains', 'losses', 'band'):
+            getattr(self, name).undo(record[name])
+        self.fast.value = record['fast']
+        self.slow.value = record['slow']
+        self.signal.value = record['signal']
+        self.last_close = record['last_close']
+        timestamp = record['last_timestamp']
+        self.last_timestamp = pd.Timestamp(timestamp) if timestamp is not None else None
+        self.previous = None
+
+    @staticmethod
+    def _serializable(checkpoint):
+        timestamp = checkpoint['last_timestamp']
+        return dict(checkpoint, last_timestamp=timestamp.isoformat() if timestamp is not None else None)
+
+    def to_dict(self):
+        data = self._serializable(self._checkpoint())
+        data['previous'] = self._serializable(self.previous) if self.previous is not None else None
+        data['version'] = self.STATE_VERSION
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != cls.STATE_VERSION:
+            raise Exception(f"Unsupported indicator state version: {data.get('version')}")
+        state = cls()
+        state._restore(data)
+        state.previous = data.get('previous')
+        return state
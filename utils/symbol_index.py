@@ -0,0 +1,185 @@
+import csv
+import difflib
+import os
+import re
+from bisect import bisect_left
+from collections import defaultdict
+
+from utils.symbol_resolver import LISTINGS_PATH
+
+INDIAN_EXCHANGES = ('NSE', 'BSE')
+
+
+class SymbolIndex:
+    """
+    In-memory prefix index over symbols and company names from listing CSVs.
+
+    Symbol keys and name keys (the full name and each of its words) are
+    kept in two sorted arrays, so a prefix lookup is a binary search plus a
+    short scan. Names are fuzzy-matched only when no prefix matches exist,
+    and only against names sharing an n-gram with the query.
+    """
+
+    # Bound on how many symbol-prefix hits are ranked for very short queries
+    MAX_SCAN = 500
+    # Leading characters of each name indexed for fuzzy candidates
+    FUZZY_SPAN = 16
+
+    def __init__(self, paths=None):
+        self.paths = paths or [LISTINGS_PATH]
+        self._entries = []
+        self._symbol_keys = ([], [])
+        self._name_keys = ([], [])
+        self._names_by_initial = {}
+        self._grams = {}
+        self._built = False
+
+    @classmethod
+    def from_records(cls, records):
+        """Build an index from an iterable of dicts with symbol/name/exchange/yahoo_symbol"""
+        index = cls(paths=[])
+        index._build(records)
+        return index
+
+    def _read_listings(self):
+        for path in self.paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, newline='') as f:
+                yield from csv.DictReader(f)
+
+    def _build(self, records):
+        seen = set()
+        symbol_keyed = []
+        name_keyed = []
+        for row in records:
+            yahoo_symbol = row.get('yahoo_symbol') or row['symbol']
+            if yahoo_symbol in seen:
+                continue
+            seen.add(yahoo_symbol)
+            entry_id = len(self._entries)
+            name = row.get('name') or row['symbol']
+            self._entries.append({
+                'symbol': yahoo_symbol,
+                'name': name,
+                'exchange': row.get('exchange') or 'UNKNOWN',
+                '_raw': row['symbol'].upper()
+            })
+            for key in {row['symbol'].upper(), yahoo_symbol.upper()}:
+                symbol_keyed.append((key, entry_id))
+            name_keys = {name.upper()}
+            name_keys.update(word for word in re.split(r'[^A-Z0-9&]+', name.upper()) if word)
+            name_keyed.extend((key, entry_id) for key in name_keys)
+            self._names_by_initial.setdefault(name[:1].upper(), []).append((entry_id, name.upper()))
+
+        for keyed, target in ((symbol_keyed, '_symbol_keys'), (name_keyed, '_name_keys')):
+            keyed.sort()
+            setattr(self, target, ([key for key, _ in keyed], [entry_id for _, entry_id in keyed]))
+        self._built = True
+
+    def _scan(self, keys, query, max_hits):
+        """Yield (key, entry_id) for keys starting with query, at most max_hits"""
+        key_list, id_list = keys
+        pos = bisect_left(key_list, query)
+        stop = min(len(key_list), pos + max_hits)
+        while pos < stop and key_list[pos].startswith(query):
+            yield key_list[pos], id_list[pos]
+            pos += 1
+
+    def _ensure_built(self):
+        if not self._built:
+            self._build(self._read_listings())
+
+    def __len__(self):
+        self._ensure_built()
+        return len(self._entries)
+
+    @staticmethod
+    def _matches_market(entry, market_type):
+        if market_type == "Indian (NSE/BSE)":
+            return entry['exchange'] in INDIAN_EXCHANGES
+        if market_type == "Global":
+            return entry['exchange'] not in INDIAN_EXCHANGES
+        return True
+
+    def search(self, query, market_type="both", limit=10, fuzzy=True):
+        """Return ranked suggestions as dicts with symbol, name and exchange"""
+        self._ensure_built()
+        query = query.strip().upper()
+        if not query:
+            return []
+
+        ranked = {}
+        # Exact symbol > symbol prefix > name/word prefix; shorter symbols first
+        for key, entry_id in self._scan(self._symbol_keys, query, self.MAX_SCAN):
+            entry = self._entries[entry_id]
+            if not self._matches_market(entry, market_type):
+                continue
+            tier = 0 if key == query else 1
+            rank = (tier, len(entry['symbol']), entry['symbol'])
+            if entry_id not in ranked or rank < ranked[entry_id]:
+                ranked[entry_id] = rank
+
+        if len(ranked) < limit:
+            name_hits = 0
+            for key, entry_id in self._scan(self._name_keys, query, self.MAX_SCAN):
+                entry = self._entries[entry_id]
+                if entry_id in ranked or not self._matches_market(entry, market_type):
+                    continue
+                ranked[entry_id] = (2, len(entry['symbol']), entry['symbol'])
+                name_hits += 1
+                if len(ranked) >= limit and name_hits >= limit:
+                    break
+
+        if not ranked and fuzzy and len(query) >= 3:
+            for entry_id, score in self._fuzzy(query, market_type, limit):
+                ranked[entry_id] = (3, -score, self._entries[entry_id]['symbol'])
+
+        best = sorted(ranked, key=ranked.get)[:limit]
+        return [{key: self._entries[i][key] for key in ('symbol', 'name', 'exchange')} for i in best]
+
+    @staticmethod
+    def _gram_size(query):
+        # A typo breaks every trigram of a short query; bigrams still overlap
+        return 2 if len(query) < 6 else 3
+
+    def _grams_for(self, initial):
+        """Bigram/trigram -> entry ids over the leading FUZZY_SPAN characters of names with this initial"""
+        grams = self._grams.get(initial)
+        if grams is None:
+            grams = defaultdict(list)
+            for entry_id, name in self._names_by_initial.get(initial, []):
+                head = name[:self.FUZZY_SPAN]
+                keys = {head[i:i + 2] for i in range(len(head) - 1)}
+                keys.update(head[i:i + 3] for i in range(len(head) - 2))
+                for key in keys:
+                    grams[key].append(entry_id)
+            grams = self._grams[initial] = dict(grams)
+        return grams
+
+    def _fuzzy_candidates(self, query):
+        """Names sharing the first letter and at least one n-gram with the query"""
+        if len(query) + 2 > self.FUZZY_SPAN:
+            return self._names_by_initial.get(query[:1], [])
+        grams = self._grams_for(query[:1])
+        size = self._gram_size(query)
+        shared = set()
+        for gram in {query[i:i + size] for i in range(len(query) - size + 1)}:
+            shared.update(grams.get(gram, ()))
+        return [(entry_id, self._entries[entry_id]['name'].upper()) for entry_id in sorted(shared)]
+
+    def _fuzzy(self, query, market_type, limit):
+        """Approximate name matching for typos over names sharing the first letter and an n-gram"""
+        matcher = difflib.SequenceMatcher(autojunk=False)
+        matcher.set_seq2(query)
+        scored = []
+        for entry_id, name in self._fuzzy_candidates(query):
+            candidate = name[:len(query) + 2]
+            matcher.set_seq1(candidate)
+            if matcher.real_quick_ratio() < 0.6 or matcher.quick_ratio() < 0.6:
+                continue
+            score = matcher.ratio()
+            if score >= 0.6 and self._matches_market(self._entries[entry_id], market_type):
+                scored.append((entry_id, score))
+        scored.sort(key=lambda item: -item[1])
+        return scored[:limit]
@@ -0,0 +1,119 @@
+import csv
+import json
+import logging
+import os
+import threading
+import time
+
+from utils.instrumentation import Instrumentation
+from utils.request_governor import UpstreamUnavailable
+
+LISTINGS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'listings.csv')
+
+
+class SymbolResolver:
+    """
+    Persistent table mapping raw user input to a resolved exchange symbol.
+
+    Entries come from three places: the bundled NSE/BSE listings file
+    (never expire), successful network probes (expire after `ttl`) and
+    failed probes (negative entries, expire after `negative_ttl`). Probing
+    upstream is only needed when none of these has an answer.
+    """
+
+    def __init__(self, path=None, ttl=7 * 24 * 3600, negative_ttl=3600, listings_path=LISTINGS_PATH):
+        self.path = path or os.path.join(os.environ.get('STOCK_CACHE_DIR', '.cache'), 'symbols.json')
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.listings_path = listings_path
+        self._seeds = None
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+            except Exception as e:
+                logging.warning(f"Ignoring unreadable symbol cache {self.path}: {str(e)}")
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.warning(f"Could not write symbol cache {self.path}: {str(e)}")
+
+    def seeds(self):
+        """Return the raw symbol -> Yahoo symbol table from the listings file"""
+        if self._seeds is None:
+            seeds = {}
+            if self.listings_path and os.path.exists(self.listings_path):
+                with open(self.listings_path, newline='') as f:
+                    for row in csv.DictReader(f):
+                        # First listing wins, so NSE rows take precedence over later duplicates
+                        seeds.setdefault(row['symbol'].upper(), row['yahoo_symbol'])
+            self._seeds = seeds
+        return self._seeds
+
+    def lookup(self, raw):
+        """Return (resolved, found) for a cached answer, or None if it must be probed"""
+        raw = raw.upper()
+        seeded = self.seeds().get(raw)
+        if seeded:
+            return seeded, True
+        with self._lock:
+            self._load()
+            entry = self._entries.get(raw)
+        if entry is None or entry['expires'] < time.time():
+            return None
+        return entry['resolved'], entry['found']
+
+    def store(self, raw, resolved, found=True):
+        ttl = self.ttl if found else self.negative_ttl
+        with self._lock:
+            self._load()
+            self._entries[raw.upper()] = {
+                'resolved': resolved,
+                'found': found,
+                'expires': time.time() + ttl
+            }
+            self._save()
+
+    def resolve(self, raw, candidates, probe, default):
+        """
+        Resolve raw input to the first candidate for which probe(candidate) succeeds.
+
+        Falls back to `default` (cached as a negative entry) if every probe fails,
+        or (uncached) if a probe raises UpstreamUnavailable.
+        """
+        cached = self.lookup(raw)
+        if cached is not None:
+            Instrumentation.count('symbol_resolver.hit')
+            return cached[0]
+        Instrumentation.count('symbol_resolver.miss')
+
+        try:
+            for candidate in candidates:
+                if probe(candidate):
+                    self.store(raw, candidate, found=True)
+                    return candidate
+        except UpstreamUnavailable:
+            # Upstream is down, so this says nothing about the symbol: don't cache it
+            return default
+
+        self.store(raw, default, found=False)
+        return default
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            if os.path.exists(self.path):
+                os.remove(self.path)